@@ -0,0 +1,5 @@
+"""PyMonday - трекер задач для работы в терминале.
+
+Запуск: ``pymonday`` (после установки) или ``python -m pymonday``.
+Все операции трекера доступны из кода через ``pymonday.service.TrackerService``.
+"""
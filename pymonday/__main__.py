@@ -0,0 +1,5 @@
+"""Запуск трекера: ``python -m pymonday``"""
+from pymonday.treker import main
+
+if __name__ == "__main__":
+    main()
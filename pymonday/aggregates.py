@@ -0,0 +1,125 @@
+"""Агрегаты досок для панели управления.
+
+Для каждой доски поддерживаются счётчики элементов по статусам и
+ограниченный список самых новых элементов. Они обновляются при
+добавлении, перемещении и удалении элементов, поэтому панель управления
+складывает готовые счётчики и сливает короткие списки вместо сортировки
+всех элементов. Элементы, перенесённые в холодные сегменты, учитываются
+в счётчиках по статусам (``Board.cold``), но не в списке новых.
+
+Новые элементы на панели управления во всех хранилищах описываются
+одинаково: ``{"board": название доски, "board_id": id доски, "item":
+краткие сведения}``, где краткие сведения (``item_summary``) - поля
+``RECENT_ITEM_FIELDS`` элемента.
+"""
+import bisect
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+
+RECENT_SIZE = 20  # Сколько новых элементов хранить для каждой доски
+RECENT_ITEM_FIELDS = ("id", "name", "status", "created_at")
+
+
+def item_summary(item: Dict) -> Dict:
+    """Краткие сведения об элементе для панели управления"""
+    return {field: item[field] for field in RECENT_ITEM_FIELDS}
+
+
+def item_summaries(items: Dict) -> Iterable[Tuple[str, str, int]]:
+    """(id, статус, время создания) элементов доски
+
+    Элементы из двоичного снимка отдают эти поля без разбора записей.
+    """
+    summaries = getattr(items, "summaries", None)
+    if summaries is not None:
+        return summaries()
+    return ((item.id, item.status, item.created) for item in items.values())
+
+
+class BoardAggregates:
+    """Счётчики по статусам и новые элементы каждой доски"""
+
+    def __init__(self, boards: Dict, recent_size: int = RECENT_SIZE):
+        self.boards = boards
+        self.recent_size = recent_size
+        self.status_counts: Dict[str, Dict[str, int]] = {}
+        # Отсортированные по возрастанию пары (время создания в мкс, item_id)
+        self.recent: Dict[str, List[Tuple[int, str]]] = {}
+        for board_id in boards:
+            self.rebuild_board(board_id)
+
+    def rebuild_board(self, board_id: str):
+        """Пересчитать агрегаты одной доски"""
+        board = self.boards[board_id]
+        counts = {col: 0 for col in board["columns"]}
+        for status, count in board["cold"].get("counts", {}).items():
+            counts[status] = counts.get(status, 0) + count
+        summaries = list(item_summaries(board["items"]))
+        for _, status, _ in summaries:
+            counts[status] = counts.get(status, 0) + 1
+        self.status_counts[board_id] = counts
+        self.recent[board_id] = sorted(heapq.nlargest(
+            self.recent_size, ((created, item_id) for item_id, _, created in summaries)))
+
+    def add_board(self, board: Dict):
+        """Учесть новую доску"""
+        self.rebuild_board(board["id"])
+
+    def add_item(self, board_id: str, item: Dict):
+        """Учесть новый элемент"""
+        counts = self.status_counts[board_id]
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+        recent = self.recent[board_id]
+        bisect.insort(recent, (item.created, item.id))
+        if len(recent) > self.recent_size:
+            del recent[0]
+
+    def move_item(self, board_id: str, old_status: str, new_status: str):
+        """Учесть перемещение элемента между колонками"""
+        counts = self.status_counts[board_id]
+        counts[old_status] -= 1
+        counts[new_status] = counts.get(new_status, 0) + 1
+
+    def remove_item(self, board_id: str, item: Dict):
+        """Учесть удаление элемента (вызывается после удаления его с доски)"""
+        counts = self.status_counts[board_id]
+        counts[item["status"]] -= 1
+        recent = self.recent[board_id]
+        key = (item.created, item.id)
+        pos = bisect.bisect_left(recent, key)
+        if pos < len(recent) and recent[pos] == key:
+            del recent[pos]
+            if len(self.boards[board_id]["items"]) > len(recent):
+                # На доске есть элементы, не попавшие в список: заполняем его заново
+                self.rebuild_board(board_id)
+
+    def board_stats(self, board_id: str) -> Dict:
+        """Количество элементов доски по статусам"""
+        counts = self.status_counts[board_id]
+        return {
+            "total_items": sum(counts.values()),
+            "items_by_status": dict(counts)
+        }
+
+    def items_by_status(self, board_ids: Iterable[str]) -> Dict[str, int]:
+        """Суммарное количество элементов по статусам для нескольких досок"""
+        totals = {}
+        for board_id in board_ids:
+            for status, count in self.status_counts[board_id].items():
+                if count:
+                    totals[status] = totals.get(status, 0) + count
+        return totals
+
+    def recent_items(self, board_ids: Iterable[str], limit: int) -> List[Dict]:
+        """Самые новые элементы нескольких досок"""
+        candidates = (
+            (created, board_id, item_id)
+            for board_id in board_ids
+            for created, item_id in self.recent[board_id][-limit:]
+        )
+        return [{
+            "board": self.boards[board_id]["name"],
+            "board_id": board_id,
+            "item": item_summary(self.boards[board_id]["items"][item_id])
+        } for created, board_id, item_id in heapq.nlargest(limit, candidates)]
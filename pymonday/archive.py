@@ -0,0 +1,259 @@
+"""Архив и холодные данные PyMonday.
+
+Перенесённые в архив элементы и доски убираются из основных данных,
+поэтому просмотр, поиск, сохранение и загрузка работают только с
+активными данными, а архив читается лишь при его просмотре и
+восстановлении.
+
+Архив - файл в формате JSON Lines, в который только дописываются строки:
+
+- ``{"type": "item", "board_id": ..., "item": {...}, "archived_at": ...}``
+- ``{"type": "board", "board": {...}, "archived_at": ...}``
+- ``{"type": "restored", "board_id": ..., "item_id": ...}`` - элемент
+  (или доска, если ``item_id`` нет) восстановлен; более ранние строки
+  о нём больше не действуют.
+
+Строка архива записывается и сбрасывается на диск до операции переноса,
+поэтому данные не теряются при сбое между ними. Если операция так и не
+была записана, в архиве остаётся копия элемента, который по-прежнему
+на доске: такие копии не показывает ``TrackerService``.
+
+Холодные данные переносятся автоматически, по политике ``TieringPolicy``:
+давно завершённые элементы и старые комментарии. В отличие от архива,
+такие элементы остаются на доске в счётчиках по статусам (``Board.cold``),
+поэтому статистика не меняется. Каждый перенос записывает один сжатый
+(zlib или lzma) сегмент ``ColdStore`` и добавляет его имя в список
+сегментов доски. Сегменты читаются только по явному запросу; сегмент,
+которого нет в списке доски (перенос не был записан), не читается
+никогда и может быть удалён.
+"""
+import importlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pymonday.concurrency import FileLock
+from pymonday.instrumentation import metrics
+from pymonday.models import Board, Comment, Item
+from pymonday.storage import fsync_dir, json_default
+
+
+# Сжатие сегментов: модуль (с функциями compress и decompress) и
+# расширение файла. Модуль импортируется только при работе с сегментами.
+COMPRESSORS = {"zlib": ".z", "lzma": ".xz"}
+DAY = 86400 * 1000000  # Сутки в микросекундах (время в models хранится так)
+
+
+class ArchiveStore:
+    """Архив в файле JSON Lines рядом с файлом данных"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = FileLock(f"{path}.lock")
+
+    def _append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'),
+                          default=json_default) + "\n"
+        line = line.encode('utf-8')
+        # Строку могут дописывать несколько процессов
+        with self._lock, open(self.path, 'ab') as f:
+            f.write(line)
+            metrics.count("bytes_written", len(line))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add_item(self, board_id: str, item: Dict):
+        """Записать элемент в архив"""
+        self._append({"type": "item", "board_id": board_id, "item": item,
+                      "archived_at": datetime.now().isoformat()})
+
+    def add_board(self, board: Dict):
+        """Записать доску со всеми элементами в архив"""
+        self._append({"type": "board", "board": board,
+                      "archived_at": datetime.now().isoformat()})
+
+    def mark_restored(self, board_id: str, item_id: str = None):
+        """Отметить, что элемент (или доска без item_id) восстановлен"""
+        record = {"type": "restored", "board_id": board_id}
+        if item_id is not None:
+            record["item_id"] = item_id
+        self._append(record)
+
+    def _records(self) -> Iterator[Dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Строку ещё дописывает другой процесс
+                    break
+                yield json.loads(line)
+
+    def items(self, board_id: str) -> Dict[str, Item]:
+        """Элементы доски в архиве (последняя копия каждого), по порядку переноса"""
+        items = {}
+        for record in self._records():
+            if record.get("board_id") != board_id:
+                continue
+            if record["type"] == "item":
+                items.pop(record["item"]["id"], None)
+                items[record["item"]["id"]] = Item.from_dict(record["item"])
+            elif record["type"] == "restored" and "item_id" in record:
+                items.pop(record["item_id"], None)
+        return items
+
+    def items_by_board(self) -> Dict[str, Dict[str, Item]]:
+        """Элементы в архиве по id доски, за один проход по файлу"""
+        boards = {}
+        for record in self._records():
+            if record["type"] == "item":
+                items = boards.setdefault(record["board_id"], {})
+                items.pop(record["item"]["id"], None)
+                items[record["item"]["id"]] = Item.from_dict(record["item"])
+            elif record["type"] == "restored" and "item_id" in record:
+                boards.get(record["board_id"], {}).pop(record["item_id"], None)
+        return boards
+
+    def boards(self) -> Dict[str, Board]:
+        """Доски в архиве (последняя копия каждой)"""
+        boards = {}
+        for record in self._records():
+            if record["type"] == "board":
+                boards[record["board"]["id"]] = Board.from_dict(record["board"])
+            elif record["type"] == "restored" and "item_id" not in record:
+                boards.pop(record["board_id"], None)
+        return boards
+
+
+class TieringPolicy:
+    """Какие данные доски считать холодными
+
+    done_days - элементы в завершающих колонках (по умолчанию - последняя
+                колонка доски), к которым дольше стольких дней не было
+                активности (создание или комментарий)
+    comment_days - комментарии старше стольких дней
+    None отключает соответствующее правило.
+    """
+
+    def __init__(self, done_days: Optional[float] = None,
+                 comment_days: Optional[float] = None,
+                 done_columns: Optional[Sequence[str]] = None, compression: str = "zlib"):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        self.done_days = done_days
+        self.comment_days = comment_days
+        self.done_columns = done_columns
+        self.compression = compression
+
+    def select(self, board: Board, now: int) -> Tuple[List[Item], Dict[str, Tuple]]:
+        """Холодные элементы доски и холодные комментарии остальных элементов
+
+        now - текущее время в микросекундах. Комментарии возвращаются
+        по id элемента: самые старые комментарии, идущие подряд с начала.
+        """
+        items, comments = [], {}
+        done = set(self.done_columns or board["columns"][-1:])
+        done_before = None if self.done_days is None else now - self.done_days * DAY
+        comments_before = None if self.comment_days is None else now - self.comment_days * DAY
+        for item in board["items"].values():
+            if done_before is not None and item.status in done:
+                active = item.comments[-1].created if item.comments else item.created
+                if active < done_before:
+                    items.append(item)
+                    continue
+            if comments_before is not None and item.comments:
+                count = 0
+                for comment in item.comments:
+                    if comment.created >= comments_before:
+                        break
+                    count += 1
+                if count:
+                    comments[item.id] = item.comments[:count]
+        return items, comments
+
+
+class ColdStore:
+    """Сжатые сегменты холодных данных в каталоге рядом с файлом данных
+
+    Сегмент - JSON Lines со строками ``{"type": "item", "item": {...}}``
+    (элемент с оставшимися у него комментариями) и ``{"type": "comments",
+    "item_id": ..., "comments": [...]}``, сжатый целиком. Сегменты не
+    изменяются после записи.
+    """
+
+    def __init__(self, directory: str, compression: str = "zlib"):
+        self.directory = directory
+        self.compression = compression
+
+    def write_segment(self, board_id: str, items: Sequence[Item],
+                      comments: Dict[str, Sequence[Comment]]) -> str:
+        """Записать сегмент на диск и вернуть его имя"""
+        codec = importlib.import_module(self.compression)
+        # Имя уникально, поэтому сегменты разных процессов не пересекаются
+        name = f"{board_id}-{os.urandom(8).hex()}.jsonl{COMPRESSORS[self.compression]}"
+        records = [{"type": "item", "item": item} for item in items]
+        records.extend({"type": "comments", "item_id": item_id, "comments": list(item_comments)}
+                       for item_id, item_comments in comments.items())
+        data = codec.compress("\n".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=json_default)
+            for record in records).encode('utf-8'))
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            metrics.count("bytes_written", len(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        fsync_dir(path)
+        return name
+
+    def _records(self, name: str) -> Iterator[Dict]:
+        codec = importlib.import_module(next(
+            module for module, extension in COMPRESSORS.items() if name.endswith(extension)))
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            data = codec.decompress(f.read())
+        for line in data.decode('utf-8').splitlines():
+            yield json.loads(line)
+
+    def items(self, board: Board) -> Dict[str, Item]:
+        """Холодные элементы доски в порядке переноса"""
+        items = {}
+        for name in board["cold"].get("segments", ()):
+            for record in self._records(name):
+                if record["type"] == "item":
+                    items[record["item"]["id"]] = Item.from_dict(record["item"])
+        return items
+
+    def contents(self, board: Board) -> Tuple[Dict[str, Item], Dict[str, List[Comment]]]:
+        """Все холодные данные доски за один проход по сегментам
+
+        Возвращает холодные элементы (со своими комментариями) и
+        перенесённые отдельно комментарии по id элемента; отдельные
+        комментарии старше комментариев, оставшихся у элемента.
+        """
+        items, comments = {}, {}
+        for name in board["cold"].get("segments", ()):
+            for record in self._records(name):
+                if record["type"] == "item":
+                    items[record["item"]["id"]] = Item.from_dict(record["item"])
+                elif record["type"] == "comments":
+                    comments.setdefault(record["item_id"], []).extend(
+                        Comment.from_dict(comment) for comment in record["comments"])
+        return items, comments
+
+    def comments(self, board: Board, item_id: str) -> List[Comment]:
+        """Холодные комментарии элемента (и все комментарии холодного элемента)"""
+        comments = []
+        for name in board["cold"].get("segments", ()):
+            for record in self._records(name):
+                if record["type"] == "comments" and record["item_id"] == item_id:
+                    comments.extend(Comment.from_dict(comment)
+                                    for comment in record["comments"])
+                elif record["type"] == "item" and record["item"]["id"] == item_id:
+                    comments.extend(Comment.from_dict(comment)
+                                    for comment in record["item"]["comments"])
+        return comments
@@ -0,0 +1,178 @@
+"""Пароли и сеансы PyMonday.
+
+Пароль хранится в поле ``password`` пользователя строкой
+``scrypt$<N>$<r>$<p>$<соль>$<хеш>`` или
+``pbkdf2_sha256$<итераций>$<соль>$<хеш>`` (соль и хеш - base64).
+Стоимость хеширования настраивается (``PasswordHasher``). Пароли,
+сохранённые прежними версиями открытым текстом или с другой
+стоимостью, пересчитываются при первом успешном входе. После пересчёта
+пароля из открытого текста хранилище убирает его из своих файлов
+(``scrub_passwords``), а из JSON файла, из которого перенесены данные,
+его убирает ``scrub_legacy_passwords``.
+
+Проверка пароля нарочно медленная, поэтому для скриптов есть сеансы:
+команда ``login`` проверяет пароль один раз и выдаёт токен. Файл
+сеансов (``SessionStore``) лежит рядом с файлом данных и хранит не сами
+токены, а их SHA-256 с email и сроком действия, так что проверка токена -
+одно хеширование и поиск в словаре.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from typing import Dict, Optional, Tuple
+
+from pymonday.concurrency import FileLock
+from pymonday.storage import JournalStorage, read_json, write_json_atomic
+
+
+SCHEMES = ("scrypt", "pbkdf2")
+DEFAULT_SCHEME = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+# Стоимость по умолчанию: N для scrypt, число итераций для PBKDF2
+DEFAULT_COST = {"scrypt": 2 ** 14, "pbkdf2": 600000}
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+SALT_SIZE = 16
+SESSION_TTL = 7 * 86400  # Срок действия сеанса по умолчанию, с
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, size: int = 32) -> bytes:
+    # Памяти нужно 128 * r * n байт, по умолчанию OpenSSL разрешает только 32 МБ
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=size)
+
+
+def hash_params(stored: str) -> Optional[Tuple[str, int]]:
+    """Схема и стоимость хеша или None, если пароль сохранён открытым текстом"""
+    parts = stored.split("$")
+    if parts[0] == "scrypt" and len(parts) == 6 and parts[1].isdigit():
+        return "scrypt", int(parts[1])
+    if parts[0] == "pbkdf2_sha256" and len(parts) == 4 and parts[1].isdigit():
+        return "pbkdf2", int(parts[1])
+    return None
+
+
+def verify_password(stored: str, password: str) -> bool:
+    """Совпадает ли пароль с сохранённым (хешем или открытым текстом)"""
+    parts = stored.split("$")
+    try:
+        if hash_params(stored) is None:
+            return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+        if parts[0] == "scrypt":
+            expected = base64.b64decode(parts[5])
+            digest = _scrypt(password, base64.b64decode(parts[4]), int(parts[1]),
+                             int(parts[2]), int(parts[3]), len(expected))
+        else:
+            expected = base64.b64decode(parts[3])
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode('utf-8'),
+                                         base64.b64decode(parts[2]), int(parts[1]))
+    except (binascii.Error, ValueError):
+        # Испорченная запись не подходит ни к одному паролю
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+class PasswordHasher:
+    """Хеширование паролей: scrypt или PBKDF2-SHA256 со случайной солью
+
+    cost - N для scrypt (степень двойки) или число итераций PBKDF2,
+    по умолчанию - DEFAULT_COST.
+    """
+
+    def __init__(self, scheme: str = DEFAULT_SCHEME, cost: Optional[int] = None):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Неизвестная схема хеширования: {scheme}")
+        if scheme == "scrypt" and not hasattr(hashlib, "scrypt"):
+            raise ValueError("scrypt недоступен в этой сборке Python, используйте pbkdf2")
+        cost = DEFAULT_COST[scheme] if cost is None else cost
+        if cost < 2 or (scheme == "scrypt" and cost & (cost - 1)):
+            raise ValueError(f"Неверная стоимость хеширования: {cost}")
+        self.scheme = scheme
+        self.cost = cost
+
+    def hash(self, password: str) -> str:
+        """Хеш пароля в виде строки для поля ``password``"""
+        salt = os.urandom(SALT_SIZE)
+        if self.scheme == "scrypt":
+            digest = _scrypt(password, salt, self.cost, SCRYPT_BLOCK_SIZE, SCRYPT_PARALLELISM)
+            return (f"scrypt${self.cost}${SCRYPT_BLOCK_SIZE}${SCRYPT_PARALLELISM}$"
+                    f"{_b64(salt)}${_b64(digest)}")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode('utf-8'), salt, self.cost)
+        return f"pbkdf2_sha256${self.cost}${_b64(salt)}${_b64(digest)}"
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Нужно ли пересчитать сохранённый пароль (открытый текст, другая схема или стоимость)"""
+        return hash_params(stored) != (self.scheme, self.cost)
+
+
+def scrub_legacy_passwords(json_file: Optional[str], users: Dict):
+    """Заменить пароли открытым текстом в JSON файле, из которого перенесены данные
+
+    Файл (и его журнал) остаётся после переноса данных в другое
+    хранилище. Пароль заменяется текущим значением из users, если оно
+    уже хешировано; снимок и журнал сворачиваются в один файл.
+    """
+    if not json_file or not (os.path.exists(json_file)
+                             or os.path.exists(f"{json_file}.journal")):
+        return
+    source = JournalStorage(json_file, background=False)
+    try:
+        with source.lock():
+            legacy_users, boards = source.load()
+            scrubbed = False
+            for email, user in legacy_users.items():
+                current = users.get(email, {}).get("password")
+                if (hash_params(user["password"]) is None and current is not None
+                        and hash_params(current) is not None):
+                    user["password"] = current
+                    scrubbed = True
+            if scrubbed:
+                source.save(legacy_users, boards)
+    finally:
+        source.close()
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class SessionStore:
+    """Сеансы в файле JSON: SHA-256 токена -> email и срок действия"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = FileLock(f"{path}.lock")
+
+    def create(self, email: str, ttl: float = SESSION_TTL) -> str:
+        """Открыть сеанс и вернуть его токен; истёкшие сеансы удаляются"""
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        with self._lock:
+            sessions = {key: session for key, session in read_json(self.path).items()
+                        if session["expires"] > now}
+            sessions[_token_key(token)] = {"email": email, "expires": now + ttl}
+            write_json_atomic(self.path, sessions, indent=None)
+        return token
+
+    def lookup(self, token: str) -> Optional[str]:
+        """Email пользователя сеанса или None, если сеанса нет или он истёк"""
+        session = read_json(self.path).get(_token_key(token))
+        if session is None or session["expires"] <= time.time():
+            return None
+        return session["email"]
+
+    def revoke(self, token: str) -> bool:
+        """Закрыть сеанс; False, если его не было"""
+        with self._lock:
+            sessions: Dict = read_json(self.path)
+            if sessions.pop(_token_key(token), None) is None:
+                return False
+            write_json_atomic(self.path, sessions, indent=None)
+        return True
@@ -0,0 +1,11 @@
+"""Замеры производительности PyMonday.
+
+Каждый модуль запускается отдельно, например::
+
+    python -m pymonday.benchmarks.memory_model --items 1000000
+    python -m pymonday.benchmarks.workloads --scales 1000 100000 --output results.json
+    python -m pymonday.benchmarks.startup --items 100000 --target-ms 300
+
+``generator`` строит одинаковые при одном ``seed`` синтетические данные
+для замеров.
+"""
@@ -0,0 +1,108 @@
+"""Детерминированный генератор синтетических данных PyMonday.
+
+Одинаковые параметры и ``seed`` всегда дают одинаковые данные, поэтому
+замеры разных версий можно сравнивать между собой. Участие в досках
+неравномерное: вес пользователя убывает как ``1 / ранг ** skew``, так что
+несколько пользователей состоят почти во всех досках, а большинство - в
+одной-двух, как в настоящих командах::
+
+    python -m pymonday.benchmarks.generator pymonday_data.json --boards 100 --items-per-board 1000
+"""
+import argparse
+import random
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pymonday.models import Board, Comment, Item, parse_time
+
+
+STATUSES = ["To Do", "In Progress", "Review", "Done"]
+WORDS = ["отчёт", "релиз", "сервер", "клиент", "ошибка", "дизайн", "тест", "база",
+         "поиск", "доска", "оплата", "логин", "экспорт", "импорт", "ревью", "api",
+         "кэш", "миграция", "документация", "производительность", "интерфейс",
+         "уведомление", "профиль", "настройки", "безопасность", "отладка",
+         "сборка", "деплой", "метрики", "журнал"]
+START = parse_time(datetime(2024, 1, 1).isoformat())
+STEP = 37 * 1000000  # Между созданием соседних элементов, мкс
+
+
+def user_email(number: int) -> str:
+    return f"user{number}@example.com"
+
+
+def membership_weights(users: int, skew: float) -> List[float]:
+    """Вес каждого пользователя при выборе владельца и участников досок"""
+    return [1 / (rank + 1) ** skew for rank in range(users)]
+
+
+def generate(users: int = 100, boards: int = 10, items_per_board: int = 100,
+             comments_per_item: float = 0.5, max_members: int = 8, skew: float = 1.2,
+             seed: int = 1) -> Tuple[Dict, Dict]:
+    """Пользователи и доски в том виде, в каком их держит ``TrackerService``
+
+    comments_per_item - среднее число комментариев к элементу
+    max_members - наибольшее число участников доски (кроме владельца)
+    """
+    rng = random.Random(seed)
+    emails = [user_email(number) for number in range(users)]
+    weights = membership_weights(users, skew)
+    created_at = datetime(2024, 1, 1).isoformat()
+    user_records = {email: {"name": f"Пользователь {number}", "password": "secret",
+                            "created_at": created_at}
+                    for number, email in enumerate(emails)}
+
+    board_records = {}
+    moment = START
+    for board_number in range(1, boards + 1):
+        owner = rng.choices(emails, weights)[0]
+        members = {owner, *rng.choices(emails, weights, k=rng.randint(0, max_members))}
+        member_list = sorted(members)
+        board_id = f"board_{board_number}"
+        items = {}
+        for item_number in range(1, items_per_board + 1):
+            moment += STEP
+            item_id = f"item_{item_number}"
+            author = rng.choice(member_list)
+            comments = []
+            count = int(comments_per_item) + (rng.random() < comments_per_item % 1)
+            for number in range(count):
+                comments.append(Comment(f"Комментарий {number + 1}: {rng.choice(WORDS)}",
+                                        rng.choice(member_list), moment + number + 1))
+            items[item_id] = Item(
+                item_id,
+                f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {item_number}",
+                " ".join(rng.choices(WORDS, k=rng.randint(0, 12))),
+                rng.choice(STATUSES), author, moment, rng.choice(member_list), comments)
+        board_records[board_id] = Board(board_id, f"Проект {board_number}", owner,
+                                        START + board_number, STATUSES, items, members,
+                                        version=1)
+    return user_records, board_records
+
+
+def main():
+    from pymonday.service import TrackerService
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data_file")
+    parser.add_argument("--storage", default="journal",
+                        choices=["journal", "json", "binary", "sqlite", "sharded"])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--boards", type=int, default=10)
+    parser.add_argument("--items-per-board", type=int, default=100)
+    parser.add_argument("--comments-per-item", type=float, default=0.5)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    service = TrackerService(args.data_file, storage=args.storage)
+    service.users, service.boards = generate(args.users, args.boards, args.items_per_board,
+                                             args.comments_per_item, skew=args.skew,
+                                             seed=args.seed)
+    service.save_data()
+    service.close()
+    print(f"{args.data_file}: {args.users} пользователей, {args.boards} досок, "
+          f"{args.boards * args.items_per_board} элементов")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Память на элемент: словари против компактной модели (``models``).
+
+Элементы создаются так же, как при загрузке данных: каждый читается
+из строки JSON, поэтому у словарей статус, email и время - отдельные
+строки на каждый элемент. Учитывается память, которая остаётся занятой
+после построения (``tracemalloc``), и время полного прохода по
+элементам, как при подсчёте статистики по статусам::
+
+    python -m pymonday.benchmarks.memory_model --items 1000000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Tuple
+
+from pymonday.models import Item
+
+
+STATUSES = ["To Do", "In Progress", "Review", "Done"]
+USERS = [f"user{n}@example.com" for n in range(50)]
+
+
+def item_line(number: int, start: datetime) -> str:
+    """Строка JSON одного элемента, как в снимке или журнале"""
+    user = USERS[number % len(USERS)]
+    comments = []
+    if number % 10 == 0:
+        comments.append({"text": "Проверено", "author": user,
+                         "created_at": (start + timedelta(seconds=number + 1)).isoformat()})
+    return json.dumps({
+        "id": f"item_{number}",
+        "name": f"Задача {number}",
+        "description": "",
+        "status": STATUSES[number % len(STATUSES)],
+        "created_by": user,
+        "created_at": (start + timedelta(seconds=number, microseconds=number)).isoformat(),
+        "assigned_to": user,
+        "comments": comments
+    }, ensure_ascii=False)
+
+
+def build_dicts(count: int) -> Dict:
+    start = datetime(2024, 1, 1)
+    items = {}
+    for number in range(1, count + 1):
+        item = json.loads(item_line(number, start))
+        items[item["id"]] = item
+    return items
+
+
+def build_models(count: int) -> Dict:
+    start = datetime(2024, 1, 1)
+    items = {}
+    for number in range(1, count + 1):
+        item = Item.from_dict(json.loads(item_line(number, start)))
+        items[item.id] = item
+    return items
+
+
+def measure(build: Callable[[int], Dict], count: int) -> Tuple[Dict, int]:
+    """Построить элементы и вернуть их вместе с занятой ими памятью"""
+    gc.collect()
+    tracemalloc.start()
+    items = build(count)
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, used
+
+
+def scan(items: Dict) -> float:
+    """Время прохода по всем элементам через item["..."]: счётчики статусов"""
+    started = time.perf_counter()
+    counts = {}
+    for item in items.values():
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000000, help="количество элементов")
+    args = parser.parse_args()
+
+    print(f"Элементов: {args.items}")
+    print(f"{'модель':<10}{'МБ':>10}{'байт/элемент':>15}{'проход, с':>12}")
+    results = {}
+    for name, build in (("dict", build_dicts), ("slots", build_models)):
+        items, used = measure(build, args.items)
+        seconds = scan(items)
+        results[name] = used
+        print(f"{name:<10}{used / 2 ** 20:>10.1f}{used / args.items:>15.0f}{seconds:>12.2f}")
+        del items
+    print(f"Экономия: {1 - results['slots'] / results['dict']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Замер запуска PyMonday с проверкой целевого времени.
+
+Запускает трекер (``python -m pymonday``) отдельным процессом на
+синтетических данных и замеряет, через сколько появляется меню (данные
+в это время ещё загружаются), сколько длится сеанс из одного выхода (с
+полной загрузкой) и команда ``board list``. Если медиана появления меню больше
+``--target-ms``, программа завершается с кодом 1, поэтому замер можно
+запускать как проверку::
+
+    python -m pymonday.benchmarks.startup --items 100000 --target-ms 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from pymonday.benchmarks.generator import generate, user_email
+from pymonday.benchmarks.workloads import ITEMS_PER_BOARD, summarize
+from pymonday.service import TrackerService
+
+# Каталог, из которого импортируется пакет pymonday (для запуска из исходников)
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROMPT = "Выберите действие".encode('utf-8')
+
+
+def treker_command(data_file: str, storage: str, *args: str) -> List[str]:
+    return [sys.executable, "-m", "pymonday", "--data-file", data_file, "--storage", storage,
+            *args]
+
+
+def treker_env() -> Dict[str, str]:
+    """Окружение процесса трекера: пакет импортируется из тех же исходников"""
+    path = os.environ.get("PYTHONPATH")
+    return dict(os.environ, PYTHONIOENCODING="utf-8",
+                PYTHONPATH=PACKAGE_ROOT + (os.pathsep + path if path else ""))
+
+
+def menu_times(data_file: str, storage: str) -> Dict[str, float]:
+    """Время до появления меню и до завершения сеанса, с"""
+    started = time.perf_counter()
+    process = subprocess.Popen(treker_command(data_file, storage), stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, env=treker_env())
+    output = b""
+    while PROMPT not in output:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            raise RuntimeError("Трекер завершился, не показав меню")
+        output += chunk
+    menu = time.perf_counter() - started
+    process.communicate(b"0\n")
+    return {"menu": menu, "exit": time.perf_counter() - started}
+
+
+def command_time(data_file: str, storage: str) -> float:
+    """Время команды board list (загрузка всех данных), с"""
+    started = time.perf_counter()
+    subprocess.run(treker_command(data_file, storage, "--user", user_email(0),
+                                  "--password", "secret", "board", "list"),
+                   stdout=subprocess.DEVNULL, env=treker_env(), check=True)
+    return time.perf_counter() - started
+
+
+def prepare_data(data_file: str, storage: str, items: int, seed: int = 1):
+    """Записать синтетические данные с items элементами"""
+    boards = max(1, items // ITEMS_PER_BOARD)
+    service = TrackerService(data_file, storage=storage)
+    service.users, service.boards = generate(max(10, boards * 2), boards, items // boards,
+                                             seed=seed)
+    service.save_data()
+    service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000, help="общее число элементов")
+    parser.add_argument("--storage", default="journal",
+                        choices=["journal", "json", "binary", "sqlite", "sharded"])
+    parser.add_argument("--runs", type=int, default=5, help="сколько раз запускать")
+    parser.add_argument("--target-ms", type=float, default=300,
+                        help="наибольшая допустимая медиана появления меню, мс")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pymonday-startup-") as directory:
+        data_file = os.path.join(directory, "data.json")
+        prepare_data(data_file, args.storage, args.items, args.seed)
+        sessions = [menu_times(data_file, args.storage) for _ in range(args.runs)]
+        results = {
+            "menu": summarize([session["menu"] for session in sessions]),
+            "exit": summarize([session["exit"] for session in sessions]),
+            "board_list": summarize([command_time(data_file, args.storage)
+                                     for _ in range(args.runs)])
+        }
+
+    print(f"Элементов: {args.items}, хранилище: {args.storage}")
+    print(f"{'замер':<14}{'p50, мс':>11}{'p90, мс':>11}")
+    for name, summary in results.items():
+        print(f"{name:<14}{summary['p50_ms']:>11.2f}{summary['p90_ms']:>11.2f}")
+    if results["menu"]["p50_ms"] > args.target_ms:
+        print(f"Меню появляется дольше цели {args.target_ms:g} мс", file=sys.stderr)
+        sys.exit(1)
+    print(f"Цель {args.target_ms:g} мс выполнена")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Замеры основных операций трекера на данных разного размера.
+
+Для каждого масштаба (общего числа элементов) генерируются данные
+(``benchmarks.generator``), и через ``TrackerService`` без меню
+выполняются операции: полное сохранение и загрузка, поиск, панель
+управления, просмотр доски и добавление элемента. Для каждой операции
+печатаются перцентили задержки и пропускная способность, для загрузки -
+пиковая память (``tracemalloc``). Результаты сохраняются в JSON, а
+``--compare`` сравнивает их с сохранёнными ранее::
+
+    python -m pymonday.benchmarks.workloads --scales 1000 100000 1000000 --output new.json
+    python -m pymonday.benchmarks.workloads --scales 1000 100000 --compare new.json
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymonday.benchmarks.generator import WORDS, generate
+from pymonday.service import TrackerService
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+ITEMS_PER_BOARD = 1000
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    """Перцентиль по отсортированным значениям (ближайший ранг)"""
+    rank = max(1, math.ceil(share / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: List[float]) -> Dict:
+    """Перцентили задержки (мс) и пропускная способность (операций/с)"""
+    durations = sorted(durations)
+    total = sum(durations)
+    summary = {"runs": len(durations)}
+    for share in PERCENTILES:
+        summary[f"p{share}_ms"] = round(percentile(durations, share) * 1000, 3)
+    summary["max_ms"] = round(durations[-1] * 1000, 3)
+    summary["ops_per_second"] = round(len(durations) / total, 1) if total else None
+    return summary
+
+
+def timed(operation: Callable[[], object], runs: int) -> List[float]:
+    """Время каждого из ``runs`` вызовов операции, с"""
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый размер процесса в памяти, МБ (если известен)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def run_scale(items: int, storage: str, runs: int, writes: int, seed: int,
+              directory: str) -> Dict:
+    """Замерить все операции на данных из ``items`` элементов"""
+    boards = max(1, items // ITEMS_PER_BOARD)
+    users = max(10, boards * 2)
+    data_file = os.path.join(directory, f"bench_{items}.json")
+    rng = random.Random(seed)
+    operations = {}
+
+    users_data, boards_data = generate(users, boards, items // boards, seed=seed)
+    service = TrackerService(data_file, storage=storage)
+    service.users, service.boards = users_data, boards_data
+    operations["save_data"] = summarize(timed(service.save_data, 1))
+    service.close()
+    del service, users_data, boards_data
+    gc.collect()
+
+    durations = []
+    for run in range(runs):
+        started = time.perf_counter()
+        service = TrackerService(data_file, storage=storage)
+        durations.append(time.perf_counter() - started)
+        if run < runs - 1:
+            service.close()
+    operations["load_data"] = summarize(durations)
+
+    gc.collect()
+    tracemalloc.start()
+    TrackerService(data_file, storage=storage).close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    members = [email for email in service.users if service.list_boards(email)]
+    user_boards = {email: [board["id"] for board in service.list_boards(email)]
+                   for email in members}
+    operations["search_items"] = summarize(timed(
+        lambda: service.search(rng.choice(members), rng.choice(WORDS)[:4], limit=50),
+        runs))
+    operations["dashboard"] = summarize(timed(
+        lambda: service.dashboard_stats(rng.choice(members)), runs))
+
+    def view_board():
+        user = rng.choice(members)
+        service.board_view(user, rng.choice(user_boards[user]))
+
+    operations["view_board"] = summarize(timed(view_board, runs))
+
+    def add_item():
+        user = rng.choice(members)
+        service.add_item(user, rng.choice(user_boards[user]), "Новая задача", "тест")
+
+    operations["add_item"] = summarize(timed(add_item, writes))
+    service.close()
+    return {
+        "items": boards * (items // boards),
+        "boards": boards,
+        "users": users,
+        "operations": operations,
+        "load_peak_memory_mb": round(peak / 2 ** 20, 1),
+        "process_peak_rss_mb": peak_rss_mb()
+    }
+
+
+def print_scale(result: Dict, baseline: Optional[Dict] = None):
+    print(f"\nЭлементов: {result['items']}, досок: {result['boards']}, "
+          f"пользователей: {result['users']}, пик памяти загрузки: "
+          f"{result['load_peak_memory_mb']} МБ")
+    header = f"{'операция':<14}{'p50, мс':>11}{'p90, мс':>11}{'p99, мс':>11}{'оп/с':>11}"
+    if baseline is not None:
+        header += f"{'p50 / база':>12}"
+    print(header)
+    for name, summary in result["operations"].items():
+        line = (f"{name:<14}{summary['p50_ms']:>11.2f}{summary['p90_ms']:>11.2f}"
+                f"{summary['p99_ms']:>11.2f}{summary['ops_per_second'] or 0:>11.1f}")
+        if baseline is not None:
+            old = baseline["operations"].get(name)
+            if old and old["p50_ms"]:
+                line += f"{summary['p50_ms'] / old['p50_ms']:>12.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="общее число элементов для каждого замера (до 10000000)")
+    parser.add_argument("--storage", default="journal",
+                        choices=["journal", "json", "binary", "sqlite", "sharded"])
+    parser.add_argument("--runs", type=int, default=20,
+                        help="сколько раз выполнять операции чтения (загрузку тоже)")
+    parser.add_argument("--writes", type=int, default=200,
+                        help="сколько элементов добавить при замере записи")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="сохранить результаты в JSON файл")
+    parser.add_argument("--compare", help="JSON файл с прошлыми результатами")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = {result["items"]: result for result in json.load(f)["results"]}
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storage": args.storage,
+        "seed": args.seed,
+        "results": []
+    }
+    with tempfile.TemporaryDirectory(prefix="pymonday-bench-") as directory:
+        for items in args.scales:
+            result = run_scale(items, args.storage, args.runs, args.writes, args.seed,
+                               directory)
+            report["results"].append(result)
+            print_scale(result, baseline.get(result["items"]) if args.compare else None)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
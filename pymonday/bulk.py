@@ -0,0 +1,314 @@
+"""Массовый импорт и экспорт данных PyMonday (CSV и JSON Lines).
+
+Импорт устроен как цепочка генераторов: чтение строк -> проверка и
+превращение в операции -> пакеты -> запись пакета одной транзакцией.
+В памяти одновременно находится только текущий пакет, поэтому расход
+памяти конвейером не зависит от размера файла.
+
+Каждая строка файла - одна запись с полем ``type``:
+
+- ``user``: email, name, password (хеш из экспорта или пароль открытым
+  текстом - такой пароль хешируется при импорте)
+- ``board``: id (необязательно), name, owner, members, columns
+- ``item``: board, id (необязательно), name, description, status,
+  created_by, assigned_to, created_at
+- ``comment``: board, item, text, author, created_at
+
+В CSV списки (members, columns) записываются через ``;``. Остальные
+поля - строки; строка с полем другого типа пропускается, поле со
+значением null считается незаполненным.
+
+Экспорт выгружает и холодные данные (элементы и комментарии из сжатых
+сегментов) как обычные записи, после импорта они снова на доске.
+Архивные доски и элементы в экспорт не попадают: в формате нет признака
+архива, а импортированные записи стали бы активными. Их число
+возвращает ``export_file``.
+"""
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymonday.auth import hash_params
+from pymonday.concurrency import free_id
+from pymonday.models import Board, Comment, Item, parse_time
+
+
+CSV_FIELDS = ["type", "id", "board", "item", "email", "name", "password", "owner",
+              "members", "columns", "description", "status", "created_by",
+              "assigned_to", "text", "author", "created_at"]
+LIST_FIELDS = ("members", "columns")
+TEXT_FIELDS = tuple(field for field in CSV_FIELDS if field not in LIST_FIELDS)
+DEFAULT_COLUMNS = ["To Do", "In Progress", "Review", "Done"]
+BATCH_SIZE = 1000
+PROGRESS_EVERY = 10000
+
+
+class RecordError(ValueError):
+    """Ошибка в строке импортируемого файла"""
+
+
+def detect_format(path: str) -> str:
+    """Определить формат файла по расширению"""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# --- чтение ---
+
+def read_records(stream, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """Читать записи из файла по одной: (номер строки, запись)"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            record = {key: value for key, value in record.items() if value not in (None, "")}
+            for field in LIST_FIELDS:
+                if field in record:
+                    record[field] = [part.strip() for part in record[field].split(";")
+                                     if part.strip()]
+            yield reader.line_num, record
+    else:
+        for line_num, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield line_num, json.loads(line)
+                except ValueError:
+                    # Ошибку сообщит проверка записи, чтение продолжается
+                    yield line_num, None
+
+
+# --- проверка ---
+
+def _check_types(record: Dict):
+    for field in TEXT_FIELDS:
+        if field in record and not isinstance(record[field], str):
+            raise RecordError(f"поле {field} должно быть строкой")
+    for field in LIST_FIELDS:
+        if field in record and not (isinstance(record[field], list) and
+                                    all(isinstance(part, str) for part in record[field])):
+            raise RecordError(f"поле {field} должно быть списком строк")
+
+
+def _require(record: Dict, *fields: str):
+    missing = [field for field in fields if not record.get(field)]
+    if missing:
+        raise RecordError(f"не заполнены поля: {', '.join(missing)}")
+
+
+def _created_at(record: Dict, now: str) -> str:
+    value = record.get("created_at") or now
+    try:
+        parse_time(value)
+    except (TypeError, ValueError):
+        raise RecordError(f"неверная дата created_at: {value!r}")
+    return value
+
+
+def to_change(app, record: Dict) -> Tuple[str, Dict]:
+    """Проверить запись и превратить её в операцию PyMonday"""
+    if not isinstance(record, dict):
+        raise RecordError("строка не является JSON объектом")
+    record = {field: value for field, value in record.items() if value is not None}
+    _check_types(record)
+    kind = record.get("type")
+    now = datetime.now().isoformat()
+
+    if kind == "user":
+        _require(record, "email", "name", "password")
+        if record["email"] in app.users:
+            raise RecordError(f"пользователь {record['email']} уже существует")
+        password = record["password"]
+        if hash_params(password) is None:
+            # Открытый текст не должен попасть ни в журнал, ни в снимок
+            password = app.hasher.hash(password)
+        return "user_registered", {
+            "email": record["email"],
+            "user": {
+                "name": record["name"],
+                "password": password,
+                "created_at": record.get("created_at", now)
+            }
+        }
+
+    if kind == "board":
+        _require(record, "name", "owner")
+        board_id = record.get("id") or free_id("board", app.boards, len(app.boards) + 1)
+        if board_id in app.boards:
+            raise RecordError(f"доска {board_id} уже существует")
+        members = set(record.get("members") or []) | {record["owner"]}
+        unknown = [email for email in members if email not in app.users]
+        if unknown:
+            raise RecordError(f"неизвестные пользователи: {', '.join(sorted(unknown))}")
+        return "board_created", {
+            "board": Board(board_id, record["name"], record["owner"],
+                           _created_at(record, now),
+                           record.get("columns") or DEFAULT_COLUMNS, members=members)
+        }
+
+    if kind == "item":
+        _require(record, "board", "name")
+        if record["board"] not in app.boards or app.boards[record["board"]].removed:
+            raise RecordError(f"доска {record['board']} не найдена")
+        board = app.boards[record["board"]]
+        item_id = record.get("id") or f"item_{board['item_counter'] + 1}"
+        if item_id in board["items"]:
+            raise RecordError(f"элемент {item_id} уже есть на доске {board['id']}")
+        status = record.get("status") or board["columns"][0]
+        if status not in board["columns"]:
+            raise RecordError(f"колонки '{status}' нет на доске {board['id']}")
+        created_by = record.get("created_by") or board["owner"]
+        assigned_to = record.get("assigned_to") or created_by
+        for email in (created_by, assigned_to):
+            if email not in app.users:
+                raise RecordError(f"пользователь {email} не найден")
+        return "item_added", {
+            "board_id": board["id"],
+            "item": Item(item_id, record["name"], record.get("description", ""), status,
+                         created_by, _created_at(record, now), assigned_to)
+        }
+
+    if kind == "comment":
+        _require(record, "board", "item", "text", "author")
+        if record["board"] not in app.boards or app.boards[record["board"]].removed:
+            raise RecordError(f"доска {record['board']} не найдена")
+        if record["item"] not in app.boards[record["board"]]["items"]:
+            raise RecordError(f"элемент {record['item']} не найден")
+        if record["author"] not in app.users:
+            raise RecordError(f"пользователь {record['author']} не найден")
+        return "comment_added", {
+            "board_id": record["board"],
+            "item_id": record["item"],
+            "comment": Comment(record["text"], record["author"],
+                               _created_at(record, now))
+        }
+
+    raise RecordError(f"неизвестный тип записи: {kind!r}")
+
+
+def batched(records: Iterable, size: int) -> Iterator[List]:
+    """Разбить поток записей на пакеты по size штук"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- импорт ---
+
+def import_records(app, records: Iterable[Tuple[int, Dict]], batch_size: int = BATCH_SIZE,
+                   errors=sys.stderr, progress=None) -> Dict:
+    """Импортировать записи пакетами; каждый пакет - одна транзакция
+
+    Записи проверяются по мере применения, поэтому строка может ссылаться
+    на доски и элементы, созданные выше в том же файле. Неверные строки
+    пропускаются с сообщением в errors.
+    """
+    imported = skipped = 0
+    next_report = PROGRESS_EVERY
+    started = time.perf_counter()
+    for batch in batched(records, batch_size):
+        with app.transaction():
+            for line_num, record in batch:
+                try:
+                    op, data = to_change(app, record)
+                except RecordError as e:
+                    skipped += 1
+                    print(f"Строка {line_num}: {e}", file=errors)
+                    continue
+                app.commit(op, data)
+                imported += 1
+        if progress is not None and imported >= next_report:
+            progress(imported, time.perf_counter() - started)
+            next_report = imported + PROGRESS_EVERY
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "skipped": skipped,
+        "seconds": elapsed,
+        "rows_per_second": imported / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def import_file(app, path: str, fmt: Optional[str] = None, batch_size: int = BATCH_SIZE,
+                errors=sys.stderr, progress=None) -> Dict:
+    """Импортировать данные из CSV или JSON Lines файла"""
+    fmt = fmt or detect_format(path)
+    with open(path, 'r', encoding='utf-8', newline='') as stream:
+        return import_records(app, read_records(stream, fmt), batch_size,
+                              errors=errors, progress=progress)
+
+
+# --- экспорт ---
+
+def export_records(app) -> Iterator[Dict]:
+    """Все данные PyMonday в виде потока записей для импорта"""
+    for email, user in app.users.items():
+        yield {"type": "user", "email": email, "name": user["name"],
+               "password": user["password"], "created_at": user["created_at"]}
+    for board_id in list(app.boards):
+        board = app.boards[board_id]
+        if board.removed:
+            continue
+        yield {"type": "board", "id": board["id"], "name": board["name"],
+               "owner": board["owner"], "members": sorted(board["members"]),
+               "columns": board["columns"], "created_at": board["created_at"]}
+        cold_items, cold_comments = app.cold.contents(board) if board["cold"] else ({}, {})
+        for item in chain(board["items"].values(), cold_items.values()):
+            yield {"type": "item", "board": board["id"], "id": item["id"],
+                   "name": item["name"], "description": item["description"],
+                   "status": item["status"], "created_by": item["created_by"],
+                   "assigned_to": item["assigned_to"], "created_at": item["created_at"]}
+            # Перенесённые в сегменты комментарии старше оставшихся у элемента
+            for comment in chain(cold_comments.get(item["id"], ()), item["comments"]):
+                yield {"type": "comment", "board": board["id"], "item": item["id"],
+                       "text": comment["text"], "author": comment["author"],
+                       "created_at": comment["created_at"]}
+
+
+def archived_counts(app) -> Dict:
+    """Сколько архивных досок и элементов активных досок не попадает в экспорт"""
+    active = {board_id for board_id, board in app.boards.items() if not board.removed}
+    # Копия в архиве, чей перенос не был записан, по-прежнему на доске
+    items = sum(1 for board_id, archived in app.archive.items_by_board().items()
+                if board_id in active
+                for item_id in archived if item_id not in app.boards[board_id]["items"])
+    boards = sum(1 for board_id in app.archive.boards() if board_id not in active)
+    return {"archived_boards": boards, "archived_items": items}
+
+
+def export_file(app, path: str, fmt: Optional[str] = None) -> Dict:
+    """Выгрузить все данные в CSV или JSON Lines файл
+
+    Кроме числа выгруженных записей возвращает число невыгруженных
+    архивных досок и элементов (archived_boards, archived_items).
+    """
+    fmt = fmt or detect_format(path)
+    exported = 0
+    started = time.perf_counter()
+    with open(path, 'w', encoding='utf-8', newline='') as stream:
+        if fmt == "csv":
+            writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for record in export_records(app):
+                for field in LIST_FIELDS:
+                    if field in record:
+                        record[field] = ";".join(record[field])
+                writer.writerow(record)
+                exported += 1
+        else:
+            for record in export_records(app):
+                stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                exported += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "exported": exported,
+        "seconds": elapsed,
+        "rows_per_second": exported / elapsed if elapsed > 0 else 0.0,
+        **archived_counts(app)
+    }
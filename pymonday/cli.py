@@ -0,0 +1,506 @@
+"""Неинтерактивные команды PyMonday для скриптов.
+
+Команды работают напрямую с ``TrackerService``, без меню и вопросов::
+
+    pymonday user register ivan@example.com "Иван" --password secret
+    pymonday --user ivan@example.com board create "Проект"
+    pymonday --user ivan@example.com board list --json
+    pymonday --user ivan@example.com item move board_1 item_2 Done
+
+Пароль берётся из ``--password`` или переменной окружения
+``PYMONDAY_PASSWORD``. Проверка пароля медленная (см. ``auth``), поэтому
+скрипты могут один раз выполнить ``login`` и дальше передавать токен
+сеанса в ``--token`` или ``PYMONDAY_TOKEN``. С флагом ``--json``
+результат печатается одной строкой JSON, иначе - в виде текста.
+
+Команда ``batch`` читает команды построчно из stdin (или файла) и
+выполняет их в одном процессе, записывая изменения пакетами, поэтому
+тысячи операций не платят за запуск интерпретатора и запись на диск
+каждой. Команда ``serve`` запускает HTTP/JSON сервер (см. ``server.py``),
+а ``stats`` печатает замеры операций, выполненных в этом процессе
+(например, в конце ``batch``), см. ``instrumentation``. Команда ``sync``
+обменивается новыми событиями с другим файлом данных (см. ``events``)::
+
+    pymonday sync /backup/pymonday_data.json --peer-storage sqlite
+"""
+import argparse
+import json
+import os
+import shlex
+import sys
+from typing import List, Optional
+
+from pymonday.auth import SESSION_TTL
+from pymonday.instrumentation import INSTRUMENT_ENV, format_report, metrics
+from pymonday.service import TrackerError
+from pymonday.storage import json_default
+
+
+PASSWORD_ENV = "PYMONDAY_PASSWORD"
+TOKEN_ENV = "PYMONDAY_TOKEN"
+BATCH_SIZE = 1000  # Сколько команд batch записывать одной транзакцией
+
+
+class CommandError(TrackerError):
+    """Ошибка в аргументах команды"""
+
+
+# --- разбор аргументов ---
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Добавить к парсеру параметры входа и все команды"""
+    parser.add_argument("--user", help="email пользователя для команд")
+    parser.add_argument("--password",
+                        help=f"пароль (по умолчанию - из переменной {PASSWORD_ENV})")
+    parser.add_argument("--token",
+                        help=f"токен сеанса из login (по умолчанию - из переменной {TOKEN_ENV})")
+    add_commands(parser, batch=True)
+
+
+def add_commands(parser: argparse.ArgumentParser, batch: bool = False):
+    """Добавить к парсеру подкоманды"""
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="вывод в формате JSON")
+
+    commands = parser.add_subparsers(dest="command")
+
+    user = commands.add_parser("user", help="пользователи").add_subparsers(dest="action")
+    register = user.add_parser("register", parents=[output], help="регистрация")
+    register.add_argument("email")
+    register.add_argument("name")
+    register.add_argument("--password")
+
+    board = commands.add_parser("board", help="доски").add_subparsers(dest="action")
+    board.add_parser("list", parents=[output], help="доски пользователя")
+    create = board.add_parser("create", parents=[output], help="создать доску")
+    create.add_argument("name")
+    show = board.add_parser("show", parents=[output], help="элементы доски по колонкам")
+    show.add_argument("board")
+    invite = board.add_parser("invite", parents=[output], help="пригласить участника")
+    invite.add_argument("board")
+    invite.add_argument("email")
+    leave = board.add_parser("leave", parents=[output], help="покинуть доску")
+    leave.add_argument("board")
+    for action, help_text in (("delete", "удалить доску (только владелец)"),
+                              ("archive", "перенести доску в архив (только владелец)"),
+                              ("restore", "вернуть доску из архива")):
+        board.add_parser(action, parents=[output], help=help_text).add_argument("board")
+    board.add_parser("archived", parents=[output], help="доски пользователя в архиве")
+    changes = board.add_parser("changes", parents=[output],
+                               help="события доски после заданного номера")
+    changes.add_argument("board")
+    changes.add_argument("--since", type=int, default=0, metavar="SEQ",
+                         help="номер последнего уже известного события")
+    changes.add_argument("--limit", type=int, default=None)
+    report = board.add_parser("report", parents=[output],
+                              help="время цикла и пропускная способность доски")
+    report.add_argument("board")
+    report.add_argument("--done", metavar="STATUS",
+                        help="колонка завершённых элементов (по умолчанию - последняя)")
+
+    item = commands.add_parser("item", help="элементы").add_subparsers(dest="action")
+    add = item.add_parser("add", parents=[output], help="добавить элемент")
+    add.add_argument("board")
+    add.add_argument("name")
+    add.add_argument("--description", default="")
+    add.add_argument("--status", help="колонка (по умолчанию - первая)")
+    move = item.add_parser("move", parents=[output], help="переместить элемент")
+    move.add_argument("board")
+    move.add_argument("item")
+    move.add_argument("status")
+    comment = item.add_parser("comment", parents=[output], help="добавить комментарий")
+    comment.add_argument("board")
+    comment.add_argument("item")
+    comment.add_argument("text")
+    for action, help_text in (("delete", "удалить элемент"),
+                              ("archive", "перенести элемент в архив"),
+                              ("restore", "вернуть элемент из архива")):
+        removal = item.add_parser(action, parents=[output], help=help_text)
+        removal.add_argument("board")
+        removal.add_argument("item")
+    archived = item.add_parser("archived", parents=[output], help="элементы доски в архиве")
+    archived.add_argument("board")
+    cold = item.add_parser("cold", parents=[output], help="элементы доски в холодных сегментах")
+    cold.add_argument("board")
+    cold_comments = item.add_parser("cold-comments", parents=[output],
+                                    help="комментарии элемента в холодных сегментах")
+    cold_comments.add_argument("board")
+    cold_comments.add_argument("item")
+
+    search = commands.add_parser("search", parents=[output], help="поиск элементов")
+    search.add_argument("term")
+    search.add_argument("--limit", type=int, default=None)
+    search.add_argument("--substring", action="store_true",
+                        help="искать по подстроке, а не по словам")
+    search.add_argument("--include-cold", action="store_true",
+                        help="искать и в холодных сегментах (по подстроке)")
+
+    dashboard = commands.add_parser("dashboard", parents=[output],
+                                    help="статистика по доскам")
+    dashboard.add_argument("--recent", type=int, default=5,
+                           help="сколько последних элементов показать")
+
+    stats = commands.add_parser("stats", parents=[output],
+                                help="замеры операций (включаются --instrument)")
+    stats.add_argument("--export", metavar="PATH", help="сохранить замеры в файл")
+    stats.add_argument("--format", choices=["json", "prometheus"],
+                       help="формат файла (по умолчанию - по расширению)")
+
+    commands.add_parser("tier", parents=[output],
+                        help="перенести холодные данные по политике --cold-*")
+
+    if not batch:
+        return
+
+    batch_parser = commands.add_parser("batch", parents=[output],
+                                       help="выполнить команды из stdin или файла")
+    batch_parser.add_argument("path", nargs="?", help="файл с командами (по умолчанию stdin)")
+    batch_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                              help="сколько команд записывать одной транзакцией")
+
+    login_parser = commands.add_parser("login", parents=[output],
+                                       help="проверить пароль и выдать токен сеанса")
+    login_parser.add_argument("--ttl", type=float, default=SESSION_TTL / 3600, metavar="HOURS",
+                              help="срок действия сеанса в часах")
+    commands.add_parser("logout", parents=[output], help="закрыть сеанс --token")
+
+    serve_parser = commands.add_parser("serve", help="запустить HTTP/JSON сервер")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+
+    sync_parser = commands.add_parser("sync", parents=[output],
+                                      help="обменяться изменениями с другим файлом данных")
+    sync_parser.add_argument("path", help="файл данных другого хранилища")
+    sync_parser.add_argument("--peer-storage", default="journal",
+                             choices=["journal", "json", "binary", "sqlite", "sharded"],
+                             help="способ хранения другого файла данных")
+
+    import_parser = commands.add_parser("import", help="импорт из CSV или JSON Lines")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"],
+                               help="формат файла (по умолчанию - по расширению)")
+    import_parser.add_argument("--batch-size", type=int, default=1000,
+                               help="сколько строк записывать одной транзакцией")
+    export_parser = commands.add_parser("export", help="экспорт в CSV или JSON Lines")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"],
+                               help="формат файла (по умолчанию - по расширению)")
+
+
+# --- выполнение ---
+
+def session_token(args) -> Optional[str]:
+    """Токен сеанса из --token или переменной окружения"""
+    return args.token or os.environ.get(TOKEN_ENV) or None
+
+
+def login(service, args) -> str:
+    """Проверить токен сеанса или --user и пароль, вернуть email
+
+    Токен используется, если не указан пароль.
+    """
+    token = session_token(args)
+    if token and not args.password:
+        email = service.authenticate_token(token)
+        if args.user and args.user != email:
+            raise CommandError("Токен сеанса выдан другому пользователю")
+        return email
+    if not args.user:
+        raise CommandError("Укажите пользователя: --user EMAIL")
+    password = args.password or os.environ.get(PASSWORD_ENV, "")
+    service.authenticate(args.user, password)
+    return args.user
+
+
+def execute(service, user: Optional[str], args):
+    """Выполнить одну команду и вернуть её результат"""
+    if args.command == "user" and args.action == "register":
+        password = args.password or os.environ.get(PASSWORD_ENV)
+        if not password:
+            raise CommandError(f"Укажите пароль: --password или {PASSWORD_ENV}")
+        service.register_user(args.email, args.name, password)
+        return {"email": args.email, "name": args.name}
+
+    if args.command == "login":
+        if not args.user:
+            raise CommandError("Укажите пользователя: --user EMAIL")
+        password = args.password or os.environ.get(PASSWORD_ENV, "")
+        return {"email": args.user,
+                "token": service.create_session(args.user, password, args.ttl * 3600)}
+
+    if args.command == "logout":
+        token = session_token(args)
+        if not token:
+            raise CommandError(f"Укажите токен: --token или {TOKEN_ENV}")
+        service.end_session(token)
+        return {}
+
+    if args.command == "stats":
+        if args.export:
+            metrics.export(args.export, args.format)
+        return metrics.report()
+
+    if args.command == "tier":
+        return service.tier()
+
+    if user is None:
+        raise CommandError(f"Укажите пользователя: --user EMAIL или токен сеанса ({TOKEN_ENV})")
+
+    if args.command == "board":
+        if args.action == "list":
+            return service.list_boards(user)
+        if args.action == "create":
+            return service.create_board(user, args.name)
+        if args.action == "show":
+            return service.board_view(user, args.board)
+        if args.action == "invite":
+            service.add_member(user, args.board, args.email)
+            return {"board": args.board, "email": args.email}
+        if args.action == "leave":
+            service.leave_board(user, args.board)
+            return {"board": args.board}
+        if args.action == "delete":
+            service.delete_board(user, args.board)
+            return {"board": args.board}
+        if args.action == "archive":
+            return service.archive_board(user, args.board)
+        if args.action == "restore":
+            return service.restore_board(user, args.board)
+        if args.action == "archived":
+            return service.archived_boards(user)
+        if args.action == "changes":
+            return service.changes(user, args.board, args.since, args.limit)
+        if args.action == "report":
+            return service.board_report(user, args.board, args.done)
+    elif args.command == "item":
+        if args.action == "add":
+            return service.add_item(user, args.board, args.name, args.description,
+                                    args.status)
+        if args.action == "move":
+            return service.move_item(user, args.board, args.item, args.status)
+        if args.action == "comment":
+            return service.add_comment(user, args.board, args.item, args.text)
+        if args.action == "delete":
+            service.delete_item(user, args.board, args.item)
+            return {"board": args.board, "item": args.item}
+        if args.action == "archive":
+            return service.archive_item(user, args.board, args.item)
+        if args.action == "restore":
+            return service.restore_item(user, args.board, args.item)
+        if args.action == "archived":
+            return service.archived_items(user, args.board)
+        if args.action == "cold":
+            return service.cold_items(user, args.board)
+        if args.action == "cold-comments":
+            return service.cold_comments(user, args.board, args.item)
+    elif args.command == "search":
+        return service.search(user, args.term, limit=args.limit, substring=args.substring,
+                              include_cold=args.include_cold)
+    elif args.command == "dashboard":
+        return service.dashboard_stats(user, args.recent)
+    raise CommandError("Укажите действие, см. --help")
+
+
+def format_text(args, result) -> List[str]:
+    """Результат команды в виде строк текста"""
+    if args.command == "user":
+        return [f"Пользователь {result['name']} зарегистрирован: {result['email']}"]
+    if args.command == "board":
+        if args.action == "list":
+            return [f"{board['id']}\t{board['name']}\t"
+                    f"элементов: {board['items_count']}\tучастников: {len(board['members'])}"
+                    for board in result]
+        if args.action == "create":
+            return [result["id"]]
+        if args.action == "show":
+            lines = [f"{result['board']['id']}\t{result['board']['name']}"]
+            for column, items in result["columns"].items():
+                lines.append(f"--- {column} ({len(items)}) ---")
+                lines.extend(f"  {item['id']}\t{item['name']}" for item in items)
+            return lines
+        if args.action == "invite":
+            return [f"{result['email']} добавлен(а) на доску {result['board']}"]
+        if args.action == "leave":
+            return [f"Вы покинули доску {result['board']}"]
+        if args.action == "delete":
+            return [f"Доска {result['board']} удалена"]
+        if args.action == "archive":
+            return [f"Доска {result['id']} перенесена в архив"]
+        if args.action == "restore":
+            return [f"Доска {result['id']} восстановлена"]
+        if args.action == "archived":
+            return [f"{board['id']}\t{board['name']}\tэлементов: {len(board['items'])}"
+                    for board in result]
+        if args.action == "changes":
+            return [f"{event['seq']}\t{event['at']}\t{event['op']}" for event in result["events"]]
+        if args.action == "report":
+            lines = [f"Завершено ({result['done']}): {result['completed']}"]
+            cycle_time = result["cycle_time_hours"]
+            if cycle_time is not None:
+                lines.append(f"Время цикла, ч: среднее {cycle_time['mean']:.1f}, "
+                             f"медиана {cycle_time['median']:.1f}, p90 {cycle_time['p90']:.1f}")
+            lines.extend(f"  {week}: {count}" for week, count in result["throughput"].items())
+            return lines
+    if args.command == "item":
+        if args.action == "add":
+            return [result["id"]]
+        if args.action == "move":
+            return [f"{result['id']} -> {result['status']}"]
+        if args.action == "comment":
+            return ["Комментарий добавлен"]
+        if args.action == "delete":
+            return [f"Элемент {result['item']} удалён"]
+        if args.action == "archive":
+            return [f"Элемент {result['id']} перенесён в архив"]
+        if args.action == "restore":
+            return [f"{result['id']} -> {result['status']}"]
+        if args.action in ("archived", "cold"):
+            return [f"{item['id']}\t{item['status']}\t{item['name']}" for item in result]
+        if args.action == "cold-comments":
+            return [f"{comment['created_at']}\t{comment['author']}\t{comment['text']}"
+                    for comment in result]
+    if args.command == "login":
+        return [result["token"]]
+    if args.command == "logout":
+        return ["Сеанс закрыт"]
+    if args.command == "search":
+        return [f"{found['board']}\t{found['item']['id']}\t{found['item']['status']}\t"
+                f"{found['item']['name']}" + ("\t(холодный)" if found.get("cold") else "")
+                for found in result]
+    if args.command == "sync":
+        return [f"Получено событий: {result['pulled']}, отправлено: {result['pushed']}"]
+    if args.command == "tier":
+        return [f"Досок: {result['boards']}, элементов: {result['items']}, "
+                f"комментариев: {result['comments']}"]
+    if args.command == "stats":
+        lines = format_report(result).splitlines()
+        if not metrics.enabled:
+            lines.append(f"Замеры выключены: используйте --instrument или {INSTRUMENT_ENV}=1")
+        if args.export:
+            lines.append(f"Замеры сохранены в {args.export}")
+        return lines
+    if args.command == "dashboard":
+        lines = [f"Досок: {result['boards_count']}",
+                 f"Элементов: {result['total_items']}"]
+        lines.extend(f"  {status}: {count}"
+                     for status, count in result["items_by_status"].items())
+        lines.extend(f"{entry['board']}\t{entry['item']['id']}\t{entry['item']['name']}"
+                     for entry in result["recent_items"])
+        return lines
+    return []
+
+
+def print_result(args, result, out=sys.stdout):
+    """Напечатать результат команды как текст или JSON"""
+    if args.json:
+        out.write(json.dumps(result, ensure_ascii=False, default=json_default) + "\n")
+    else:
+        for line in format_text(args, result):
+            out.write(line + "\n")
+
+
+def run_batch(service, user: Optional[str], args, out=sys.stdout, errors=sys.stderr) -> int:
+    """Выполнить команды построчно; вернуть количество ошибок
+
+    Строки разбираются как аргументы командной строки (shlex), пустые
+    строки и строки с ``#`` в начале пропускаются. Изменения записываются
+    одной транзакцией на каждые batch_size команд; ошибка в команде не
+    отменяет остальные.
+    """
+    from pymonday import bulk
+
+    parser = argparse.ArgumentParser(prog="batch", add_help=False)
+    add_commands(parser)
+
+    def lines(stream):
+        for line_num, line in enumerate(stream, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line_num, line
+
+    def run(stream):
+        failed = 0
+        for batch in bulk.batched(lines(stream), args.batch_size):
+            with service.transaction():
+                for line_num, line in batch:
+                    try:
+                        command = parser.parse_args(shlex.split(line))
+                        command.json = command.json or args.json
+                        result = execute(service, user, command)
+                    except (TrackerError, ValueError, SystemExit) as e:
+                        failed += 1
+                        message = str(e) if not isinstance(e, SystemExit) else "неверная команда"
+                        if args.json:
+                            out.write(json.dumps({"line": line_num, "error": message},
+                                                 ensure_ascii=False) + "\n")
+                        else:
+                            print(f"Строка {line_num}: {message}", file=errors)
+                        continue
+                    print_result(command, result, out)
+        return failed
+
+    if args.path:
+        with open(args.path, 'r', encoding='utf-8') as stream:
+            return run(stream)
+    return run(sys.stdin)
+
+
+def run_bulk(service, args):
+    """Импорт и экспорт файлов"""
+    from pymonday import bulk
+
+    if args.command == "import":
+        def progress(rows, seconds):
+            print(f"  {rows} строк, {rows / seconds:.0f} строк/с")
+
+        result = bulk.import_file(service, args.path, args.format, args.batch_size,
+                                  progress=progress)
+        print(f"Импортировано: {result['imported']}, пропущено: {result['skipped']}, "
+              f"{result['seconds']:.2f} с ({result['rows_per_second']:.0f} строк/с)")
+    else:
+        result = bulk.export_file(service, args.path, args.format)
+        print(f"Выгружено: {result['exported']}, "
+              f"{result['seconds']:.2f} с ({result['rows_per_second']:.0f} строк/с)")
+        if result["archived_boards"] or result["archived_items"]:
+            print(f"Не выгружены архивные доски: {result['archived_boards']}, "
+                  f"элементы: {result['archived_items']}")
+
+
+def run_sync(service, args):
+    """Синхронизация с другим файлом данных"""
+    from pymonday.service import TrackerService
+
+    peer = TrackerService(args.path, storage=args.peer_storage, hasher=service.hasher)
+    try:
+        return service.sync(peer)
+    finally:
+        peer.close()
+
+
+def run_command(service, args) -> int:
+    """Выполнить команду командной строки; вернуть код завершения"""
+    if args.command == "serve":
+        from pymonday import server
+
+        server.serve(service, args.host, args.port)
+        return 0
+    if args.command in ("import", "export"):
+        run_bulk(service, args)
+        return 0
+
+    try:
+        user = None
+        if (args.command not in ("user", "login", "logout", "sync")
+                and (args.user or session_token(args))):
+            user = login(service, args)
+        if args.command == "batch":
+            return 1 if run_batch(service, user, args) else 0
+        if args.command == "sync":
+            result = run_sync(service, args)
+        else:
+            result = execute(service, user, args)
+    except TrackerError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print_result(args, result)
+    return 0
@@ -0,0 +1,202 @@
+"""Совместная работа нескольких процессов с одними данными.
+
+Запись защищена рекомендательной блокировкой файла (``FileLock``):
+процесс берёт её на время ``flush``, проверяет, не изменил ли данные
+другой процесс, и только потом пишет. Если данные изменились, процесс
+перечитывает их и заново применяет свои незаписанные операции поверх
+чужих (``merge_change``): совпавшие id новых досок и элементов получают
+следующие свободные номера (для элементов - по счётчику доски
+``item_counter``), перемещение сверяется с текущим статусом
+элемента, а операции, которые уже нельзя применить, отбрасываются.
+Так ни одна из записей не затирает другую.
+
+Каждая доска хранит счётчик изменений ``version``; по нему видно, какие
+доски изменились с момента загрузки.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from pymonday.models import id_number
+
+
+LOCK_TIMEOUT = 10.0  # Сколько секунд ждать блокировку
+LOCK_RETRY_MIN = 0.001
+LOCK_RETRY_MAX = 0.05
+
+
+class LockTimeout(TimeoutError):
+    """Блокировку файла держит другой процесс слишком долго"""
+
+
+class FileLock:
+    """Рекомендательная блокировка файла между процессами
+
+    Повторный захват из того же потока разрешён; другие потоки этого
+    процесса ждут, как и другие процессы. Пока блокировка занята,
+    попытки повторяются с растущей паузой до ``timeout`` секунд.
+    """
+
+    def __init__(self, path: str, timeout: float = LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def _try_lock(self) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Захватить блокировку; при blocking=False - только если она свободна"""
+        if not self._thread_lock.acquire(blocking, self.timeout if blocking else -1):
+            if blocking:
+                raise LockTimeout(f"Не удалось заблокировать {self.path}")
+            return False
+        if self._depth:
+            self._depth += 1
+            return True
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        delay = LOCK_RETRY_MIN
+        while not self._try_lock():
+            if not blocking or time.monotonic() >= deadline:
+                os.close(self._fd)
+                self._fd = None
+                self._thread_lock.release()
+                if blocking:
+                    raise LockTimeout(f"Файл {self.path} занят другим процессом")
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, LOCK_RETRY_MAX)
+        self._depth = 1
+        return True
+
+    def release(self):
+        """Освободить блокировку"""
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Признаки изменения файла: (inode, размер, время изменения) или None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def copy_change(op: str, data: Dict) -> Dict:
+    """Копия операции, которую не затронут следующие изменения данных
+
+    apply_change вставляет объекты из data в данные как есть, и потом
+    они меняются (в элемент добавляются комментарии, меняется статус),
+    поэтому для повторного применения нужна копия на момент операции.
+    Вызывается после apply_change, когда в data уже объекты ``models``.
+    """
+    if op in ("item_added", "item_restored"):
+        return dict(data, item=data["item"].copy())
+    if op in ("board_created", "board_restored"):
+        return dict(data, board=data["board"].copy())
+    return dict(data)
+
+
+def free_id(prefix: str, taken, start: int) -> str:
+    """Первый свободный id вида ``<prefix>_<номер>`` начиная с номера start"""
+    number = start
+    while f"{prefix}_{number}" in taken:
+        number += 1
+    return f"{prefix}_{number}"
+
+
+def merge_change(users: Dict, boards: Dict, op: str, data: Dict, remap: Dict) -> bool:
+    """Подготовить свою операцию к применению поверх чужих изменений
+
+    data исправляется на месте; remap запоминает новые id досок
+    (ключ - старый id) и элементов (ключ - пара id доски и элемента),
+    чтобы следующие операции ссылались на них. Возвращает False, если
+    операцию применить уже нельзя.
+    """
+    if op == "user_registered":
+        return data["email"] not in users
+    if op == "password_changed":
+        return data["email"] in users
+
+    if op == "board_created":
+        board = data["board"]
+        if board["id"] in boards:
+            new_id = free_id("board", boards, len(boards) + 1)
+            remap[board["id"]] = new_id
+            board["id"] = new_id
+        return True
+
+    board_id = data["board_id"] = remap.get(data["board_id"], data["board_id"])
+    if board_id not in boards:
+        return False
+    board = boards[board_id]
+    if op == "board_restored":
+        return not board["members"]
+    if not board["members"]:
+        # Доску удалил или перенёс в архив другой процесс
+        return False
+    if op in ("board_deleted", "board_archived"):
+        return True
+    if op == "board_tiered":
+        # Сегмент записан по прежнему состоянию доски: перенос выполнится
+        # заново при следующем запуске политики, а сегмент не будет прочитан
+        return False
+
+    if op == "item_added":
+        item = data["item"]
+        # Номер мог уже выдать другой процесс (даже если тот элемент удалён)
+        if item["id"] in board["items"] or 0 < id_number(item["id"]) <= board["item_counter"]:
+            new_id = f"item_{board['item_counter'] + 1}"
+            remap[(board_id, item["id"])] = new_id
+            item["id"] = new_id
+        return item["status"] in board["columns"]
+
+    if op == "item_restored":
+        return (data["item"]["id"] not in board["items"]
+                and data["item"]["status"] in board["columns"])
+
+    if op in ("item_moved", "comment_added", "item_deleted", "item_archived"):
+        item_id = remap.get((board_id, data["item_id"]), data["item_id"])
+        if item_id not in board["items"]:
+            return False
+        data["item_id"] = item_id
+        if op == "item_moved":
+            # Статус мог поменять другой процесс: перемещаем из текущего
+            data["from_status"] = board["items"][item_id]["status"]
+        return True
+
+    # Добавление и удаление участника можно применять повторно
+    return True
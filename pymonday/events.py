@@ -0,0 +1,182 @@
+"""Журнал событий досок PyMonday.
+
+Каждое записанное изменение доски дописывается строкой JSON в файл
+доски ``<файл данных>.events/<id доски>.jsonl``::
+
+    {"seq": 12, "op": "item_moved", "data": {...}, "at": "2026-10-16T12:00:00"}
+
+``seq`` - номер события на доске: счётчик изменений доски ``version``
+после операции, поэтому номера растут без пропусков и согласованы
+между процессами (события пишутся под блокировкой фиксации хранилища
+``commit_lock``). ``op`` и ``data`` - та же операция, что и в журнале
+хранилища (``storage``).
+События, полученные синхронизацией, дополнительно содержат ``from`` -
+хранилище, доску, номер события и элемент в его журнале.
+
+Строка пишется после записи данных: при сбое между ними последние
+события могут не попасть в журнал, но журнал никогда не содержит
+изменений, которых нет в данных. Недописанная при сбое строка
+отрезается перед следующей записью.
+
+Номера событий в файле доски только растут, поэтому событие с нужным
+номером находится двоичным поиском по позиции в файле
+(``offset_after``), а не чтением файла с начала.
+
+Для синхронизации у каждого журнала есть свой id (``store.json``), а в
+``peers.json`` для каждого другого хранилища хранится, до какого места
+прочитан его журнал и как его id досок и элементов соответствуют своим.
+"""
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from pymonday.instrumentation import metrics
+from pymonday.storage import json_default, read_json, trim_torn_tail, write_json_atomic
+
+
+SEEK_BLOCK = 64 * 1024  # Меньше этого двоичный поиск не дробит файл, а читает подряд
+
+
+class EventLog:
+    """Журналы событий досок в каталоге рядом с файлом данных"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._store_cache = None
+
+    def _board_file(self, board_id: str) -> str:
+        return os.path.join(self.directory, f"{board_id}.jsonl")
+
+    def _store(self) -> Dict:
+        """Описание журнала из ``store.json``
+
+        Вместе с id хранится inode каталога журнала: у копии каталога
+        (новый экземпляр, сделанный копированием файла данных с журналом)
+        он другой, и копия получает свой id. Она запоминает id исходного
+        журнала (``origin``) и длины файлов досок на момент копирования
+        (``base``): общая часть журналов у них уже есть в данных обоих.
+        """
+        if self._store_cache is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, "store.json")
+            inode = os.stat(self.directory).st_ino
+            store = read_json(path)
+            if store.get("inode") != inode:
+                copied = {"origin": store["store"],
+                          "base": {board_id: os.path.getsize(self._board_file(board_id))
+                                   for board_id in self.boards()}} if "store" in store else {}
+                store = dict(copied, store=os.urandom(8).hex(), inode=inode)
+                write_json_atomic(path, store, indent=None)
+            self._store_cache = store
+        return self._store_cache
+
+    def store_id(self) -> str:
+        """Id этого журнала (создаётся при первом обращении)"""
+        return self._store()["store"]
+
+    def shared_cursors(self, other: "EventLog") -> Dict[str, List[int]]:
+        """Позиции в журнале other, до которых он совпадает с этим
+
+        Если один журнал - копия другого, совпадает всё, что было в
+        исходном журнале на момент копирования; иначе - ничего.
+        """
+        mine, theirs = self._store(), other._store()
+        if theirs.get("origin") == mine["store"]:
+            base = theirs["base"]
+        elif mine.get("origin") == theirs["store"]:
+            base = mine["base"]
+        else:
+            base = {}
+        return {board_id: [0, offset] for board_id, offset in base.items()}
+
+    def append(self, events: Dict[str, List[Dict]]):
+        """Дописать события, сгруппированные по доскам"""
+        # Id нужен до первой записи: по нему копию журнала отличат от исходного
+        self._store()
+        for board_id, board_events in events.items():
+            lines = "".join(json.dumps(event, ensure_ascii=False, separators=(',', ':'),
+                                       default=json_default) + "\n"
+                            for event in board_events).encode('utf-8')
+            with open(self._board_file(board_id), 'a+b') as f:
+                # Запись идёт под блокировкой фиксации, поэтому строку без
+                # перевода строки в конце не дописывает другой процесс
+                trim_torn_tail(f)
+                f.write(lines)
+                metrics.count("bytes_written", len(lines))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def boards(self) -> List[str]:
+        """Id досок, у которых есть журнал"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.directory)
+                      if name.endswith(".jsonl"))
+
+    def read(self, board_id: str, offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """События доски начиная с позиции offset в файле
+
+        Вместе с каждым событием возвращается позиция после него, с
+        которой можно продолжить чтение.
+        """
+        path = self._board_file(board_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Строку ещё дописывает другой процесс
+                    break
+                offset += len(line)
+                yield offset, json.loads(line)
+
+    def offset_after(self, board_id: str, seq: int) -> int:
+        """Позиция в файле доски, до которой все события имеют номер не больше seq
+
+        Двоичный поиск по позиции: после перехода на середину читается
+        первая целая строка. Чтение с этой позиции может ещё встретить
+        несколько событий с номером не больше seq (их нужно пропустить).
+        """
+        path = self._board_file(board_id)
+        if seq <= 0 or not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            low, high = 0, f.seek(0, os.SEEK_END)
+            while high - low > SEEK_BLOCK:
+                middle = (low + high) // 2
+                f.seek(middle)
+                f.readline()
+                start = f.tell()
+                line = f.readline()
+                if start >= high or not line.endswith(b"\n"):
+                    break
+                if json.loads(line)["seq"] <= seq:
+                    low = start + len(line)
+                else:
+                    high = start
+        return low
+
+    def size(self, board_id: str) -> int:
+        """Размер файла журнала доски (0, если его нет)"""
+        path = self._board_file(board_id)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def peer_state(self, peer_id: str) -> Dict:
+        """Состояние синхронизации с другим хранилищем
+
+        ``cursors`` - id доски в его журнале -> [номер события, позиция
+        после него], ``boards`` и ``items`` - его id досок и элементов
+        (ключ элемента - ``"<доска>/<элемент>"``) -> свои.
+        """
+        state = read_json(os.path.join(self.directory, "peers.json")).get(peer_id, {})
+        for key in ("cursors", "boards", "items"):
+            state.setdefault(key, {})
+        return state
+
+    def save_peer_state(self, peer_id: str, state: Dict):
+        path = os.path.join(self.directory, "peers.json")
+        peers = read_json(path)
+        peers[peer_id] = state
+        os.makedirs(self.directory, exist_ok=True)
+        write_json_atomic(path, peers, indent=None)
@@ -0,0 +1,209 @@
+"""Необязательные замеры и профилирование PyMonday.
+
+Замеры включаются флагом ``--instrument`` или переменной окружения
+``PYMONDAY_INSTRUMENT=1``; выключенные они стоят одну проверку флага.
+
+- ``timed`` - декоратор: гистограмма задержек метода (``TrackerService``
+  и методов меню ``PyMonday``, которые не ждут ввода);
+- ``metrics.count`` - счётчики, например ``bytes_written`` (записано в
+  файлы данных) и ``items_scanned`` (просмотрено элементов при поиске и
+  показе досок).
+
+Отчёт показывает меню "Статистика" и команда ``stats``; его можно
+выгрузить в JSON или в текстовом формате Prometheus.
+
+Профилировщик включается флагом ``--profile cprofile|tracemalloc`` или
+переменной ``PYMONDAY_PROFILE``: при выходе из программы результат
+печатается в stderr, а для cProfile ещё и сохраняется в ``pymonday.prof``.
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+
+INSTRUMENT_ENV = "PYMONDAY_INSTRUMENT"
+PROFILE_ENV = "PYMONDAY_PROFILE"
+PROFILE_FILE = "pymonday.prof"
+PROFILERS = ("cprofile", "tracemalloc")
+# Верхние границы корзин гистограммы, секунды
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Metrics:
+    """Гистограммы задержек операций и счётчики"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.operations: Dict[str, Dict] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float):
+        """Учесть одно выполнение операции"""
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = {
+                    "count": 0, "total": 0.0, "max": 0.0,
+                    "buckets": [0] * (len(BUCKETS) + 1)}
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def count(self, counter: str, amount: int = 1):
+        """Увеличить счётчик (если замеры включены)"""
+        if self.enabled:
+            with self._lock:
+                self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.counters = {}
+
+    def report(self) -> Dict:
+        """Замеры в миллисекундах и счётчики"""
+        operations = {}
+        for operation, stats in sorted(self.operations.items()):
+            operations[operation] = {
+                "count": stats["count"],
+                "mean_ms": stats["total"] / stats["count"] * 1000,
+                "max_ms": stats["max"] * 1000,
+                "buckets": {bucket_label(index): count
+                            for index, count in enumerate(stats["buckets"])}
+            }
+        return {"operations": operations, "counters": dict(sorted(self.counters.items()))}
+
+    def prometheus(self) -> str:
+        """Замеры в текстовом формате Prometheus"""
+        lines = ["# TYPE pymonday_operation_seconds histogram"]
+        for operation, stats in sorted(self.operations.items()):
+            cumulative = 0
+            for index, count in enumerate(stats["buckets"]):
+                cumulative += count
+                le = "+Inf" if index == len(BUCKETS) else repr(BUCKETS[index])
+                lines.append(f'pymonday_operation_seconds_bucket{{operation="{operation}",'
+                             f'le="{le}"}} {cumulative}')
+            lines.append(f'pymonday_operation_seconds_sum{{operation="{operation}"}} '
+                         f'{stats["total"]}')
+            lines.append(f'pymonday_operation_seconds_count{{operation="{operation}"}} '
+                         f'{stats["count"]}')
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE pymonday_{counter}_total counter")
+            lines.append(f"pymonday_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, fmt: Optional[str] = None) -> str:
+        """Сохранить отчёт в файл; формат - "json" или "prometheus"
+
+        Без формата он определяется по расширению (.json - JSON,
+        иначе Prometheus). Возвращает использованный формат.
+        """
+        if fmt is None:
+            fmt = "json" if path.lower().endswith(".json") else "prometheus"
+        with open(path, 'w', encoding='utf-8') as f:
+            if fmt == "json":
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(self.prometheus())
+        return fmt
+
+
+def bucket_label(index: int) -> str:
+    """Подпись корзины гистограммы: "<=5ms" или ">5000ms" для последней"""
+    if index == len(BUCKETS):
+        return f">{BUCKETS[-1] * 1000:g}ms"
+    return f"<={BUCKETS[index] * 1000:g}ms"
+
+
+def format_report(report: Dict) -> str:
+    """Отчёт в виде текста: гистограмма по каждой операции и счётчики"""
+    if not report["operations"] and not report["counters"]:
+        return "Замеров нет."
+    lines = []
+    for operation, stats in report["operations"].items():
+        lines.append(f"{operation}: вызовов {stats['count']}, среднее "
+                     f"{stats['mean_ms']:.2f} мс, максимум {stats['max_ms']:.2f} мс")
+        widest = max(stats["buckets"].values())
+        for label, count in stats["buckets"].items():
+            if count:
+                bar = "#" * max(1, round(count / widest * 30))
+                lines.append(f"  {label:>10} {count:>8} {bar}")
+    if report["counters"]:
+        lines.append("Счётчики:")
+        lines.extend(f"  {counter}: {value}" for counter, value in report["counters"].items())
+    return "\n".join(lines)
+
+
+metrics = Metrics(enabled=os.environ.get(INSTRUMENT_ENV, "") not in ("", "0"))
+
+
+def timed(func):
+    """Декоратор: учитывать задержку метода как операцию ``Класс.метод``"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+class Profiler:
+    """cProfile или tracemalloc на всё время работы программы"""
+
+    def __init__(self, kind: str, output: str = PROFILE_FILE):
+        if kind not in PROFILERS:
+            raise ValueError(f"Неизвестный профилировщик: {kind}")
+        self.kind = kind
+        self.output = output
+        self._profile = None
+
+    def start(self):
+        if self.kind == "cprofile":
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import tracemalloc
+
+            tracemalloc.start(25)
+
+    def stop(self, out=sys.stderr, top: int = 20):
+        """Остановить профилирование и напечатать самое затратное"""
+        if self.kind == "cprofile":
+            import pstats
+
+            self._profile.disable()
+            self._profile.dump_stats(self.output)
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(top)
+            print(f"Профиль сохранён в {self.output}", file=out)
+        else:
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Память: сейчас {current / 2 ** 20:.1f} МБ, пик {peak / 2 ** 20:.1f} МБ",
+                  file=out)
+            for stat in snapshot.statistics("lineno")[:top]:
+                print(stat, file=out)
+
+
+def profiler_from_env() -> Optional[str]:
+    """Профилировщик из переменной окружения (или None)"""
+    kind = os.environ.get(PROFILE_ENV, "").strip().lower()
+    return kind or None
@@ -0,0 +1,236 @@
+"""Компактная модель данных: доски, элементы и комментарии.
+
+Элемент в виде словаря с восемью ключами, строкой ISO времени и своим
+списком комментариев занимает несколько сотен байт ещё до текста.
+Здесь те же данные хранятся в классах с ``__slots__``:
+
+- статусы, email и названия колонок интернируются (``sys.intern``),
+  поэтому у всех элементов это ссылки на одну и ту же строку;
+- время хранится целым числом микросекунд от 1970-01-01 (как было
+  записано, без учёта часового пояса), строка ISO получается при чтении
+  ``created_at``;
+- комментарии хранятся кортежем, у элемента без комментариев это общий
+  пустой кортеж.
+
+Доска хранит счётчик ``item_counter`` - номер последнего выданного id
+элемента (``item_<номер>``). Новый элемент получает следующий номер,
+поэтому после удаления элементов их id не выдаются повторно.
+
+Поле доски ``cold`` описывает её холодные данные (см. ``archive.ColdStore``):
+``counts`` - число перенесённых в сегменты элементов по статусам,
+``segments`` - имена сегментов. У доски без холодных данных это пустой словарь.
+
+Классы реализуют интерфейс изменяемого словаря (``item["status"]``),
+поэтому остальной код работает с ними как раньше. В JSON они
+превращаются обратно в словари только на границе хранилища
+(``to_dict`` через ``storage.json_default``).
+"""
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_time(value) -> int:
+    """Строка ISO (или уже число) -> микросекунды от 1970-01-01"""
+    if isinstance(value, int):
+        return value
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        raise ValueError(f"время с часовым поясом не поддерживается: {value}")
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def format_time(value: int) -> str:
+    """Микросекунды от 1970-01-01 -> строка ISO, как у datetime.isoformat()"""
+    return (EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def id_number(value: str) -> int:
+    """Номер из id вида ``item_17`` (0, если id задан иначе, например при импорте)"""
+    _, _, number = value.rpartition("_")
+    return int(number) if number.isdigit() else 0
+
+
+class Record(MutableMapping):
+    """Запись со слотами, доступная как словарь
+
+    ``FIELDS`` - ключи словаря по порядку. Ключ ``created_at`` хранится
+    в слоте ``created`` числом, ключи из ``INTERNED`` - интернированными
+    строками.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    INTERNED = frozenset()
+
+    def __getitem__(self, key):
+        if key == "created_at":
+            return format_time(self.created)
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        if key == "created_at":
+            self.created = parse_time(value)
+        else:
+            setattr(self, key, self._convert(key, value))
+
+    def _convert(self, key, value):
+        if key in self.INTERNED:
+            return sys.intern(value)
+        return value
+
+    def __delitem__(self, key):
+        raise TypeError(f"Поле {key} нельзя удалить")
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        """Обычный словарь для JSON"""
+        return {key: self[key] for key in self.FIELDS}
+
+
+class Comment(Record):
+    """Комментарий к элементу"""
+
+    __slots__ = ("text", "author", "created")
+    FIELDS = ("text", "author", "created_at")
+    INTERNED = frozenset({"author"})
+
+    def __init__(self, text: str, author: str, created_at):
+        self.text = text
+        self.author = sys.intern(author)
+        self.created = parse_time(created_at)
+
+    @classmethod
+    def from_dict(cls, data) -> "Comment":
+        if isinstance(data, Comment):
+            return data
+        return cls(data["text"], data["author"], data["created_at"])
+
+
+class Item(Record):
+    """Элемент доски"""
+
+    __slots__ = ("id", "name", "description", "status", "created_by", "created",
+                 "assigned_to", "comments")
+    FIELDS = ("id", "name", "description", "status", "created_by", "created_at",
+              "assigned_to", "comments")
+    INTERNED = frozenset({"status", "created_by", "assigned_to"})
+
+    def __init__(self, id: str, name: str, description: str, status: str,
+                 created_by: str, created_at, assigned_to: str,
+                 comments: Iterable = ()):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.status = sys.intern(status)
+        self.created_by = sys.intern(created_by)
+        self.created = parse_time(created_at)
+        self.assigned_to = sys.intern(assigned_to)
+        self.comments = self._convert("comments", comments)
+
+    def _convert(self, key, value):
+        if key == "comments":
+            return tuple(Comment.from_dict(comment) for comment in value)
+        return super()._convert(key, value)
+
+    @classmethod
+    def from_dict(cls, data) -> "Item":
+        if isinstance(data, Item):
+            return data
+        return cls(data["id"], data["name"], data["description"], data["status"],
+                   data["created_by"], data["created_at"], data["assigned_to"],
+                   data.get("comments", ()))
+
+    def copy(self) -> "Item":
+        """Копия элемента (комментарии неизменяемы и не копируются)"""
+        item = Item.__new__(Item)
+        for slot in Item.__slots__:
+            setattr(item, slot, getattr(self, slot))
+        return item
+
+
+class Board(Record):
+    """Доска с элементами и участниками
+
+    Удалённая или перенесённая в архив доска остаётся пустой записью без
+    участников и элементов, чтобы её id не выдавался повторно.
+    """
+
+    __slots__ = ("id", "name", "owner", "created", "columns", "items", "members",
+                 "version", "item_counter", "cold")
+    FIELDS = ("id", "name", "owner", "created_at", "columns", "items", "members",
+              "version", "item_counter", "cold")
+    INTERNED = frozenset({"owner"})
+
+    def __init__(self, id: str, name: str, owner: str, created_at, columns: Iterable[str],
+                 items: Optional[Dict] = None, members: Iterable[str] = (),
+                 version: int = 0, item_counter: Optional[int] = None,
+                 cold: Optional[Dict] = None):
+        self.id = id
+        self.name = name
+        self.owner = sys.intern(owner)
+        self.created = parse_time(created_at)
+        self.columns = self._convert("columns", columns)
+        self.items = self._convert("items", items or {})
+        self.members = self._convert("members", members)
+        self.version = version
+        if item_counter is None:
+            # Данные, записанные до появления счётчика
+            item_counter = max(map(id_number, self.items), default=0)
+        self.item_counter = item_counter
+        self.cold = self._convert("cold", cold)
+
+    @property
+    def removed(self) -> bool:
+        """Доска удалена или перенесена в архив (у живой доски есть владелец-участник)"""
+        return not self.members
+
+    def _convert(self, key, value):
+        if key == "columns":
+            return [sys.intern(column) for column in value]
+        if key == "items":
+            return {item_id: Item.from_dict(item) for item_id, item in value.items()}
+        if key == "members":
+            return {sys.intern(email) for email in value}
+        if key == "cold":
+            if not value:
+                return {}
+            return {"counts": dict(value.get("counts", {})),
+                    "segments": list(value.get("segments", []))}
+        return super()._convert(key, value)
+
+    @classmethod
+    def from_dict(cls, data) -> "Board":
+        if isinstance(data, Board):
+            return data
+        return cls(data["id"], data["name"], data["owner"], data["created_at"],
+                   data["columns"], data.get("items"), data.get("members", ()),
+                   data.get("version", 0), data.get("item_counter"), data.get("cold"))
+
+    def copy(self) -> "Board":
+        """Копия доски с копиями элементов"""
+        board = Board.__new__(Board)
+        for slot in Board.__slots__:
+            setattr(board, slot, getattr(self, slot))
+        board.columns = list(self.columns)
+        board.items = {item_id: item.copy() for item_id, item in self.items.items()}
+        board.members = set(self.members)
+        board.cold = self._convert("cold", self.cold)
+        return board
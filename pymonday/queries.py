@@ -0,0 +1,255 @@
+"""Запросы на чтение для PyMonday.
+
+Меню работает с данными только через объект запросов: для хранилищ,
+которые держат всё в памяти, это ``MemoryQueries``, а хранилища с
+собственными индексами (например, SQLite) реализуют те же методы сами.
+"""
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+from pymonday.aggregates import BoardAggregates, item_summaries
+from pymonday.instrumentation import metrics
+
+
+def board_header(board: Dict) -> Dict:
+    """Заголовок доски без элементов (копия: через него данные не изменить)"""
+    return {
+        "id": board["id"],
+        "name": board["name"],
+        "owner": board["owner"],
+        "created_at": board["created_at"],
+        "members": set(board["members"]),
+        "items_count": len(board["items"]),
+        "version": board.get("version", 0)
+    }
+
+
+class ColumnIndex:
+    """Упорядоченные id элементов каждой колонки для постраничного просмотра
+
+    Для доски индекс строится при первом запросе страницы: каждой колонке
+    соответствует список пар (порядковый номер элемента, id) в порядке
+    добавления элементов, поэтому страница - это срез списка, а элементы
+    берутся с доски только для неё. Перемещение элемента переносит его
+    пару в другую колонку двоичным поиском.
+    """
+
+    def __init__(self, boards: Dict):
+        self.boards = boards
+        self.columns: Dict[str, Dict[str, List[Tuple[int, str]]]] = {}
+        self.positions: Dict[str, Dict[str, int]] = {}
+        self.next_position: Dict[str, int] = {}
+
+    def board(self, board_id: str) -> Dict[str, List[Tuple[int, str]]]:
+        """Колонки доски; индекс строится при первом обращении"""
+        columns = self.columns.get(board_id)
+        if columns is None:
+            board = self.boards[board_id]
+            columns = {column: [] for column in board["columns"]}
+            positions = {}
+            for position, (item_id, status, _) in enumerate(item_summaries(board["items"])):
+                positions[item_id] = position
+                columns.setdefault(status, []).append((position, item_id))
+            self.columns[board_id] = columns
+            self.positions[board_id] = positions
+            self.next_position[board_id] = len(positions)
+        return columns
+
+    def pages(self, board_id: str, offsets: Dict[str, int], limit: int) -> Dict[str, Dict]:
+        """Страница каждой колонки: элементы с offsets[колонка] и их общее число"""
+        items = self.boards[board_id]["items"]
+        result = {}
+        for column, entries in self.board(board_id).items():
+            offset = offsets.get(column, 0)
+            page = entries[offset:offset + limit]
+            metrics.count("items_scanned", len(page))
+            result[column] = {"total": len(entries),
+                              "items": [items[item_id] for _, item_id in page]}
+        return result
+
+    def add_item(self, board_id: str, item: Dict):
+        columns = self.columns.get(board_id)
+        if columns is None:
+            return
+        position = self.positions[board_id][item["id"]] = self.next_position[board_id]
+        self.next_position[board_id] += 1
+        columns.setdefault(item["status"], []).append((position, item["id"]))
+
+    def move_item(self, board_id: str, item_id: str, old_status: str, new_status: str):
+        columns = self.columns.get(board_id)
+        if columns is None:
+            return
+        key = (self.positions[board_id][item_id], item_id)
+        old = columns[old_status]
+        del old[bisect.bisect_left(old, key)]
+        bisect.insort(columns.setdefault(new_status, []), key)
+
+    def remove_item(self, board_id: str, item_id: str, status: str):
+        columns = self.columns.get(board_id)
+        if columns is None:
+            return
+        key = (self.positions[board_id].pop(item_id), item_id)
+        entries = columns[status]
+        del entries[bisect.bisect_left(entries, key)]
+
+    def forget(self, board_id: str):
+        """Построить индекс доски заново при следующем запросе"""
+        self.columns.pop(board_id, None)
+        self.positions.pop(board_id, None)
+        self.next_position.pop(board_id, None)
+
+
+class MemoryQueries:
+    """Запросы по доскам, загруженным в память
+
+    Индекс участия ``boards_by_user`` хранит для каждого пользователя
+    id его досок (словарь используется как упорядоченное множество),
+    поэтому запросы по доскам пользователя не перебирают все доски.
+    """
+
+    def __init__(self, boards: Dict, search_index=None):
+        self.boards = boards
+        self.search_index = search_index
+        self.aggregates = BoardAggregates(boards)
+        self.columns = ColumnIndex(boards)
+        self.boards_by_user: Dict[str, Dict[str, None]] = {}
+        for board_id, board in boards.items():
+            for email in board["members"]:
+                self.boards_by_user.setdefault(email, {})[board_id] = None
+
+    def on_change(self, op: str, data: Dict):
+        """Обновить индексы после изменения данных"""
+        if op == "board_created":
+            board = data["board"]
+            for email in board["members"]:
+                self.boards_by_user.setdefault(email, {})[board["id"]] = None
+            self.aggregates.add_board(board)
+        elif op in ("item_added", "item_restored"):
+            self.aggregates.add_item(data["board_id"], data["item"])
+            self.columns.add_item(data["board_id"], data["item"])
+        elif op in ("item_deleted", "item_archived"):
+            self.aggregates.remove_item(data["board_id"], data["item"])
+            self.columns.remove_item(data["board_id"], data["item_id"],
+                                     data["item"]["status"])
+        elif op == "item_moved":
+            self.aggregates.move_item(data["board_id"], data["from_status"], data["status"])
+            self.columns.move_item(data["board_id"], data["item_id"], data["from_status"],
+                                   data["status"])
+        elif op == "member_added":
+            self.boards_by_user.setdefault(data["email"], {})[data["board_id"]] = None
+        elif op == "member_removed":
+            self.boards_by_user.get(data["email"], {}).pop(data["board_id"], None)
+        elif op == "board_tiered":
+            self.aggregates.rebuild_board(data["board_id"])
+            self.columns.forget(data["board_id"])
+        elif op in ("board_deleted", "board_archived", "board_restored"):
+            board_id = data["board_id"]
+            for email in data.get("members", ()):
+                self.boards_by_user.get(email, {}).pop(board_id, None)
+            for email in self.boards[board_id]["members"]:
+                self.boards_by_user.setdefault(email, {})[board_id] = None
+            self.aggregates.rebuild_board(board_id)
+            self.columns.forget(board_id)
+
+        if self.search_index is None:
+            return
+        if op in ("item_added", "item_restored"):
+            self.search_index.add_item(data["board_id"], data["item"])
+        elif op in ("item_deleted", "item_archived"):
+            self.search_index.remove_item(data["board_id"], data["item"])
+        elif op in ("board_deleted", "board_archived", "board_restored", "board_tiered"):
+            self.search_index.rebuild_board(data["board_id"], self.boards[data["board_id"]])
+        elif op == "board_created":
+            for item in data["board"]["items"].values():
+                self.search_index.add_item(data["board"]["id"], item)
+
+    def board_ids(self, email: str) -> List[str]:
+        """Id досок, в которых участвует пользователь"""
+        return list(self.boards_by_user.get(email, ()))
+
+    def is_member(self, email: str, board_id: str) -> bool:
+        """Участвует ли пользователь в доске"""
+        return board_id in self.boards_by_user.get(email, ())
+
+    def board_header(self, board_id: str) -> Dict:
+        """Заголовок одной доски"""
+        return board_header(self.boards[board_id])
+
+    def _user_boards(self, email: str) -> List[Dict]:
+        return [self.boards[board_id] for board_id in self.boards_by_user.get(email, ())]
+
+    def user_boards(self, email: str) -> List[Dict]:
+        """Заголовки досок, в которых участвует пользователь"""
+        return [board_header(board) for board in self._user_boards(email)]
+
+    def items_by_column(self, board_id: str) -> Dict[str, List[Dict]]:
+        """Элементы доски, сгруппированные по колонкам"""
+        board = self.boards[board_id]
+        items_by_column = {col: [] for col in board["columns"]}
+        metrics.count("items_scanned", len(board["items"]))
+        for item in board["items"].values():
+            items_by_column[item["status"]].append(item)
+        return items_by_column
+
+    def column_pages(self, board_id: str, offsets: Dict[str, int],
+                     limit: int) -> Dict[str, Dict]:
+        """Страница элементов каждой колонки доски и общее число элементов в ней"""
+        return self.columns.pages(board_id, offsets, limit)
+
+    def search(self, email: str, term: str, limit: Optional[int] = None,
+               substring: bool = False) -> List[Dict]:
+        """Поиск элементов по словам в названии или описании
+
+        Сначала используется поисковый индекс (совпадение по началу слов,
+        результаты по убыванию релевантности). Если индекс ничего не нашёл
+        или передан substring=True, выполняется поиск по подстроке.
+        """
+        if self.search_index is not None and not substring:
+            found_items = []
+            for board_id, item_id, score in self.search_index.search(
+                    self.board_ids(email), term, limit):
+                board = self.boards[board_id]
+                if item_id not in board["items"]:
+                    # Индекс отстал от данных: доска индексируется заново
+                    self.search_index.rebuild_board(board_id, board)
+                    continue
+                found_items.append({
+                    "board": board["name"],
+                    "item": board["items"][item_id],
+                    "score": score
+                })
+            if found_items:
+                return found_items
+        return self.substring_search(email, term, limit)
+
+    def substring_search(self, email: str, term: str,
+                         limit: Optional[int] = None) -> List[Dict]:
+        """Поиск элементов по подстроке в названии или описании"""
+        term = term.lower()
+        found_items = []
+        for board in self._user_boards(email):
+            metrics.count("items_scanned", len(board["items"]))
+            for item in board["items"].values():
+                if term in item["name"].lower() or term in item["description"].lower():
+                    found_items.append({
+                        "board": board["name"],
+                        "item": item
+                    })
+                    if limit is not None and len(found_items) >= limit:
+                        return found_items
+        return found_items
+
+    def board_stats(self, board_id: str) -> Dict:
+        """Количество элементов доски по статусам"""
+        return self.aggregates.board_stats(board_id)
+
+    def dashboard_stats(self, email: str, recent_limit: int = 5) -> Dict:
+        """Статистика по доскам пользователя и последние элементы"""
+        board_ids = self.board_ids(email)
+        items_by_status = self.aggregates.items_by_status(board_ids)
+        return {
+            "boards_count": len(board_ids),
+            "total_items": sum(items_by_status.values()),
+            "items_by_status": items_by_status,
+            "recent_items": self.aggregates.recent_items(board_ids, recent_limit)
+        }
@@ -0,0 +1,266 @@
+"""Инвертированный индекс для поиска элементов.
+
+Для каждой доски хранится отображение ``слово -> {id элемента: вес}``.
+Общий отсортированный словарь слов позволяет находить слова по префиксу
+двоичным поиском. Индекс обновляется при каждом изменении элемента и
+сохраняется рядом с файлом данных, чтобы не перестраивать его при запуске.
+С ``load_lazily`` файл индекса читается только при первом поиске или
+изменении, поэтому запуск и просмотр досок за него не платят.
+
+Вместе с индексом сохраняются счётчики изменений досок ``version``, по
+которым он построен. Доски, изменённые без сохранения индекса (другим
+процессом или перед аварийным завершением), при загрузке
+индексируются заново.
+"""
+import bisect
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymonday.storage import write_json_atomic
+
+
+INDEX_VERSION = 2
+NAME_WEIGHT = 2  # Совпадение в названии важнее совпадения в описании
+EXACT_BONUS = 2  # Точное совпадение слова важнее совпадения по префиксу
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбить текст на слова в нижнем регистре"""
+    return _WORD_RE.findall(text.lower())
+
+
+def item_weights(item: Dict) -> Dict[str, int]:
+    """Вес каждого слова элемента"""
+    weights = {}
+    for token in tokenize(item["name"]):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(item["description"]):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
+
+
+def match_score(item: Dict, query_tokens: List[str]) -> int:
+    """Релевантность элемента запросу, как в ``SearchIndex.search`` (0 - не подходит)
+
+    Для хранилищ, которые находят кандидатов сами (полнотекстовый индекс
+    SQLite), чтобы порядок результатов не зависел от хранилища.
+    """
+    weights = item_weights(item)
+    total = 0
+    for query_token in query_tokens:
+        score = sum(weight * (EXACT_BONUS if word == query_token else 1)
+                    for word, weight in weights.items() if word.startswith(query_token))
+        if not score:
+            return 0
+        total += score
+    return total
+
+
+class SearchIndex:
+    """Инвертированный индекс по названиям и описаниям элементов
+
+    versions - функция, возвращающая текущие счётчики изменений досок
+    (id доски -> version); без неё индекс из файла не загружается.
+    """
+
+    def __init__(self, index_file: Optional[str] = None,
+                 versions: Optional[Callable[[], Dict[str, int]]] = None):
+        self.index_file = index_file
+        self.versions = versions
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.vocabulary: List[str] = []
+        self.dirty = False
+        # Доски для загрузки при первом обращении
+        self._pending = None
+
+    def load_lazily(self, boards: Dict):
+        """Отложить загрузку индекса до первого обращения
+
+        При обращении индекс загружается из файла, а доски, изменённые
+        после его сохранения, индексируются заново по boards.
+        """
+        self._pending = boards
+
+    def _ensure_loaded(self) -> bool:
+        """Загрузить отложенный индекс; True, если он загружен сейчас
+
+        Изменения вызываются уже после изменения досок, а изменённая
+        доска при загрузке индексируется заново (её version отличается
+        от сохранённого), поэтому только что загруженный индекс их уже
+        учитывает.
+        """
+        if self._pending is None:
+            return False
+        boards = self._pending
+        self._pending = None
+        current = self.versions() if self.versions is not None else None
+        stale = self.load(current) if current is not None else None
+        if stale is None:
+            self.rebuild(boards)
+            return True
+        for board_id in stale:
+            if board_id in current:
+                self.rebuild_board(board_id, boards[board_id])
+            elif self.postings.pop(board_id, None) is not None:
+                self.dirty = True
+        return True
+
+    # --- построение ---
+
+    def rebuild(self, boards: Dict):
+        """Построить индекс заново по всем доскам"""
+        self._pending = None
+        self.postings = {}
+        vocabulary = set()
+        for board_id, board in boards.items():
+            board_postings = self.postings.setdefault(board_id, {})
+            for item_id, item in board["items"].items():
+                for token, weight in item_weights(item).items():
+                    board_postings.setdefault(token, {})[item_id] = weight
+                    vocabulary.add(token)
+        self.vocabulary = sorted(vocabulary)
+        self.dirty = True
+
+    def rebuild_board(self, board_id: str, board: Dict):
+        """Построить заново индекс одной доски"""
+        if self._ensure_loaded():
+            return
+        self.postings.pop(board_id, None)
+        board_postings = self.postings[board_id] = {}
+        for item_id, item in board["items"].items():
+            for token, weight in item_weights(item).items():
+                if token not in board_postings:
+                    board_postings[token] = {}
+                    self._add_word(token)
+                board_postings[token][item_id] = weight
+        self.dirty = True
+
+    def add_item(self, board_id: str, item: Dict):
+        """Добавить элемент в индекс"""
+        if self._ensure_loaded():
+            return
+        board_postings = self.postings.setdefault(board_id, {})
+        for token, weight in item_weights(item).items():
+            if token not in board_postings:
+                board_postings[token] = {}
+                self._add_word(token)
+            board_postings[token][item["id"]] = weight
+        self.dirty = True
+
+    def remove_item(self, board_id: str, item: Dict):
+        """Удалить элемент из индекса"""
+        if self._ensure_loaded():
+            return
+        board_postings = self.postings.get(board_id, {})
+        for token in item_weights(item):
+            postings = board_postings.get(token)
+            if postings is not None:
+                postings.pop(item["id"], None)
+                if not postings:
+                    del board_postings[token]
+        self.dirty = True
+
+    def update_item(self, board_id: str, old_item: Dict, new_item: Dict):
+        """Переиндексировать изменённый элемент"""
+        if self._ensure_loaded():
+            return
+        self.remove_item(board_id, old_item)
+        self.add_item(board_id, new_item)
+
+    def _add_word(self, token: str):
+        pos = bisect.bisect_left(self.vocabulary, token)
+        if pos == len(self.vocabulary) or self.vocabulary[pos] != token:
+            self.vocabulary.insert(pos, token)
+
+    # --- поиск ---
+
+    def _words_with_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\U0010ffff")
+        return self.vocabulary[start:end]
+
+    def search(self, board_ids: Iterable[str], query: str,
+               limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """Найти элементы, содержащие все слова запроса (как префиксы)
+
+        Возвращает список (id доски, id элемента, релевантность),
+        отсортированный по убыванию релевантности.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        self._ensure_loaded()
+        expanded = [(token, self._words_with_prefix(token)) for token in query_tokens]
+
+        results = []
+        for board_id in board_ids:
+            board_postings = self.postings.get(board_id)
+            if not board_postings:
+                continue
+            scores = None
+            for query_token, words in expanded:
+                token_scores = {}
+                for word in words:
+                    bonus = EXACT_BONUS if word == query_token else 1
+                    for item_id, weight in board_postings.get(word, {}).items():
+                        token_scores[item_id] = token_scores.get(item_id, 0) + weight * bonus
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {item_id: score + token_scores[item_id]
+                              for item_id, score in scores.items()
+                              if item_id in token_scores}
+                if not scores:
+                    break
+            for item_id, score in scores.items():
+                results.append((board_id, item_id, score))
+
+        results.sort(key=lambda result: result[2], reverse=True)
+        if limit is not None:
+            results = results[:limit]
+        return results
+
+    # --- хранение ---
+
+    def load(self, versions: Dict[str, int]) -> Optional[Set[str]]:
+        """Загрузить индекс из файла
+
+        versions - текущие счётчики изменений досок. Возвращает доски,
+        индекс которых устарел (изменённые, новые и исчезнувшие), или
+        None, если файла нет или он не подходит.
+        """
+        if not self.index_file or not os.path.exists(self.index_file):
+            return None
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        saved = data.get("versions")
+        if data.get("version") != INDEX_VERSION or not isinstance(saved, dict):
+            return None
+        self.postings = data["postings"]
+        self.vocabulary = sorted({token for board_postings in self.postings.values()
+                                  for token in board_postings})
+        self.dirty = False
+        return {board_id for board_id in versions.keys() | saved.keys() | self.postings.keys()
+                if saved.get(board_id) != versions.get(board_id)}
+
+    def save(self):
+        """Сохранить индекс, если он изменился
+
+        Индекс должен соответствовать текущим доскам: вместе с ним
+        записываются их счётчики изменений.
+        """
+        if not self.index_file or not self.dirty or self.versions is None:
+            return
+        write_json_atomic(self.index_file, {
+            "version": INDEX_VERSION,
+            "versions": self.versions(),
+            "postings": self.postings
+        }, indent=None)
+        self.dirty = False
@@ -0,0 +1,523 @@
+"""HTTP/JSON сервер PyMonday на asyncio.
+
+Один процесс владеет данными, а участники команды работают с ним по
+HTTP, поэтому одновременные изменения больше не затирают друг друга.
+
+- Все изменения проходят через очередь и выполняются одной задачей
+  записи: она забирает из очереди всё накопившееся и записывает пакет
+  одной транзакцией (group commit), ответы отправляются после записи.
+  Пакет применяется к данным в потоке цикла событий, а на диск
+  записывается в отдельном потоке, чтобы fsync не останавливал цикл
+  событий. Проверка пароля (scrypt) тоже идёт в потоке.
+- Чтения выполняются в потоке цикла событий и не ждут записи пакета на
+  диск: доски в памяти меняет только поток цикла событий, поэтому во
+  время чтения они неизменны. Если записать пакет не удалось, он
+  отменяется. Готовые ответы на чтение данных кэшируются до следующего
+  изменения (версии данных); метрики не кэшируются.
+- Поля тела запроса и числовые параметры проверяются до постановки
+  изменения в очередь: неверный запрос получает 400 и ничего не меняет.
+- Изменения, сделанные другими процессами (например, командами
+  pymonday), подхватываются не реже, чем раз в ``REFRESH_INTERVAL``.
+- Для каждого маршрута собираются метрики задержки (GET /metrics).
+
+Вход - HTTP Basic (email и пароль) или ``Authorization: Bearer <токен>``
+с токеном сеанса из ``pymonday login``. Маршруты::
+
+    POST /users                              {email, name, password}
+    GET  /boards                             POST /boards {name}
+    GET  /boards/<id>
+    POST /boards/<id>/members                {email}
+    POST /boards/<id>/leave
+    POST /boards/<id>/delete                 POST /boards/<id>/archive
+    POST /boards/<id>/restore                (доска из архива)
+    POST /boards/<id>/items                  {name, description, status}
+    GET  /boards/<id>/archive                (элементы доски в архиве)
+    GET  /boards/<id>/changes?since=0&limit=...
+    GET  /boards/<id>/report?done=...        (время цикла и пропускная способность)
+    POST /boards/<id>/items/<item>/move      {status}
+    POST /boards/<id>/items/<item>/comments  {text}
+    POST /boards/<id>/items/<item>/delete    POST /boards/<id>/items/<item>/archive
+    POST /boards/<id>/items/<item>/restore
+    GET  /search?q=...&limit=...&substring=1
+    GET  /dashboard?recent=5
+    GET  /metrics
+"""
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from pymonday.instrumentation import metrics as instrumentation
+from pymonday.service import TrackerError
+from pymonday.storage import json_default
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 1024 * 1024  # Максимальный размер тела запроса
+MAX_WRITE_BATCH = 1000  # Сколько изменений записывать одной транзакцией
+READ_CACHE_SIZE = 1024  # Сколько готовых ответов на чтение хранить
+LATENCY_SAMPLES = 1024  # Сколько последних замеров хранить для перцентилей
+REFRESH_INTERVAL = 0.5  # Как часто проверять изменения других процессов (секунды)
+REMOVAL_ACTIONS = ("delete", "archive", "restore")  # Действия над доской и элементом
+UNCACHED_ROUTES = ("GET /metrics",)  # Ответы, которые меняются без изменения данных
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """Ошибка запроса с HTTP статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _text(data: Dict, field: str, required: bool = True) -> Optional[str]:
+    """Строковое поле тела запроса (None, если необязательного поля нет)"""
+    value = data.get(field)
+    if value is None and not required:
+        return None
+    if value is None:
+        raise HttpError(400, f"Не заполнено поле {field}")
+    if not isinstance(value, str):
+        raise HttpError(400, f"Поле {field} должно быть строкой")
+    return value
+
+
+def _int_param(query: Dict, name: str, default: Optional[int] = None) -> Optional[int]:
+    """Неотрицательный целый параметр строки запроса"""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise HttpError(400, f"Параметр {name} должен быть неотрицательным целым числом")
+    return value
+
+
+class LatencyStats:
+    """Задержки запросов по маршрутам"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self.routes: Dict[str, Dict] = {}
+
+    def observe(self, route: str, seconds: float, error: bool = False):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = {"count": 0, "errors": 0, "total": 0.0,
+                                          "max": 0.0, "recent": deque(maxlen=self.samples)}
+        stats["count"] += 1
+        stats["errors"] += error
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["recent"].append(seconds)
+
+    def report(self) -> Dict:
+        """Метрики в миллисекундах: count, errors, mean, p50, p95, p99, max"""
+        result = {}
+        for route, stats in sorted(self.routes.items()):
+            recent = sorted(stats["recent"])
+
+            def percentile(p):
+                return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000
+
+            result[route] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "mean_ms": stats["total"] / stats["count"] * 1000,
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": stats["max"] * 1000
+            }
+        return result
+
+
+class TrackerServer:
+    """HTTP сервер поверх TrackerService с единственной задачей записи"""
+
+    def __init__(self, service, max_write_batch: int = MAX_WRITE_BATCH):
+        self.service = service
+        self.max_write_batch = max_write_batch
+        self.metrics = LatencyStats()
+        self.version = 0  # Увеличивается после каждого записанного пакета
+        self.write_batches = 0
+        self.writes = 0
+        self._read_cache: Dict[Tuple, bytes] = {}
+        self._last_refresh = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        # Держит задача записи, пока пакет применяется и записывается, и
+        # проверка пароля, после которой пароль пересчитывается; чтения её не ждут
+        self._data_lock: Optional[asyncio.Lock] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._server = None
+
+    # --- запуск и остановка ---
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """Запустить сервер; port=0 выбирает свободный порт"""
+        self._queue = asyncio.Queue()
+        self._data_lock = asyncio.Lock()
+        self._writer = asyncio.create_task(self._write_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Остановить приём запросов и дождаться записи очереди"""
+        self._server.close()
+        await self._queue.join()
+        self._writer.cancel()
+
+    # --- запись ---
+
+    async def submit(self, method: str, *args):
+        """Поставить изменение в очередь и дождаться его записи"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((method, args, future))
+        return await future
+
+    def _apply_batch(self, batch: List) -> List:
+        """Применить пакет изменений в памяти; на диск его записывает _write_loop"""
+        results = []
+        try:
+            with self.service.transaction(flush=False):
+                for method, args, future in batch:
+                    try:
+                        results.append((future, getattr(self.service, method)(*args), None))
+                    except TrackerError as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            # Транзакция отменена целиком: сообщаем об ошибке всем
+            results = [(future, None, e) for method, args, future in batch]
+        return results
+
+    async def _write_loop(self):
+        """Единственная задача, изменяющая данные"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_write_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            async with self._data_lock:
+                results = self._apply_batch(batch)
+                self._data_changed()
+                try:
+                    await loop.run_in_executor(None, self.service.flush)
+                except Exception as e:
+                    # Пакет не записан: отменяем его целиком
+                    self.service.rollback()
+                    self._data_changed()
+                    results = [(future, None, e) for method, args, future in batch]
+            self.write_batches += 1
+            self.writes += len(batch)
+            for future, result, error in results:
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _data_changed(self):
+        self.version += 1
+        self._read_cache.clear()
+
+    def _refresh(self):
+        """Подхватить изменения других процессов (не чаще REFRESH_INTERVAL)"""
+        if self._data_lock.locked():
+            # Идёт запись: service.refresh ждал бы её в потоке цикла событий
+            return
+        now = time.monotonic()
+        if now - self._last_refresh < REFRESH_INTERVAL:
+            return
+        self._last_refresh = now
+        if self.service.refresh():
+            self._data_changed()
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self._dispatch(method, target, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as e:
+            writer.write(self._response(e.status, self._encode({"error": str(e)}), False))
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Неверная строка запроса")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Неверный заголовок Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "Слишком большой запрос")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _encode(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, default=json_default).encode("utf-8")
+
+    @staticmethod
+    def _response(status: int, payload: bytes, keep_alive: bool) -> bytes:
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + payload
+
+    async def _authenticate(self, headers: Dict) -> str:
+        auth = headers.get("authorization", "")
+        if auth.lower().startswith("bearer "):
+            try:
+                return self.service.authenticate_token(auth[7:].strip())
+            except TrackerError as e:
+                raise HttpError(401, str(e))
+        if not auth.lower().startswith("basic "):
+            raise HttpError(401, "Требуется вход (HTTP Basic или токен сеанса)")
+        try:
+            email, _, password = base64.b64decode(auth[6:]).decode("utf-8").partition(":")
+        except (binascii.Error, UnicodeDecodeError):
+            raise HttpError(401, "Неверный заголовок Authorization")
+        loop = asyncio.get_running_loop()
+        verify = functools.partial(self.service.authenticate, email, password)
+        user = self.service.users.get(email)
+        try:
+            if user is not None and self.service.hasher.needs_rehash(user["password"]):
+                # После проверки пароль пересчитывается и записывается
+                async with self._data_lock:
+                    await loop.run_in_executor(None, verify)
+            else:
+                await loop.run_in_executor(None, verify)
+        except TrackerError as e:
+            raise HttpError(401, str(e))
+        return email
+
+    async def _dispatch(self, method: str, target: str, headers: Dict,
+                        body: bytes) -> Tuple[int, bytes]:
+        started = time.perf_counter()
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        route = "unknown"
+        status = 500
+        try:
+            route, handler, args = self._route(method, parts)
+            if method == "GET":
+                user = await self._authenticate(headers) if route != "GET /metrics" else None
+                self._refresh()
+                # Между изменениями данные не меняются: ответ можно переиспользовать
+                key = (user, url.path, url.query)
+                payload = None if route in UNCACHED_ROUTES else self._read_cache.get(key)
+                if payload is None:
+                    payload = self._encode(handler(user, parse_qs(url.query), *args))
+                    if route not in UNCACHED_ROUTES:
+                        if len(self._read_cache) >= READ_CACHE_SIZE:
+                            self._read_cache.clear()
+                        self._read_cache[key] = payload
+                status = 200
+            else:
+                try:
+                    data = json.loads(body) if body else {}
+                except ValueError:
+                    raise HttpError(400, "Тело запроса должно быть JSON")
+                if not isinstance(data, dict):
+                    raise HttpError(400, "Тело запроса должно быть JSON объектом")
+                user = await self._authenticate(headers) if route != "POST /users" else None
+                payload = self._encode(await handler(user, data, *args))
+                status = 201
+        except HttpError as e:
+            status, payload = e.status, self._encode({"error": str(e)})
+        except TrackerError as e:
+            status, payload = 400, self._encode({"error": str(e)})
+        except (KeyError, TypeError) as e:
+            status, payload = 400, self._encode({"error": f"Неверный запрос: {e}"})
+        except Exception as e:
+            status, payload = 500, self._encode({"error": str(e)})
+        self.metrics.observe(route, time.perf_counter() - started, error=status >= 400)
+        return status, payload
+
+    def _route(self, method: str, parts: List[str]):
+        """Найти обработчик: (имя маршрута, функция, аргументы из пути)"""
+        n = len(parts)
+        if method == "GET":
+            if parts == ["boards"]:
+                return "GET /boards", self._list_boards, ()
+            if n == 2 and parts[0] == "boards":
+                return "GET /boards/<id>", self._show_board, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] == "archive":
+                return "GET /boards/<id>/archive", self._archived_items, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] == "changes":
+                return "GET /boards/<id>/changes", self._board_changes, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] == "report":
+                return "GET /boards/<id>/report", self._board_report, (parts[1],)
+            if parts == ["search"]:
+                return "GET /search", self._search, ()
+            if parts == ["dashboard"]:
+                return "GET /dashboard", self._dashboard, ()
+            if parts == ["metrics"]:
+                return "GET /metrics", self._metrics, ()
+        elif method == "POST":
+            if parts == ["users"]:
+                return "POST /users", self._register, ()
+            if parts == ["boards"]:
+                return "POST /boards", self._create_board, ()
+            if n == 3 and parts[0] == "boards" and parts[2] == "members":
+                return "POST /boards/<id>/members", self._add_member, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] == "leave":
+                return "POST /boards/<id>/leave", self._leave_board, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] == "items":
+                return "POST /boards/<id>/items", self._add_item, (parts[1],)
+            if n == 3 and parts[0] == "boards" and parts[2] in REMOVAL_ACTIONS:
+                return f"POST /boards/<id>/{parts[2]}", self._change_board, \
+                    (parts[1], parts[2])
+            if n == 5 and parts[0] == "boards" and parts[2] == "items":
+                if parts[4] == "move":
+                    return "POST /boards/<id>/items/<item>/move", self._move_item, \
+                        (parts[1], parts[3])
+                if parts[4] == "comments":
+                    return "POST /boards/<id>/items/<item>/comments", self._add_comment, \
+                        (parts[1], parts[3])
+                if parts[4] in REMOVAL_ACTIONS:
+                    return f"POST /boards/<id>/items/<item>/{parts[4]}", self._change_item, \
+                        (parts[1], parts[3], parts[4])
+        else:
+            raise HttpError(405, f"Метод {method} не поддерживается")
+        raise HttpError(404, "Маршрут не найден")
+
+    # --- чтение ---
+
+    def _list_boards(self, user, query):
+        return self.service.list_boards(user)
+
+    def _show_board(self, user, query, board_id):
+        return self.service.board_view(user, board_id)
+
+    def _archived_items(self, user, query, board_id):
+        return self.service.archived_items(user, board_id)
+
+    def _board_changes(self, user, query, board_id):
+        return self.service.changes(user, board_id, _int_param(query, "since", 0),
+                                    limit=_int_param(query, "limit"))
+
+    def _board_report(self, user, query, board_id):
+        return self.service.board_report(user, board_id, query.get("done", [None])[0])
+
+    def _search(self, user, query):
+        return self.service.search(user, query.get("q", [""])[0],
+                                   limit=_int_param(query, "limit"),
+                                   substring=query.get("substring", ["0"])[0] == "1")
+
+    def _dashboard(self, user, query):
+        return self.service.dashboard_stats(user, _int_param(query, "recent", 5))
+
+    def _metrics(self, user, query):
+        return {
+            "version": self.version,
+            "writes": self.writes,
+            "write_batches": self.write_batches,
+            "queued": self._queue.qsize(),
+            "routes": self.metrics.report(),
+            "instrumentation": instrumentation.report() if instrumentation.enabled else None
+        }
+
+    # --- изменения ---
+
+    async def _register(self, user, data):
+        email, name = _text(data, "email"), _text(data, "name")
+        await self.submit("register_user", email, name, _text(data, "password"))
+        return {"email": email, "name": name}
+
+    async def _create_board(self, user, data):
+        return await self.submit("create_board", user, _text(data, "name"))
+
+    async def _add_member(self, user, data, board_id):
+        email = _text(data, "email")
+        await self.submit("add_member", user, board_id, email)
+        return {"board": board_id, "email": email}
+
+    async def _leave_board(self, user, data, board_id):
+        await self.submit("leave_board", user, board_id)
+        return {"board": board_id}
+
+    async def _add_item(self, user, data, board_id):
+        return await self.submit("add_item", user, board_id, _text(data, "name"),
+                                 _text(data, "description", required=False) or "",
+                                 _text(data, "status", required=False))
+
+    async def _move_item(self, user, data, board_id, item_id):
+        return await self.submit("move_item", user, board_id, item_id, _text(data, "status"))
+
+    async def _add_comment(self, user, data, board_id, item_id):
+        return await self.submit("add_comment", user, board_id, item_id, _text(data, "text"))
+
+    async def _change_board(self, user, data, board_id, action):
+        result = await self.submit(f"{action}_board", user, board_id)
+        return {"board": board_id} if result is None else result
+
+    async def _change_item(self, user, data, board_id, item_id, action):
+        result = await self.submit(f"{action}_item", user, board_id, item_id)
+        return {"board": board_id, "item": item_id} if result is None else result
+
+
+def serve(service, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Запустить сервер и работать до Ctrl+C или сигнала завершения"""
+    async def run():
+        server = TrackerServer(service)
+        address = await server.start(host, port)
+        print(f"PyMonday слушает http://{address[0]}:{address[1]}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,868 @@
+"""Сервисный слой PyMonday без ввода и вывода.
+
+``TrackerService`` владеет данными и хранилищем и выполняет все операции
+трекера: принимает аргументы, возвращает структуры данных и сообщает об
+ошибках исключением ``TrackerError``. Интерактивное меню, командная
+строка и импорт - только клиенты этого слоя.
+
+С одними файлами данных могут работать несколько процессов: запись
+выполняется под блокировкой файла, а если другой процесс успел изменить
+данные, свои незаписанные операции применяются заново поверх его
+изменений (см. ``concurrency``). ``refresh`` подхватывает чужие
+изменения без записи.
+
+Элементы и доски можно удалить или перенести в архив (``archive``):
+так они перестают занимать память, замедлять просмотр и поиск и
+попадать в каждое сохранение. Id удалённых элементов и досок повторно
+не выдаются. Политика ``tiering`` переносит давно завершённые элементы
+и старые комментарии в сжатые холодные сегменты (``tier``); они
+учитываются в статистике, а читаются только по явному запросу.
+
+Пароли хранятся хешами (``auth``); для скриптов ``create_session``
+выдаёт токен, который проверяется без медленного хеширования.
+
+Каждое записанное изменение доски попадает в её журнал событий
+(``events``): по нему ``changes`` отдаёт изменения после заданного
+номера, ``board_report`` считает время цикла и пропускную способность,
+а ``sync`` обменивается с другим хранилищем только новыми событиями.
+"""
+import hmac
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from statistics import mean, median
+from typing import Dict, List, Optional, Tuple
+
+from pymonday.archive import ArchiveStore, ColdStore, TieringPolicy
+from pymonday.auth import (SESSION_TTL, PasswordHasher, SessionStore, hash_params,
+                           verify_password)
+from pymonday.concurrency import LockTimeout, copy_change, free_id, merge_change
+from pymonday.events import EventLog
+from pymonday.instrumentation import timed
+from pymonday.models import Board, Comment, Item, parse_time
+from pymonday.queries import MemoryQueries
+from pymonday.search_index import SearchIndex
+from pymonday.storage import apply_change, open_storage
+
+
+# Сообщения о сбоях загрузки и отменённых изменениях; что показывать,
+# решает запустившая сервис программа
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLUMNS = ["To Do", "In Progress", "Review", "Done"]  # Стандартные колонки
+PAGE_SIZE = 20  # Сколько элементов колонки показывать на одной странице
+USER_OPS = ("user_registered", "password_changed")  # Операции не над досками
+# Что из data не нужно в журнале событий: убранное из данных (см. apply_change)
+REMOVED_KEYS = {"item_deleted": "item", "item_archived": "item",
+                "board_deleted": "members", "board_archived": "members"}
+
+
+class TrackerError(Exception):
+    """Ошибка операции трекера; сообщение можно показать пользователю"""
+
+
+class TrackerService:
+    def __init__(self, data_file="pymonday_data.json", storage="journal",
+                 flush_interval=None, tiering: Optional[TieringPolicy] = None,
+                 hasher: Optional[PasswordHasher] = None):
+        """Инициализация сервиса
+
+        storage - имя хранилища ("journal", "json", "binary", "sqlite",
+                  "sharded") или готовый объект хранилища
+        flush_interval - если задан, изменения вне transaction() копятся
+                  и записываются не чаще, чем раз в столько секунд
+        tiering - политика холодных данных; если задана, при close()
+                  она применяется к доскам, изменённым за время работы
+        hasher - хеширование паролей (по умолчанию - PasswordHasher())
+        """
+        self.data_file = data_file
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._flush_timer = None
+        # Операции после последнего flush: (данные операции, их копия,
+        # событие для журнала доски или None)
+        self._unflushed: List[Tuple[str, Dict, Dict, Optional[Dict]]] = []
+        if isinstance(storage, str):
+            storage = open_storage(storage, data_file)
+        self.storage = storage
+        # Архив хранится рядом с файлом данных при любом хранилище
+        self.archive = ArchiveStore(f"{data_file}.archive")
+        self.tiering = tiering
+        self.cold = ColdStore(f"{data_file}.cold",
+                              tiering.compression if tiering is not None else "zlib")
+        self._tiering_boards = set()
+        self.hasher = hasher or PasswordHasher()
+        self.sessions = SessionStore(f"{data_file}.sessions")
+        self.events = EventLog(f"{data_file}.events")
+        # Отчёты по журналу: (доска, колонка) -> накопленное состояние и
+        # позиция в файле, с которой читать новые события
+        self._reports: Dict[Tuple[str, str], Dict] = {}
+        # Пароли, уже проверенные этим процессом: email -> (сохранённый
+        # хеш, HMAC пароля на ключе процесса), чтобы не хешировать заново
+        self._verified: Dict[str, Tuple[str, bytes]] = {}
+        self._verified_key = os.urandom(32)
+        # Пароль пересчитан из открытого текста: при записи его нужно убрать из файлов
+        self._scrub_passwords = False
+        self.users = {}
+        self.boards = {}
+        self.queries = None
+        self.search_index = None
+        self.load_data()
+
+    # --- хранение ---
+
+    @timed
+    def save_data(self):
+        """Полное сохранение данных в хранилище
+
+        Данные могли быть изменены напрямую, минуя commit,
+        поэтому индексы строятся заново.
+        """
+        with self._lock, self.storage.lock():
+            self.storage.save(self.users, self.boards)
+            changes, self._unflushed = self._unflushed, []
+            self._log_events(changes)
+            self._build_indexes(rebuild=True)
+
+    @timed
+    def load_data(self):
+        """Загрузка данных из хранилища"""
+        try:
+            self.users, self.boards = self.storage.load()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Ошибка загрузки данных (%s). Начинаем с чистого листа.", e)
+        self._build_indexes()
+
+    def _build_indexes(self, rebuild=False):
+        """Подготовить индексы и объект запросов"""
+        # Хранилища с собственными индексами отвечают на запросы сами
+        if getattr(self.storage, "queryable", False):
+            self.queries = self.storage
+            return
+
+        # Поисковый индекс хранится рядом с файлом данных и читается
+        # только при первом поиске или изменении
+        self.search_index = SearchIndex(f"{self.data_file}.idx", versions=self._board_versions)
+        if rebuild:
+            self.search_index.rebuild(self.boards)
+        else:
+            self.search_index.load_lazily(self.boards)
+        self.queries = MemoryQueries(self.boards, self.search_index)
+
+    def _board_versions(self) -> Dict[str, int]:
+        """Счётчики изменений всех досок (по ним проверяется файл поискового индекса)"""
+        return {board_id: board.version for board_id, board in self.boards.items()}
+
+    def commit(self, op, data, origin: Optional[Dict] = None):
+        """Применить операцию к данным и передать её в хранилище
+
+        Низкоуровневый метод для импорта и синхронизации; обычные
+        операции ниже проверяют аргументы и вызывают его сами. origin -
+        время ("at") и источник ("from") события, полученного из
+        другого хранилища (по умолчанию - сейчас и это хранилище).
+        """
+        with self._lock:
+            apply_change(self.users, self.boards, op, data)
+            self.storage.record(op, data, self.users, self.boards)
+            self.queries.on_change(op, data)
+            self._unflushed.append((op, data, copy_change(op, data),
+                                    self._event(op, data, origin)))
+            if self.tiering is not None and "board_id" in data:
+                self._tiering_boards.add(data["board_id"])
+            if self._batch_depth == 0:
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Записать изменения сразу или отложить запись на flush_interval"""
+        if not self.flush_interval:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    @timed
+    def flush(self):
+        """Записать все накопленные изменения
+
+        Запись идёт под блокировкой файла. Если другой процесс изменил
+        данные после нашей загрузки, свои операции сначала применяются
+        заново поверх его изменений.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            try:
+                with self.storage.lock():
+                    # Пока мы применяли операции заново, данные мог снова изменить
+                    # процесс, не использующий нашу блокировку (SQLite): повторяем
+                    while self._unflushed and self.storage.changed():
+                        self._rebase()
+                    # События пишутся под блокировкой фиксации, чтобы их
+                    # номера шли в журнале по порядку
+                    with self.storage.commit_lock():
+                        self.storage.flush(self.users, self.boards)
+                        changes, self._unflushed = self._unflushed, []
+                        self._log_events(changes)
+                    if self._scrub_passwords:
+                        self.storage.scrub_passwords(self.users, self.boards)
+                        self._scrub_passwords = False
+            except LockTimeout as e:
+                raise TrackerError(f"Изменения не сохранены: {e}") from e
+
+    def _event(self, op: str, data: Dict, origin: Optional[Dict]) -> Optional[Dict]:
+        """Событие журнала для только что применённой операции"""
+        if op in USER_OPS:
+            return None
+        board_id = data["board"]["id"] if op == "board_created" else data["board_id"]
+        event = {"board": board_id, "seq": self.boards[board_id].version,
+                 "at": datetime.now().isoformat()}
+        if origin is not None:
+            event.update(origin)
+        return event
+
+    def _log_events(self, changes: List[Tuple[str, Dict, Dict, Optional[Dict]]]):
+        """Дописать записанные операции в журналы досок"""
+        events: Dict[str, List[Dict]] = {}
+        for op, _, snapshot, event in changes:
+            if event is None:
+                continue
+            removed = REMOVED_KEYS.get(op)
+            entry = {"seq": event["seq"], "op": op,
+                     "data": {key: value for key, value in snapshot.items() if key != removed},
+                     "at": event["at"]}
+            if "from" in event:
+                entry["from"] = event["from"]
+            events.setdefault(event["board"], []).append(entry)
+        if events:
+            self.events.append(events)
+
+    def _rebase(self):
+        """Перечитать данные и применить поверх них свои незаписанные операции"""
+        changes = self._unflushed
+        self.storage.discard()
+        self.users, self.boards = self.storage.load()
+        remap = {}
+        self._unflushed = []
+        for op, data, snapshot, event in changes:
+            snapshot = copy_change(op, snapshot)
+            if not merge_change(self.users, self.boards, op, snapshot, remap):
+                logger.warning("Изменение %s отменено: данные изменены другим процессом", op)
+                continue
+            apply_change(self.users, self.boards, op, snapshot)
+            self.storage.record(op, snapshot, self.users, self.boards)
+            # Номер события - счётчик доски после операции, он тоже сдвинулся
+            origin = None if event is None else {
+                key: event[key] for key in ("at", "from") if key in event}
+            self._unflushed.append((op, data, copy_change(op, snapshot),
+                                    self._event(op, snapshot, origin)))
+            # Вызвавший операцию видит новый id, если его пришлось поменять
+            if op == "item_added":
+                data["item"]["id"] = snapshot["item"]["id"]
+            elif op == "board_created":
+                data["board"]["id"] = snapshot["board"]["id"]
+        self._build_indexes(rebuild=True)
+
+    @timed
+    def refresh(self) -> bool:
+        """Подхватить изменения других процессов; True, если они были
+
+        Пока есть незаписанные изменения, ничего не делает: чужие
+        изменения будут учтены при их записи.
+        """
+        with self._lock:
+            if self._unflushed or self._batch_depth or not self.storage.changed():
+                return False
+            changes = self.storage.read_changes()
+            if changes is None:
+                self.load_data()
+                return True
+            for op, data in changes:
+                apply_change(self.users, self.boards, op, data)
+                self.queries.on_change(op, data)
+            return bool(changes)
+
+    @contextmanager
+    def transaction(self, flush: bool = True):
+        """Сгруппировать изменения в одну атомарную запись
+
+        Изменения внутри блока with записываются одним flush при выходе
+        из внешнего блока. Если блок завершился исключением или записать
+        изменения не удалось (например, блокировка занята), изменения
+        отменяются и данные перечитываются из хранилища.
+
+        С flush=False изменения при выходе не записываются: их запишет
+        следующий вызов flush (например, из другого потока), а если
+        запись не удалась, их нужно отменить вызовом rollback.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.rollback()
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and flush:
+                try:
+                    self.flush()
+                except BaseException:
+                    self.rollback()
+                    raise
+
+    def rollback(self):
+        """Отменить незаписанные изменения и перечитать данные из хранилища"""
+        self._unflushed = []
+        self.storage.discard()
+        self.load_data()
+
+    def close(self):
+        """Завершение работы с хранилищем"""
+        if self._tiering_boards:
+            self.tier(self._tiering_boards)
+        self.flush()
+        if self.search_index is not None:
+            self.search_index.save()
+        self.storage.close()
+
+    # --- пользователи ---
+
+    @timed
+    def register_user(self, email: str, name: str, password: str) -> Dict:
+        """Зарегистрировать пользователя"""
+        if not email:
+            raise TrackerError("Email не может быть пустым!")
+        if email in self.users:
+            raise TrackerError("Пользователь с таким email уже существует!")
+        user = {
+            "name": name,
+            "password": self.hasher.hash(password),
+            "created_at": datetime.now().isoformat()
+        }
+        self.commit("user_registered", {"email": email, "user": user})
+        return user
+
+    @timed
+    def authenticate(self, email: str, password: str) -> Dict:
+        """Проверить email и пароль, вернуть пользователя
+
+        Пароль, сохранённый открытым текстом или с другой стоимостью
+        хеширования, после успешной проверки пересчитывается; открытый
+        текст при записи убирается и из файлов хранилища. Повторная
+        проверка того же пароля в этом процессе не хеширует его заново.
+        """
+        user = self.users.get(email)
+        if user is None:
+            raise TrackerError("Неверный email или пароль!")
+        check = hmac.new(self._verified_key, password.encode('utf-8'), "sha256").digest()
+        verified = self._verified.get(email)
+        if (verified is None or verified[0] != user["password"]
+                or not hmac.compare_digest(verified[1], check)):
+            if not verify_password(user["password"], password):
+                raise TrackerError("Неверный email или пароль!")
+            if self.hasher.needs_rehash(user["password"]):
+                if hash_params(user["password"]) is None:
+                    self._scrub_passwords = True
+                self.commit("password_changed",
+                            {"email": email, "password": self.hasher.hash(password)})
+                user = self.users[email]
+            self._verified[email] = (user["password"], check)
+        return user
+
+    def create_session(self, email: str, password: str, ttl: float = SESSION_TTL) -> str:
+        """Проверить пароль и открыть сеанс на ttl секунд; вернуть токен"""
+        self.authenticate(email, password)
+        return self.sessions.create(email, ttl)
+
+    def authenticate_token(self, token: str) -> str:
+        """Email пользователя по токену сеанса"""
+        email = self.sessions.lookup(token)
+        if email is None or email not in self.users:
+            raise TrackerError("Сеанс не найден или истёк, войдите заново!")
+        return email
+
+    def end_session(self, token: str):
+        """Закрыть сеанс"""
+        if not self.sessions.revoke(token):
+            raise TrackerError("Сеанс не найден!")
+
+    def user_name(self, email: str) -> str:
+        """Имя пользователя по email"""
+        return self.users[email]["name"]
+
+    # --- доски ---
+
+    @timed
+    def create_board(self, user: str, name: str) -> Dict:
+        """Создать доску, владельцем которой будет user"""
+        # Удалённые доски остаются пустыми записями, поэтому номер не повторится
+        board_id = free_id("board", self.boards, len(self.boards) + 1)
+        board = Board(board_id, name, user, datetime.now().isoformat(), DEFAULT_COLUMNS,
+                      members={user})
+        self.commit("board_created", {"board": board})
+        return board
+
+    @timed
+    def list_boards(self, user: str) -> List[Dict]:
+        """Заголовки досок пользователя"""
+        return self.queries.user_boards(user)
+
+    def _check_member(self, user: str, board_id: str):
+        if not self.queries.is_member(user, board_id):
+            raise TrackerError("Доска не найдена!")
+
+    def get_board(self, user: str, board_id: str) -> Dict:
+        """Доска, в которой участвует пользователь"""
+        self._check_member(user, board_id)
+        return self.boards[board_id]
+
+    @timed
+    def board_view(self, user: str, board_id: str) -> Dict:
+        """Заголовок доски и её элементы, сгруппированные по колонкам"""
+        self._check_member(user, board_id)
+        return {
+            "board": self.queries.board_header(board_id),
+            "columns": self.queries.items_by_column(board_id)
+        }
+
+    @timed
+    def board_page(self, user: str, board_id: str, pages: Optional[Dict[str, int]] = None,
+                   page_size: int = PAGE_SIZE) -> Dict:
+        """Заголовок доски и одна страница элементов каждой колонки
+
+        pages - номер страницы (с нуля) для колонок, по умолчанию первая;
+        номер за концом колонки заменяется последней страницей. Для каждой
+        колонки возвращаются элементы страницы, их общее число (total),
+        номер страницы (page) и число страниц (pages). Элементы читаются
+        только для показываемых страниц.
+        """
+        if page_size < 1:
+            raise TrackerError("Размер страницы должен быть положительным!")
+        self._check_member(user, board_id)
+        pages = dict(pages or {})
+        while True:
+            columns = self.queries.column_pages(
+                board_id, {column: page * page_size for column, page in pages.items()},
+                page_size)
+            # Элементов в колонке могло стать меньше, чем было при листании
+            beyond = {}
+            for column, page in columns.items():
+                page["pages"] = max(1, -(-page["total"] // page_size))
+                page["page"] = pages.get(column, 0)
+                if page["page"] >= page["pages"]:
+                    beyond[column] = page["pages"] - 1
+            if not beyond:
+                break
+            pages.update(beyond)
+        return {
+            "board": self.queries.board_header(board_id),
+            "columns": columns
+        }
+
+    @timed
+    def add_member(self, user: str, board_id: str, email: str):
+        """Пригласить пользователя email на доску"""
+        board = self.get_board(user, board_id)
+        if email not in self.users:
+            raise TrackerError("Пользователь не найден!")
+        if email in board["members"]:
+            raise TrackerError("Пользователь уже участвует в доске!")
+        self.commit("member_added", {"board_id": board_id, "email": email})
+
+    @timed
+    def leave_board(self, user: str, board_id: str):
+        """Покинуть доску"""
+        board = self.get_board(user, board_id)
+        if board["owner"] == user:
+            raise TrackerError("Владелец не может покинуть свою доску!")
+        self.commit("member_removed", {"board_id": board_id, "email": user})
+
+    def _get_own_board(self, user: str, board_id: str) -> Dict:
+        board = self.get_board(user, board_id)
+        if board["owner"] != user:
+            raise TrackerError("Это может сделать только владелец доски!")
+        return board
+
+    @timed
+    def delete_board(self, user: str, board_id: str):
+        """Удалить доску со всеми элементами (может только владелец)"""
+        self._get_own_board(user, board_id)
+        self.commit("board_deleted", {"board_id": board_id})
+
+    @timed
+    def archive_board(self, user: str, board_id: str) -> Dict:
+        """Перенести доску со всеми элементами в архив (может только владелец)"""
+        board = self._get_own_board(user, board_id)
+        self.archive.add_board(board)
+        self.commit("board_archived", {"board_id": board_id})
+        return board
+
+    def archived_boards(self, user: str) -> List[Dict]:
+        """Доски пользователя в архиве"""
+        # Если перенос не был записан, доска в архиве ещё активна
+        return [board for board_id, board in self.archive.boards().items()
+                if board["owner"] == user and board_id in self.boards
+                and self.boards[board_id].removed]
+
+    @timed
+    def restore_board(self, user: str, board_id: str) -> Dict:
+        """Вернуть доску из архива"""
+        board = next((board for board in self.archived_boards(user)
+                      if board["id"] == board_id), None)
+        if board is None:
+            raise TrackerError("Доски нет в архиве!")
+        self.commit("board_restored", {"board_id": board_id, "board": board})
+        self.archive.mark_restored(board_id)
+        return board
+
+    # --- элементы ---
+
+    def _get_item(self, board: Dict, item_id: str) -> Dict:
+        if item_id not in board["items"]:
+            raise TrackerError("Элемент не найден!")
+        return board["items"][item_id]
+
+    @timed
+    def add_item(self, user: str, board_id: str, name: str, description: str = "",
+                 status: Optional[str] = None) -> Dict:
+        """Добавить элемент на доску (по умолчанию - в первую колонку)"""
+        board = self.get_board(user, board_id)
+        status = status or board["columns"][0]
+        if status not in board["columns"]:
+            raise TrackerError(f"Колонки '{status}' нет на доске!")
+        # Номера выдаются по счётчику доски и не повторяются после удаления
+        item_id = f"item_{board['item_counter'] + 1}"
+        item = Item(item_id, name, description, status, user, datetime.now().isoformat(),
+                    user)
+        self.commit("item_added", {"board_id": board_id, "item": item})
+        return item
+
+    @timed
+    def move_item(self, user: str, board_id: str, item_id: str, status: str) -> Dict:
+        """Переместить элемент в другую колонку"""
+        board = self.get_board(user, board_id)
+        item = self._get_item(board, item_id)
+        if status not in board["columns"]:
+            raise TrackerError(f"Колонки '{status}' нет на доске!")
+        self.commit("item_moved", {
+            "board_id": board_id,
+            "item_id": item_id,
+            "from_status": item["status"],
+            "status": status
+        })
+        return item
+
+    @timed
+    def add_comment(self, user: str, board_id: str, item_id: str, text: str) -> Dict:
+        """Добавить комментарий к элементу"""
+        board = self.get_board(user, board_id)
+        self._get_item(board, item_id)
+        comment = Comment(text, user, datetime.now().isoformat())
+        self.commit("comment_added", {
+            "board_id": board_id,
+            "item_id": item_id,
+            "comment": comment
+        })
+        return comment
+
+    @timed
+    def delete_item(self, user: str, board_id: str, item_id: str):
+        """Удалить элемент с доски"""
+        board = self.get_board(user, board_id)
+        self._get_item(board, item_id)
+        self.commit("item_deleted", {"board_id": board_id, "item_id": item_id})
+
+    @timed
+    def archive_item(self, user: str, board_id: str, item_id: str) -> Dict:
+        """Перенести элемент в архив"""
+        board = self.get_board(user, board_id)
+        item = self._get_item(board, item_id)
+        self.archive.add_item(board_id, item)
+        self.commit("item_archived", {"board_id": board_id, "item_id": item_id})
+        return item
+
+    def archived_items(self, user: str, board_id: str) -> List[Dict]:
+        """Элементы доски в архиве"""
+        board = self.get_board(user, board_id)
+        # Если перенос не был записан, элемент в архиве ещё на доске
+        return [item for item_id, item in self.archive.items(board_id).items()
+                if item_id not in board["items"]]
+
+    @timed
+    def restore_item(self, user: str, board_id: str, item_id: str) -> Dict:
+        """Вернуть элемент из архива на доску"""
+        item = next((item for item in self.archived_items(user, board_id)
+                     if item["id"] == item_id), None)
+        if item is None:
+            raise TrackerError("Элемента нет в архиве!")
+        self.commit("item_restored", {"board_id": board_id, "item": item})
+        self.archive.mark_restored(board_id, item_id)
+        return item
+
+    # --- холодные данные ---
+
+    @timed
+    def tier(self, board_ids=None, now: Optional[datetime] = None) -> Dict:
+        """Перенести холодные данные досок в сжатые сегменты по политике tiering
+
+        board_ids - какие доски проверить (по умолчанию все), now - момент,
+        от которого отсчитываются сроки. Все доски записываются одной
+        транзакцией. Возвращает число затронутых досок, перенесённых
+        элементов и комментариев.
+        """
+        if self.tiering is None:
+            raise TrackerError("Политика холодных данных не задана!")
+        now = parse_time((now or datetime.now()).isoformat())
+        result = {"boards": 0, "items": 0, "comments": 0}
+        with self.transaction():
+            for board_id in list(self.boards if board_ids is None else board_ids):
+                board = self.boards[board_id]
+                if board.removed:
+                    continue
+                items, comments = self.tiering.select(board, now)
+                if not items and not comments:
+                    continue
+                segment = self.cold.write_segment(board_id, items, comments)
+                self.commit("board_tiered", {
+                    "board_id": board_id,
+                    "segment": segment,
+                    "item_ids": [item.id for item in items],
+                    "comments": {item_id: len(old) for item_id, old in comments.items()}
+                })
+                result["boards"] += 1
+                result["items"] += len(items)
+                result["comments"] += sum(len(old) for old in comments.values())
+        self._tiering_boards = set()
+        return result
+
+    def cold_items(self, user: str, board_id: str) -> List[Dict]:
+        """Элементы доски, перенесённые в холодные сегменты"""
+        board = self.get_board(user, board_id)
+        return list(self.cold.items(board).values())
+
+    def cold_comments(self, user: str, board_id: str, item_id: str) -> List[Dict]:
+        """Комментарии элемента из холодных сегментов"""
+        board = self.get_board(user, board_id)
+        return self.cold.comments(board, item_id)
+
+    def _search_cold(self, user: str, term: str, limit: Optional[int]) -> List[Dict]:
+        found_items = []
+        for header in self.list_boards(user):
+            board = self.boards[header["id"]]
+            if not board["cold"]:
+                continue
+            for item in self.cold.items(board).values():
+                if term in item["name"].lower() or term in item["description"].lower():
+                    found_items.append({"board": board["name"], "item": item, "cold": True})
+                    if limit is not None and len(found_items) >= limit:
+                        return found_items
+        return found_items
+
+    # --- поиск и статистика ---
+
+    @timed
+    def search(self, user: str, term: str, limit: Optional[int] = None,
+               substring: bool = False, include_cold: bool = False) -> List[Dict]:
+        """Поиск элементов на досках пользователя
+
+        С include_cold=True после обычных результатов идут холодные
+        элементы, найденные по подстроке (с ключом "cold").
+        """
+        term = term.strip().lower()
+        found_items = self.queries.search(user, term, limit=limit, substring=substring)
+        if include_cold and (limit is None or len(found_items) < limit):
+            found_items.extend(self._search_cold(
+                user, term, None if limit is None else limit - len(found_items)))
+        return found_items
+
+    def board_stats(self, board_id: str) -> Dict:
+        """Количество элементов доски по статусам"""
+        return self.queries.board_stats(board_id)
+
+    @timed
+    def dashboard_stats(self, user: str, recent_limit: int = 5) -> Dict:
+        """Статистика панели управления для пользователя"""
+        return self.queries.dashboard_stats(user, recent_limit)
+
+    # --- журнал событий и синхронизация ---
+
+    def changes(self, user: str, board_id: str, since: int = 0,
+                limit: Optional[int] = None) -> Dict:
+        """Записанные события доски с номером больше since
+
+        Возвращает события (не больше limit) и номер последнего из них
+        ``seq`` (или since, если новых нет): его можно передать в since
+        при следующем запросе.
+        """
+        self._check_member(user, board_id)
+        events = []
+        for _, event in self.events.read(board_id, self.events.offset_after(board_id, since)):
+            if event["seq"] <= since:
+                continue
+            if limit is not None and len(events) >= limit:
+                break
+            events.append(event)
+        return {"board_id": board_id, "seq": events[-1]["seq"] if events else since,
+                "events": events}
+
+    @timed
+    def board_report(self, user: str, board_id: str, done: Optional[str] = None) -> Dict:
+        """Время цикла и пропускная способность доски по журналу событий
+
+        Время цикла - от добавления элемента до первого перемещения в
+        колонку done (по умолчанию - последнюю), в часах. Пропускная
+        способность - сколько элементов впервые попало в done за каждую
+        неделю ISO. Учитываются записанные события и элементы,
+        добавленные после появления журнала. Прочитанная часть журнала
+        запоминается: повторный отчёт читает только новые события.
+        """
+        board = self.get_board(user, board_id)
+        done = done or board["columns"][-1]
+        if done not in board["columns"]:
+            raise TrackerError(f"Колонки '{done}' нет на доске!")
+        state = self._reports.get((board_id, done))
+        if state is None or state["offset"] > self.events.size(board_id):
+            state = self._reports[board_id, done] = {
+                "offset": 0, "added": {}, "finished": set(), "cycle_times": [], "throughput": {}}
+        added, finished = state["added"], state["finished"]
+        cycle_times, throughput = state["cycle_times"], state["throughput"]
+        for offset, event in self.events.read(board_id, state["offset"]):
+            state["offset"] = offset
+            data = event["data"]
+            if event["op"] == "item_added":
+                added[data["item"]["id"]] = event["at"]
+            elif (event["op"] == "item_moved" and data["status"] == done
+                  and data["item_id"] in added and data["item_id"] not in finished):
+                finished.add(data["item_id"])
+                started, ended = (datetime.fromisoformat(added[data["item_id"]]),
+                                  datetime.fromisoformat(event["at"]))
+                cycle_times.append((ended - started).total_seconds() / 3600)
+                year, week, _ = ended.isocalendar()
+                week = f"{year}-W{week:02d}"
+                throughput[week] = throughput.get(week, 0) + 1
+        cycle_times = sorted(cycle_times)
+        return {
+            "board_id": board_id,
+            "done": done,
+            "completed": len(cycle_times),
+            "cycle_time_hours": {
+                "mean": mean(cycle_times),
+                "median": median(cycle_times),
+                "p90": cycle_times[max(0, -(-len(cycle_times) * 9 // 10) - 1)]
+            } if cycle_times else None,
+            "throughput": dict(sorted(throughput.items()))
+        }
+
+    @timed
+    def sync(self, other: "TrackerService") -> Dict:
+        """Обменяться новыми событиями с другим хранилищем
+
+        Каждая сторона применяет события другой, появившиеся после
+        прошлой синхронизации, как свои изменения (с проверками
+        ``merge_change``). Совпавшие id новых досок и элементов получают
+        свободные номера, соответствие id запоминается. Синхронизировать
+        можно любые пары хранилищ, но без циклов: событие, пришедшее к
+        хранилищу двумя путями, применится дважды.
+        """
+        pulled = self._pull(other)
+        pushed = other._pull(self)
+        return {"pulled": pulled, "pushed": pushed}
+
+    def _peer_ids(self, state: Dict, board_id: str, data: Dict) -> str:
+        """Перевести id доски и элемента из журнала другого хранилища в свои"""
+        local = data["board_id"] = state["boards"].get(board_id, board_id)
+        if "item_id" in data:
+            data["item_id"] = state["items"].get(f"{board_id}/{data['item_id']}",
+                                                 data["item_id"])
+        return local
+
+    def _pull(self, peer: "TrackerService") -> int:
+        """Применить новые события другого хранилища; вернуть их число"""
+        peer.flush()
+        me, peer_id = self.events.store_id(), peer.events.store_id()
+        if me == peer_id:
+            raise TrackerError("Нельзя синхронизировать хранилище с самим собой!")
+        state = self.events.peer_state(peer_id)
+        if not state["cursors"]:
+            state["cursors"] = self.events.shared_cursors(peer.events)
+        pulled = 0
+        # Новые доски и элементы: (ключ соответствия, операция, её данные). Их id
+        # могут ещё поменяться при записи (см. _rebase), поэтому уточняются после неё
+        aliases = []
+        with self.transaction():
+            for email, user in peer.users.items():
+                if email not in self.users:
+                    self.commit("user_registered", {"email": email, "user": dict(user)})
+            for peer_board in peer.events.boards():
+                seq, offset = state["cursors"].get(peer_board, [0, 0])
+                for offset, event in peer.events.read(peer_board, offset):
+                    seq = event["seq"]
+                    source = event.get("from")
+                    op, data = event["op"], event["data"]
+                    if source is not None and source["store"] == me:
+                        # Наше же событие вернулось: запоминаем, какие id ему дали там
+                        state["boards"][peer_board] = source["board"]
+                        if "item" in source:
+                            state["items"][f"{peer_board}/{data['item']['id']}"] = source["item"]
+                        continue
+                    if op == "board_tiered":
+                        # Холодные сегменты у каждого хранилища свои
+                        continue
+                    if self._apply_peer_event(state, peer_board, event, aliases, {
+                            "store": peer_id, "board": peer_board, "seq": seq}):
+                        pulled += 1
+                state["cursors"][peer_board] = [seq, offset]
+        for alias in aliases:
+            self._save_alias(state, *alias)
+        self.events.save_peer_state(peer_id, state)
+        return pulled
+
+    @staticmethod
+    def _save_alias(state: Dict, key: str, op: str, data: Dict):
+        if op == "board_created":
+            state["boards"][key] = data["board"]["id"]
+        else:
+            state["items"][key] = data["item"]["id"]
+
+    def _apply_peer_event(self, state: Dict, peer_board: str, event: Dict, aliases: List,
+                          source: Dict) -> bool:
+        """Применить одно событие другого хранилища как своё изменение"""
+        op, data = event["op"], dict(event["data"])
+        if op == "board_created":
+            data["board"] = dict(data["board"], id=state["boards"].get(peer_board, peer_board))
+        else:
+            board_id = self._peer_ids(state, peer_board, data)
+            if op in ("item_added", "item_restored"):
+                peer_item = data["item"]["id"]
+                data["item"] = dict(data["item"], id=state["items"].get(
+                    f"{peer_board}/{peer_item}", peer_item))
+                source["item"] = peer_item
+            elif op == "board_restored":
+                data["board"] = dict(data["board"], id=board_id)
+        if not merge_change(self.users, self.boards, op, data, {}):
+            return False
+        if op == "item_archived":
+            self.archive.add_item(data["board_id"],
+                                  self.boards[data["board_id"]]["items"][data["item_id"]])
+        elif op == "board_archived":
+            self.archive.add_board(self.boards[data["board_id"]])
+        self.commit(op, data, {"at": event["at"], "from": source})
+        if op in ("board_created", "item_added"):
+            alias = (peer_board if op == "board_created" else f"{peer_board}/{source['item']}",
+                     op, data)
+            self._save_alias(state, *alias)
+            aliases.append(alias)
+        elif op == "item_restored":
+            self.archive.mark_restored(data["board_id"], data["item"]["id"])
+        elif op == "board_restored":
+            self.archive.mark_restored(data["board_id"])
+            # Элементы доски теперь с id из другого хранилища
+            state["items"] = {key: item_id for key, item_id in state["items"].items()
+                              if not key.startswith(f"{peer_board}/")}
+        return True
@@ -0,0 +1,584 @@
+"""Хранилище PyMonday, разбитое на файлы по доскам.
+
+В каталоге данных лежит небольшой ``manifest.json`` с пользователями и
+заголовками досок (название, владелец, участники, счётчики по статусам,
+последние элементы) и по одному файлу ``boards/<id>.json`` с элементами
+и комментариями каждой доски. При запуске читается только манифест,
+а содержимое досок загружается при первом обращении и вытесняется из
+памяти, когда загруженных досок становится больше ``max_resident``.
+
+Изменения элементов доски не переписывают её файл, а дописываются
+строкой в журнал доски ``boards/<id>.journal`` (одна строка на flush).
+Файл доски переписывается целиком при операциях над всей доской и
+когда журнал становится больше файла доски (но не меньше
+``BOARD_JOURNAL_MIN`` байт); журнал после этого удаляется. Строки
+журнала помечены версией доски, а файл доски хранит версию, до
+которой он записан, поэтому после сбоя между записью файла и
+удалением журнала изменения не применяются дважды.
+
+Заголовки хранят счётчик изменений доски ``version``. Когда манифест
+изменил другой процесс, он перечитывается, а из памяти и поискового
+индекса обновляются только доски с изменившейся версией.
+"""
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymonday.aggregates import RECENT_SIZE, item_summary
+from pymonday.auth import scrub_legacy_passwords
+from pymonday.concurrency import FileLock, file_signature
+from pymonday.instrumentation import metrics
+from pymonday.models import Board
+from pymonday.queries import ColumnIndex
+from pymonday.search_index import SearchIndex
+from pymonday.storage import (apply_change, decode_boards, json_default, read_json,
+                              trim_torn_tail, write_json_atomic)
+
+
+MAX_RESIDENT_BOARDS = 8
+BOARD_JOURNAL_MIN = 64 * 1024
+
+# Операции над элементами, которые дописываются в журнал доски
+JOURNALED_OPS = ("item_added", "item_restored", "item_moved", "comment_added",
+                 "item_deleted", "item_archived")
+
+HEADER_FIELDS = ("id", "name", "owner", "created_at", "columns", "members", "item_counter",
+                 "cold")
+
+
+def make_header(board: Dict) -> Dict:
+    """Заголовок доски со счётчиками для манифеста"""
+    header = {field: board[field] for field in HEADER_FIELDS}
+    header["members"] = set(board["members"])
+    status_counts = {col: 0 for col in board["columns"]}
+    # Холодные элементы учитываются в счётчиках, но не в items_count
+    for status, count in board["cold"].get("counts", {}).items():
+        status_counts[status] = status_counts.get(status, 0) + count
+    for item in board["items"].values():
+        status_counts[item["status"]] = status_counts.get(item["status"], 0) + 1
+    header["items_count"] = len(board["items"])
+    header["version"] = board.get("version", 0)
+    header["status_counts"] = status_counts
+    recent = sorted(board["items"].values(), key=lambda item: item["created_at"])
+    header["recent"] = [item_summary(item) for item in recent[-RECENT_SIZE:]]
+    return header
+
+
+def public_header(header: Dict) -> Dict:
+    """Копия заголовка из манифеста с полями ``queries.board_header``"""
+    return {
+        "id": header["id"],
+        "name": header["name"],
+        "owner": header["owner"],
+        "created_at": header["created_at"],
+        "members": set(header["members"]),
+        "items_count": header["items_count"],
+        "version": header.get("version", 0)
+    }
+
+
+def decode_headers(headers: Dict) -> Dict:
+    """Привести заголовки досок, прочитанные из манифеста, к виду в памяти"""
+    for header in headers.values():
+        header["members"] = set(header["members"])
+    return headers
+
+
+class ShardedBoards(MutableMapping):
+    """Доски, содержимое которых загружается из файлов по требованию"""
+
+    def __init__(self, storage: "ShardedStorage", max_resident: int):
+        self.storage = storage
+        self.max_resident = max_resident
+        self._resident: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def __getitem__(self, board_id):
+        if board_id in self._resident:
+            self._resident.move_to_end(board_id)
+            return self._resident[board_id]
+        if board_id not in self.storage.headers:
+            raise KeyError(board_id)
+        board = self.storage.load_board(board_id)
+        self._remember(board_id, board)
+        return board
+
+    def __setitem__(self, board_id, board):
+        self._remember(board_id, board)
+
+    def __delitem__(self, board_id):
+        self._resident.pop(board_id, None)
+
+    def __contains__(self, board_id):
+        return board_id in self._resident or board_id in self.storage.headers
+
+    def __iter__(self):
+        for board_id in self.storage.headers:
+            yield board_id
+        for board_id in list(self._resident):
+            if board_id not in self.storage.headers:
+                yield board_id
+
+    def __len__(self):
+        return len(self.storage.headers) + sum(
+            1 for board_id in self._resident if board_id not in self.storage.headers)
+
+    def _remember(self, board_id: str, board: Dict):
+        self._resident[board_id] = board
+        self._resident.move_to_end(board_id)
+        while len(self._resident) > self.max_resident:
+            # Доски с незаписанными изменениями остаются в памяти до flush
+            for candidate in self._resident:
+                if candidate not in self.storage.dirty_boards:
+                    del self._resident[candidate]
+                    break
+            else:
+                break
+
+    def resident(self) -> Dict:
+        """Доски, находящиеся в памяти"""
+        return self._resident
+
+
+class ShardedStorage:
+    """Манифест с заголовками досок и отдельный файл на каждую доску"""
+
+    queryable = True
+
+    def __init__(self, data_dir: str, json_file: Optional[str] = None,
+                 max_resident: int = MAX_RESIDENT_BOARDS):
+        self.data_dir = data_dir
+        self.json_file = json_file
+        self.manifest_file = os.path.join(data_dir, "manifest.json")
+        self.boards_dir = os.path.join(data_dir, "boards")
+        self.max_resident = max_resident
+        self.users: Dict = {}
+        self.headers: Dict[str, Dict] = {}
+        self.boards_by_user: Dict[str, Dict[str, None]] = {}
+        self.dirty_boards: Set[str] = set()
+        # Незаписанные строки журналов досок и доски, файл которых нужно переписать
+        self._journal_lines: Dict[str, List[str]] = {}
+        self._rewrite_boards: Set[str] = set()
+        self.manifest_dirty = False
+        # Доски, изменённые после flush, и доски, изменения которых отменены
+        self._touched_boards: Set[str] = set()
+        self._stale_boards: Set[str] = set()
+        self.boards = ShardedBoards(self, max_resident)
+        self.columns = ColumnIndex(self.boards)
+        self.search_index = SearchIndex(os.path.join(data_dir, "search.idx"),
+                                        versions=self._board_versions)
+        self._lock = FileLock(os.path.join(data_dir, "lock"))
+        self._manifest_signature = None
+
+        is_new = not os.path.exists(self.manifest_file)
+        os.makedirs(self.boards_dir, exist_ok=True)
+        if is_new and json_file and os.path.exists(json_file):
+            # Перенос данных из JSON файла при первом запуске
+            data = read_json(json_file)
+            self.save(data.get("users", {}), decode_boards(data.get("boards", {})))
+
+    def _board_file(self, board_id: str) -> str:
+        return os.path.join(self.boards_dir, f"{board_id}.json")
+
+    def _journal_file(self, board_id: str) -> str:
+        return os.path.join(self.boards_dir, f"{board_id}.journal")
+
+    def load(self) -> Tuple[Dict, MutableMapping]:
+        """Прочитать манифест; содержимое досок загружается по требованию
+
+        При повторной загрузке доски с прежней версией остаются в памяти
+        и в поисковом индексе, перечитываются только изменившиеся.
+        """
+        previous = self.headers
+        resident = self.boards.resident()
+        self._manifest_signature = file_signature(self.manifest_file)
+        manifest = read_json(self.manifest_file)
+        self.users = manifest.get("users", {})
+        self.headers = decode_headers(manifest.get("boards", {}))
+        self.boards_by_user = {}
+        for board_id, header in self.headers.items():
+            for email in header["members"]:
+                self.boards_by_user.setdefault(email, {})[board_id] = None
+        self.boards = ShardedBoards(self, self.max_resident)
+        self.columns = ColumnIndex(self.boards)
+
+        if previous:
+            for board_id, header in self.headers.items():
+                old = previous.get(board_id)
+                if (board_id not in self._stale_boards and old is not None
+                        and old.get("version") == header.get("version")):
+                    if board_id in resident:
+                        self.boards[board_id] = resident[board_id]
+                else:
+                    self.search_index.rebuild_board(board_id, self.boards[board_id])
+        else:
+            # Индекс читается (или строится по всем файлам досок) при первом поиске
+            self.search_index.load_lazily(_AllBoards(self))
+        self._stale_boards = set()
+        return self.users, self.boards
+
+    def _board_versions(self) -> Dict[str, int]:
+        return {board_id: header.get("version", 0) for board_id, header in self.headers.items()}
+
+    def load_board(self, board_id: str) -> Dict:
+        """Прочитать содержимое одной доски и проиграть поверх него её журнал"""
+        header = self.headers[board_id]
+        data = read_json(self._board_file(board_id))
+        board = Board(header["id"], header["name"], header["owner"], header["created_at"],
+                      header["columns"], data.get("items", {}),
+                      header["members"], header.get("version", 0),
+                      header.get("item_counter"), header.get("cold"))
+        self._replay_journal(board, data.get("version", 0))
+        return board
+
+    def _replay_journal(self, board: Dict, version: int):
+        """Применить строки журнала доски, записанные после версии version
+
+        Чтение останавливается на недописанной после сбоя строке.
+        """
+        path = self._journal_file(board["id"])
+        if not os.path.exists(path):
+            return
+        board_version = board["version"]
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["version"] <= version:
+                    continue
+                for change in entry["changes"]:
+                    apply_change({}, {board["id"]: board}, change["op"], change["data"])
+        # Версию доски задаёт заголовок, а не число проигранных операций
+        board.version = board_version
+
+    def lock(self) -> FileLock:
+        """Блокировка для записи между процессами"""
+        return self._lock
+
+    def commit_lock(self) -> FileLock:
+        """Фиксация изменений и запись событий идут под той же блокировкой"""
+        return self._lock
+
+    def changed(self) -> bool:
+        """Изменил ли манифест другой процесс (он пишется при любом изменении)"""
+        return file_signature(self.manifest_file) != self._manifest_signature
+
+    def read_changes(self):
+        """Перечитывается манифест и только изменившиеся доски"""
+        return None
+
+    # --- запись ---
+
+    def _write_manifest(self):
+        write_json_atomic(self.manifest_file, {
+            "users": self.users,
+            "boards": self.headers
+        }, indent=None)
+        self._manifest_signature = file_signature(self.manifest_file)
+
+    def _write_board(self, board: Dict):
+        """Переписать файл доски целиком; журнал доски больше не нужен"""
+        write_json_atomic(self._board_file(board["id"]),
+                          {"items": board["items"], "version": board.get("version", 0)},
+                          indent=None)
+        journal = self._journal_file(board["id"])
+        if os.path.exists(journal):
+            os.remove(journal)
+
+    def _append_board_journal(self, board: Dict, changes: List[str]):
+        """Дописать изменения доски одной строкой; свернуть большой журнал в файл доски"""
+        line = ('{"version":%d,"changes":[%s]}\n'
+                % (board.get("version", 0), ",".join(changes))).encode('utf-8')
+        with open(self._journal_file(board["id"]), 'a+b') as f:
+            # Запись идёт под блокировкой хранилища: недописанная строка
+            # осталась после сбоя
+            trim_torn_tail(f)
+            f.write(line)
+            metrics.count("bytes_written", len(line))
+            f.flush()
+            os.fsync(f.fileno())
+            journal_size = f.tell()
+        board_file = self._board_file(board["id"])
+        board_size = os.path.getsize(board_file) if os.path.exists(board_file) else 0
+        if journal_size >= max(BOARD_JOURNAL_MIN, board_size):
+            self._write_board(board)
+
+    def record(self, op: str, data: Dict, users: Dict, boards: Dict):
+        """Обновить заголовки и отметить затронутую доску для записи"""
+        self.users = users
+        if op in ("user_registered", "password_changed"):
+            self.manifest_dirty = True
+            return
+        if op == "board_created":
+            board = data["board"]
+            self.headers[board["id"]] = make_header(board)
+            for email in board["members"]:
+                self.boards_by_user.setdefault(email, {})[board["id"]] = None
+            self.dirty_boards.add(board["id"])
+            self._rewrite_boards.add(board["id"])
+            self._touched_boards.add(board["id"])
+            self.manifest_dirty = True
+            return
+
+        # Версия в заголовке меняется при любом изменении доски,
+        # поэтому манифест записывается всегда
+        self.headers[data["board_id"]]["version"] = boards[data["board_id"]]["version"]
+        self._touched_boards.add(data["board_id"])
+        if op in JOURNALED_OPS:
+            # Сериализуем сразу: объекты в data могут измениться до flush
+            self._journal_lines.setdefault(data["board_id"], []).append(
+                json.dumps({"op": op, "data": data}, ensure_ascii=False,
+                           separators=(',', ':'), default=json_default))
+        if op in ("member_added", "member_removed"):
+            header = self.headers[data["board_id"]]
+            if op == "member_added":
+                header["members"].add(data["email"])
+                self.boards_by_user.setdefault(data["email"], {})[data["board_id"]] = None
+            else:
+                header["members"].discard(data["email"])
+                self.boards_by_user.get(data["email"], {}).pop(data["board_id"], None)
+        elif op in ("item_added", "item_restored"):
+            header = self.headers[data["board_id"]]
+            item = data["item"]
+            header["item_counter"] = boards[data["board_id"]]["item_counter"]
+            header["items_count"] += 1
+            counts = header["status_counts"]
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+            header["recent"].append(item_summary(item))
+            header["recent"].sort(key=lambda summary: summary["created_at"])
+            del header["recent"][:-RECENT_SIZE]
+            self.search_index.add_item(data["board_id"], item)
+            self.columns.add_item(data["board_id"], item)
+            self.dirty_boards.add(data["board_id"])
+        elif op == "item_moved":
+            header = self.headers[data["board_id"]]
+            counts = header["status_counts"]
+            counts[data["from_status"]] -= 1
+            counts[data["status"]] = counts.get(data["status"], 0) + 1
+            for summary in header["recent"]:
+                if summary["id"] == data["item_id"]:
+                    summary["status"] = data["status"]
+            self.columns.move_item(data["board_id"], data["item_id"], data["from_status"],
+                                   data["status"])
+            self.dirty_boards.add(data["board_id"])
+        elif op == "comment_added":
+            self.dirty_boards.add(data["board_id"])
+        elif op in ("item_deleted", "item_archived"):
+            header = self.headers[data["board_id"]]
+            item = data["item"]
+            header["items_count"] -= 1
+            header["status_counts"][item["status"]] -= 1
+            if any(summary["id"] == item["id"] for summary in header["recent"]):
+                # Список новых элементов нужно дополнить следующим по времени
+                header["recent"] = make_header(boards[data["board_id"]])["recent"]
+            self.search_index.remove_item(data["board_id"], item)
+            self.columns.remove_item(data["board_id"], item["id"], item["status"])
+            self.dirty_boards.add(data["board_id"])
+        elif op == "board_tiered":
+            board = boards[data["board_id"]]
+            self.headers[board["id"]] = make_header(board)
+            self.search_index.rebuild_board(board["id"], board)
+            self.columns.forget(board["id"])
+            self.dirty_boards.add(board["id"])
+            self._rewrite_boards.add(board["id"])
+        elif op in ("board_deleted", "board_archived", "board_restored"):
+            board = boards[data["board_id"]]
+            for email in data.get("members", ()):
+                self.boards_by_user.get(email, {}).pop(board["id"], None)
+            for email in board["members"]:
+                self.boards_by_user.setdefault(email, {})[board["id"]] = None
+            self.headers[board["id"]] = make_header(board)
+            self.search_index.rebuild_board(board["id"], board)
+            self.columns.forget(board["id"])
+            self.dirty_boards.add(board["id"])
+            self._rewrite_boards.add(board["id"])
+        else:
+            raise ValueError(f"Неизвестная операция: {op}")
+        self.manifest_dirty = True
+
+    def flush(self, users: Dict, boards: Dict):
+        """Записать изменения досок, затем манифест
+
+        Изменения элементов дописываются в журналы досок, остальные
+        доски переписываются атомарно; манифест пишется последним,
+        чтобы его счётчики не опережали содержимое досок.
+        """
+        # Изменённые доски всегда в памяти. Они берутся без перестановки в
+        # очереди вытеснения: сервер пишет в другом потоке, пока идут чтения
+        if isinstance(boards, ShardedBoards):
+            boards = boards.resident()
+        for board_id in list(self.dirty_boards):
+            changes = self._journal_lines.get(board_id)
+            if board_id in self._rewrite_boards or not changes:
+                self._write_board(boards[board_id])
+            else:
+                self._append_board_journal(boards[board_id], changes)
+        self.dirty_boards.clear()
+        self._journal_lines.clear()
+        self._rewrite_boards.clear()
+        if self.manifest_dirty:
+            self._write_manifest()
+            self.manifest_dirty = False
+        self._touched_boards.clear()
+
+    def discard(self):
+        """Забыть незаписанные изменения (заголовки перечитываются в load)"""
+        self.dirty_boards.clear()
+        self._journal_lines.clear()
+        self._rewrite_boards.clear()
+        self.manifest_dirty = False
+        self._stale_boards |= self._touched_boards
+        self._touched_boards.clear()
+
+    def scrub_passwords(self, users: Dict, boards: Dict):
+        """Манифест заменяется целиком; прежние пароли убираются из исходного JSON файла"""
+        scrub_legacy_passwords(self.json_file, users)
+
+    def save(self, users: Dict, boards: Dict):
+        """Сохранить манифест и все доски, находящиеся в памяти"""
+        if isinstance(boards, ShardedBoards):
+            boards = boards.resident()
+        self.users = users
+        for board in boards.values():
+            self.headers[board["id"]] = make_header(board)
+            self._write_board(board)
+        self.boards_by_user = {}
+        for board_id, header in self.headers.items():
+            for email in header["members"]:
+                self.boards_by_user.setdefault(email, {})[board_id] = None
+        self._write_manifest()
+        self.dirty_boards.clear()
+        self._journal_lines.clear()
+        self._rewrite_boards.clear()
+        self.manifest_dirty = False
+        self.columns = ColumnIndex(self.boards)
+        self.search_index.rebuild(_AllBoards(self))
+
+    def on_change(self, op: str, data: Dict):
+        """Заголовки и индексы обновляются при записи изменения"""
+
+    def close(self):
+        """Сохранить поисковый индекс"""
+        self.search_index.save()
+
+    # --- запросы ---
+
+    def board_ids(self, email: str) -> List[str]:
+        """Id досок, в которых участвует пользователь"""
+        return list(self.boards_by_user.get(email, ()))
+
+    def is_member(self, email: str, board_id: str) -> bool:
+        """Участвует ли пользователь в доске"""
+        return board_id in self.boards_by_user.get(email, ())
+
+    def board_header(self, board_id: str) -> Dict:
+        """Заголовок одной доски"""
+        return public_header(self.headers[board_id])
+
+    def user_boards(self, email: str) -> List[Dict]:
+        """Заголовки досок, в которых участвует пользователь"""
+        return [public_header(self.headers[board_id]) for board_id in self.board_ids(email)]
+
+    def items_by_column(self, board_id: str) -> Dict[str, List[Dict]]:
+        """Элементы доски, сгруппированные по колонкам"""
+        board = self.boards[board_id]
+        items_by_column = {col: [] for col in board["columns"]}
+        metrics.count("items_scanned", len(board["items"]))
+        for item in board["items"].values():
+            items_by_column[item["status"]].append(item)
+        return items_by_column
+
+    def column_pages(self, board_id: str, offsets: Dict[str, int],
+                     limit: int) -> Dict[str, Dict]:
+        """Страница элементов каждой колонки доски и общее число элементов в ней"""
+        return self.columns.pages(board_id, offsets, limit)
+
+    def search(self, email: str, term: str, limit: Optional[int] = None,
+               substring: bool = False) -> List[Dict]:
+        """Поиск по индексу; загружаются только доски с найденными элементами"""
+        found_items = []
+        if not substring:
+            for board_id, item_id, score in self.search_index.search(
+                    self.board_ids(email), term, limit):
+                board = self.boards[board_id]
+                if item_id not in board["items"]:
+                    # Индекс отстал от данных: доска индексируется заново
+                    self.search_index.rebuild_board(board_id, board)
+                    continue
+                found_items.append({
+                    "board": board["name"],
+                    "item": board["items"][item_id],
+                    "score": score
+                })
+            if found_items:
+                return found_items
+
+        # Поиск по подстроке требует чтения всех досок пользователя
+        term = term.lower()
+        for board_id in self.board_ids(email):
+            board = self.boards[board_id]
+            metrics.count("items_scanned", len(board["items"]))
+            for item in board["items"].values():
+                if term in item["name"].lower() or term in item["description"].lower():
+                    found_items.append({"board": board["name"], "item": item})
+                    if limit is not None and len(found_items) >= limit:
+                        return found_items
+        return found_items
+
+    def board_stats(self, board_id: str) -> Dict:
+        """Количество элементов доски по статусам (с холодными)"""
+        items_by_status = dict(self.headers[board_id]["status_counts"])
+        return {
+            "total_items": sum(items_by_status.values()),
+            "items_by_status": items_by_status
+        }
+
+    def dashboard_stats(self, email: str, recent_limit: int = 5) -> Dict:
+        """Статистика по заголовкам досок, без чтения их содержимого"""
+        board_ids = self.board_ids(email)
+        items_by_status = {}
+        recent = []
+        for board_id in board_ids:
+            header = self.headers[board_id]
+            for status, count in header["status_counts"].items():
+                if count:
+                    items_by_status[status] = items_by_status.get(status, 0) + count
+            for summary in header["recent"][-recent_limit:]:
+                recent.append((summary["created_at"], board_id, summary))
+        recent.sort(key=lambda entry: entry[0], reverse=True)
+        return {
+            "boards_count": len(board_ids),
+            "total_items": sum(items_by_status.values()),
+            "items_by_status": items_by_status,
+            "recent_items": [{"board": self.headers[board_id]["name"], "board_id": board_id,
+                              "item": summary}
+                             for _, board_id, summary in recent[:recent_limit]]
+        }
+
+
+class _AllBoards(Mapping):
+    """Все доски хранилища по очереди, без сохранения в памяти (для перестройки индекса)
+
+    Доски, находящиеся в памяти, берутся оттуда: в них могут быть
+    незаписанные изменения.
+    """
+
+    def __init__(self, storage: ShardedStorage):
+        self.storage = storage
+
+    def __getitem__(self, board_id):
+        resident = self.storage.boards.resident()
+        if board_id in resident:
+            return resident[board_id]
+        return self.storage.load_board(board_id)
+
+    def __iter__(self):
+        return iter(list(self.storage.headers))
+
+    def __len__(self):
+        return len(self.storage.headers)
@@ -0,0 +1,379 @@
+"""Двоичный снимок данных PyMonday с ленивым чтением через mmap.
+
+Разбор JSON снимка при запуске занимает время, пропорциональное всем
+данным, даже если пользователь откроет одну доску. Двоичный снимок
+открывается через ``mmap``: при загрузке читаются только заголовок,
+пользователи и таблица досок, а записи элементов разбираются при первом
+обращении к ним.
+
+Формат (все числа little-endian)::
+
+    заголовок      HEADER: сигнатура, версия, число досок, смещения секций
+    метаданные     JSON: пользователи, journal_seq и холодные данные досок
+    данные досок   для каждой доски: комментарии, id элементов (u32),
+                   записи элементов ITEM фиксированной длины,
+                   колонки и участники (u32)
+    строки         смещения строк (u64, на одно больше числа строк)
+                   и сами строки в UTF-8
+    таблица досок  BOARD для каждой доски
+
+Все строки (названия, описания, email, статусы, id) записываются один
+раз в таблицу строк, а записи ссылаются на них по номеру. Запись файла
+атомарная, как у JSON снимка.
+
+Преобразование между форматами::
+
+    python snapshot.py to-binary pymonday_data.json pymonday_data.snap
+    python snapshot.py to-json pymonday_data.snap pymonday_data.json
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional, Tuple
+
+from pymonday.auth import scrub_legacy_passwords
+from pymonday.instrumentation import metrics
+from pymonday.models import Board, Comment, Item, id_number
+from pymonday.storage import JournalStorage, fsync_dir, json_default, write_json_atomic
+
+
+MAGIC = b"PYMSNAP\x00"
+FORMAT_VERSION = 2
+
+# Сигнатура, версия, число досок, смещение и длина метаданных,
+# смещение таблицы строк, число строк, смещение таблицы досок
+HEADER = struct.Struct("<8sIIQQQQQ")
+# id, название, владелец (номера строк), время создания, версия,
+# смещение колонок и участников, их количество, смещение элементов и их число,
+# номер последнего выданного id элемента
+BOARD = struct.Struct("<IIIqQQIIQIQ")
+# Запись доски в снимке версии 1 (без номера последнего id элемента)
+BOARD_V1 = struct.Struct("<IIIqQQIIQI")
+# Название, описание, статус, автор, исполнитель (номера строк),
+# время создания, смещение комментариев и их число
+ITEM = struct.Struct("<IIIIIqQI")
+# Текст, автор (номера строк), время создания
+COMMENT = struct.Struct("<IIq")
+OFFSET = struct.Struct("<Q")
+
+
+class Snapshot:
+    """Открытый двоичный снимок
+
+    Файл отображается в память целиком и не копируется; доски и элементы
+    ссылаются на снимок и читают из него свои записи.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if os.name == "nt":
+                # Windows не даёт заменить файл, пока он отображён в память
+                self.buffer = f.read()
+            else:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.board_count, self.meta_offset, self.meta_length,
+         self.strings_offset, self.string_count, self.boards_offset) = \
+            HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: это не снимок PyMonday")
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"{path}: неподдерживаемая версия снимка {version}")
+        self.board_struct = BOARD if version == FORMAT_VERSION else BOARD_V1
+        self._strings: Dict[int, str] = {}
+
+    def string(self, index: int) -> str:
+        """Строка из таблицы строк по номеру"""
+        try:
+            return self._strings[index]
+        except KeyError:
+            pass
+        start, end = struct.unpack_from("<QQ", self.buffer,
+                                        self.strings_offset + index * OFFSET.size)
+        value = self._strings[index] = str(self.buffer[start:end], 'utf-8')
+        return value
+
+    def meta(self) -> Dict:
+        """Пользователи и прочие метаданные снимка"""
+        start = self.meta_offset
+        return json.loads(self.buffer[start:start + self.meta_length])
+
+    def boards(self) -> Dict[str, Board]:
+        """Доски с заголовками; элементы читаются по требованию"""
+        boards = {}
+        string = self.string
+        board_struct = self.board_struct
+        for number in range(self.board_count):
+            (board_id, name, owner, created, version, refs_offset, columns_count,
+             members_count, items_offset, items_count, *item_counter) = \
+                board_struct.unpack_from(self.buffer,
+                                         self.boards_offset + number * board_struct.size)
+            refs = struct.unpack_from(f"<{columns_count + members_count}I",
+                                      self.buffer, refs_offset)
+            items = LazyItems(self, items_offset, items_count)
+            board = Board(string(board_id), string(name), string(owner), created,
+                          [string(index) for index in refs[:columns_count]],
+                          members=[string(index) for index in refs[columns_count:]],
+                          version=version,
+                          # В снимке версии 1 номера нет: считаем по id элементов
+                          item_counter=(item_counter[0] if item_counter
+                                        else max(map(id_number, items), default=0)))
+            board.items = items
+            boards[board.id] = board
+        return boards
+
+    def item(self, offset: int, item_id: str) -> Item:
+        """Разобрать запись элемента"""
+        (name, description, status, created_by, assigned_to, created,
+         comments_offset, comments_count) = ITEM.unpack_from(self.buffer, offset)
+        string = self.string
+        return Item(item_id, string(name), string(description), string(status),
+                    string(created_by), created, string(assigned_to),
+                    tuple(Comment(string(text), string(author), comment_created)
+                          for text, author, comment_created in COMMENT.iter_unpack(
+                              self.buffer[comments_offset:
+                                          comments_offset + comments_count * COMMENT.size])))
+
+
+class LazyItems(MutableMapping):
+    """Элементы доски из снимка, которые разбираются при первом обращении
+
+    Пока к элементам не обращались по id, даже их id не читаются:
+    ``len`` берётся из таблицы досок. Разобранные, добавленные и
+    изменённые элементы хранятся в обычном словаре.
+    """
+
+    def __init__(self, snapshot: Snapshot, offset: int, count: int):
+        self._snapshot = snapshot
+        self._offset = offset
+        self._count = count
+        # id элемента -> номер записи в снимке (None у добавленных после загрузки)
+        self._positions: Optional[Dict[str, Optional[int]]] = None
+        self._items: Dict[str, Item] = {}
+
+    def _index(self) -> Dict[str, Optional[int]]:
+        if self._positions is None:
+            string = self._snapshot.string
+            ids = struct.unpack_from(f"<{self._count}I", self._snapshot.buffer, self._offset)
+            self._positions = {string(index): number for number, index in enumerate(ids)}
+        return self._positions
+
+    def _record_offset(self, number: int) -> int:
+        return self._offset + self._count * 4 + number * ITEM.size
+
+    def __getitem__(self, item_id):
+        try:
+            return self._items[item_id]
+        except KeyError:
+            pass
+        number = self._index()[item_id]
+        item = self._items[item_id] = self._snapshot.item(self._record_offset(number), item_id)
+        return item
+
+    def __setitem__(self, item_id, item):
+        self._index().setdefault(item_id, None)
+        self._items[item_id] = item
+
+    def __delitem__(self, item_id):
+        del self._index()[item_id]
+        self._items.pop(item_id, None)
+
+    def __contains__(self, item_id):
+        return item_id in self._index()
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        if self._positions is None:
+            return self._count
+        return len(self._positions)
+
+    def summaries(self) -> Iterator[Tuple[str, str, int]]:
+        """(id, статус, время создания) всех элементов без разбора их записей"""
+        string = self._snapshot.string
+        buffer = self._snapshot.buffer
+        for item_id, number in self._index().items():
+            item = self._items.get(item_id)
+            if item is not None:
+                yield item.id, item.status, item.created
+            else:
+                _, _, status, _, _, created, _, _ = ITEM.unpack_from(
+                    buffer, self._record_offset(number))
+                yield item_id, string(status), created
+
+
+class _StringTable:
+    """Номера строк при записи снимка"""
+
+    def __init__(self):
+        self.numbers: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        number = self.numbers.get(value)
+        if number is None:
+            number = self.numbers[value] = len(self.numbers)
+        return number
+
+
+def _encode_board(board: Board, strings: _StringTable, offset: int) -> Tuple[bytes, bytes]:
+    """Данные доски, начинающиеся с ``offset``, и её запись в таблице досок"""
+    comments = bytearray()
+    ids = bytearray()
+    records = bytearray()
+    items = list(board["items"].values())
+    comments_offset = offset
+    for item in items:
+        for comment in item.comments:
+            comments += COMMENT.pack(strings(comment.text), strings(comment.author),
+                                     comment.created)
+    items_offset = offset + len(comments)
+    for item in items:
+        ids += struct.pack("<I", strings(item.id))
+        records += ITEM.pack(strings(item.name), strings(item.description),
+                             strings(item.status), strings(item.created_by),
+                             strings(item.assigned_to), item.created,
+                             comments_offset, len(item.comments))
+        comments_offset += len(item.comments) * COMMENT.size
+    members = sorted(board["members"])
+    refs = struct.pack(f"<{len(board['columns']) + len(members)}I",
+                       *(strings(value) for value in (*board["columns"], *members)))
+    refs_offset = items_offset + len(ids) + len(records)
+    entry = BOARD.pack(strings(board["id"]), strings(board["name"]), strings(board["owner"]),
+                       board.created, board.get("version", 0), refs_offset,
+                       len(board["columns"]), len(members), items_offset, len(items),
+                       board.item_counter)
+    return bytes(comments + ids + records + refs), entry
+
+
+def write_snapshot(path: str, users: Dict, boards: Dict, meta: Optional[Dict] = None):
+    """Атомарно записать двоичный снимок
+
+    Как и JSON снимок, файл пишется во временный файл, сбрасывается на
+    диск и заменяет исходный переименованием.
+    """
+    tmp_path = f"{path}.tmp"
+    strings = _StringTable()
+    entries = []
+    with open(tmp_path, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        # Холодные данные есть у немногих досок: храним их в метаданных
+        cold = {board_id: board["cold"] for board_id, board in boards.items()
+                if board.get("cold")}
+        meta_data = json.dumps({**(meta or {}), "users": users, "cold": cold},
+                               ensure_ascii=False, separators=(',', ':'),
+                               default=json_default).encode('utf-8')
+        meta_offset = f.tell()
+        f.write(meta_data)
+        for board in boards.values():
+            board = Board.from_dict(board)
+            data, entry = _encode_board(board, strings, f.tell())
+            f.write(data)
+            entries.append(entry)
+
+        strings_offset = f.tell()
+        encoded = [value.encode('utf-8') for value in strings.numbers]
+        position = strings_offset + (len(encoded) + 1) * OFFSET.size
+        offsets = bytearray()
+        for value in encoded:
+            offsets += OFFSET.pack(position)
+            position += len(value)
+        offsets += OFFSET.pack(position)
+        f.write(offsets)
+        f.write(b"".join(encoded))
+
+        boards_offset = f.tell()
+        f.write(b"".join(entries))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), meta_offset,
+                            len(meta_data), strings_offset, len(encoded), boards_offset))
+        metrics.count("bytes_written", boards_offset + len(entries) * BOARD.size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+def read_snapshot(path: str) -> Dict:
+    """Открыть двоичный снимок, если он существует
+
+    Возвращает словарь того же вида, что и JSON снимок: ``users``,
+    ``boards`` и метаданные (``journal_seq``).
+    """
+    if not os.path.exists(path):
+        return {}
+    snapshot = Snapshot(path)
+    data = snapshot.meta()
+    data["boards"] = snapshot.boards()
+    for board_id, cold in data.pop("cold", {}).items():
+        data["boards"][board_id].cold = cold
+    return data
+
+
+class BinaryJournalStorage(JournalStorage):
+    """Журнал изменений поверх двоичного снимка
+
+    Работает как ``JournalStorage``, но снимок хранится в двоичном
+    формате: при запуске читаются только заголовки досок, а элементы
+    разбираются при обращении. При первом запуске данные переносятся
+    из JSON файла (и его журнала, если он есть).
+    """
+
+    def __init__(self, data_file: str, json_file: Optional[str] = None, **kwargs):
+        super().__init__(data_file, **kwargs)
+        self.json_file = json_file
+        if json_file and not os.path.exists(data_file) and (
+                os.path.exists(json_file) or os.path.exists(f"{json_file}.journal")):
+            convert_to_binary(json_file, data_file)
+
+    @staticmethod
+    def read_snapshot(path: str) -> Dict:
+        return read_snapshot(path)
+
+    def scrub_passwords(self, users: Dict, boards: Dict):
+        """Записать снимок и убрать прежние пароли из исходного JSON файла"""
+        super().scrub_passwords(users, boards)
+        scrub_legacy_passwords(self.json_file, users)
+
+    @staticmethod
+    def write_snapshot(path: str, users: Dict, boards: Dict, seq: int):
+        write_snapshot(path, users, boards, {"journal_seq": seq})
+
+
+def convert_to_binary(json_file: str, snapshot_file: str):
+    """JSON снимок (с журналом) -> двоичный снимок"""
+    source = JournalStorage(json_file, background=False)
+    users, boards = source.load()
+    source.close()
+    write_snapshot(snapshot_file, users, boards)
+
+
+def convert_to_json(snapshot_file: str, json_file: str):
+    """Двоичный снимок (с журналом) -> JSON снимок"""
+    source = BinaryJournalStorage(snapshot_file, background=False)
+    users, boards = source.load()
+    source.close()
+    write_json_atomic(json_file, {"users": users, "boards": boards})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("to-binary", "JSON -> двоичный снимок"),
+                            ("to-json", "двоичный снимок -> JSON")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("source")
+        command.add_argument("target")
+    args = parser.parse_args(argv)
+
+    if args.command == "to-binary":
+        convert_to_binary(args.source, args.target)
+    else:
+        convert_to_json(args.source, args.target)
+    print(f"{args.source} -> {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,732 @@
+"""Хранилище PyMonday в базе SQLite.
+
+Пользователи загружаются в память целиком, а доски читаются из базы
+по требованию через ``SqliteBoards`` (в памяти держится не больше
+``MAX_CACHED_BOARDS`` досок). Элементы доски (``SqliteItems``) тоже
+читаются по одному: добавление, перемещение и комментарий затрагивают
+только свои строки, а вся доска загружается лишь при переборе элементов.
+Запросы меню (список досок,
+просмотр, поиск, панель управления) выполняются прямо в SQL по индексам
+и не требуют загрузки всех элементов. Поиск по словам идёт по
+полнотекстовому индексу FTS5 ``items_fts`` (его поддерживают триггеры
+таблицы items), а релевантность считается так же, как в
+``search_index.SearchIndex``.
+
+Запись между процессами упорядочивает сама SQLite (режим WAL, ожидание
+занятой базы), поэтому отдельная блокировка файла на всю запись не
+нужна: она взялась бы позже блокировки базы, которую держит
+незафиксированная транзакция. Файл блокируется только на фиксацию и
+запись событий после неё (``commit_lock``), чтобы события разных
+процессов попадали в журнал в порядке фиксации.
+Изменения других процессов видны по ``PRAGMA data_version``: после них
+кэш досок сбрасывается, а запросы и так читают базу напрямую.
+"""
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymonday.aggregates import RECENT_ITEM_FIELDS
+from pymonday.auth import scrub_legacy_passwords
+from pymonday.concurrency import FileLock
+from pymonday.models import Board, Comment, Item, id_number
+from pymonday.search_index import match_score, tokenize
+from pymonday.storage import read_json
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS boards (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    item_counter INTEGER,
+    cold TEXT
+);
+CREATE TABLE IF NOT EXISTS board_members (
+    board_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    PRIMARY KEY (board_id, email)
+);
+CREATE TABLE IF NOT EXISTS items (
+    board_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_by TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    assigned_to TEXT NOT NULL,
+    search_text TEXT NOT NULL,
+    PRIMARY KEY (board_id, id)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    board_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    author TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_members_email ON board_members (email);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items (board_id, status);
+CREATE INDEX IF NOT EXISTS idx_items_created_at ON items (created_at);
+CREATE INDEX IF NOT EXISTS idx_items_assigned_to ON items (assigned_to);
+CREATE INDEX IF NOT EXISTS idx_comments_item ON comments (board_id, item_id);
+"""
+# Слова - как в search_index.tokenize: буквы, цифры и "_", регистр не учитывается
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name, description, content='items', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, description ON items
+BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+    INSERT INTO items_fts (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+"""
+BUSY_TIMEOUT = 30.0  # Сколько секунд ждать, пока другой процесс держит базу
+MAX_CACHED_BOARDS = 8
+IN_CHUNK = 500  # Сколько id передавать в одном условии IN (...)
+
+ITEM_FIELDS = ("id", "name", "description", "status",
+               "created_by", "created_at", "assigned_to")
+
+
+def _search_text(item: Dict) -> str:
+    # SQLite умеет приводить к нижнему регистру только ASCII,
+    # поэтому текст для поиска готовим на стороне Python
+    return f"{item['name']}\n{item['description']}".lower()
+
+
+def _cold_json(board: Dict) -> Optional[str]:
+    cold = board.get("cold")
+    return json.dumps(cold, ensure_ascii=False) if cold else None
+
+
+def _status_counts(columns: str, cold: Optional[str], counts: Dict[str, int]) -> Dict[str, int]:
+    """Счётчики доски по статусам в порядке колонок, с нулями и холодными элементами
+
+    columns и cold - значения из таблицы boards, counts - результат
+    GROUP BY status по элементам доски. Порядок тот же, что у агрегатов
+    хранилищ в памяти.
+    """
+    result = {col: 0 for col in json.loads(columns)}
+    cold_counts = json.loads(cold).get("counts", {}) if cold else {}
+    for grouped in (cold_counts, counts):
+        for status, count in grouped.items():
+            result[status] = result.get(status, 0) + count
+    return result
+
+
+class SqliteItems(MutableMapping):
+    """Элементы доски в базе, которые читаются при обращении
+
+    Элемент по id читается одним запросом; перебор загружает все элементы
+    доски. Прочитанные, добавленные и изменённые элементы хранятся в
+    словаре, удалённые помнятся до записи. Операции записываются в базу
+    сразу (в текущую транзакцию), поэтому база и словарь не расходятся.
+    """
+
+    def __init__(self, storage: "SqliteStorage", board_id: str):
+        self._storage = storage
+        self._board_id = board_id
+        self._items: Dict[str, Item] = {}
+        self._removed: Set[str] = set()
+        self._complete = False
+
+    def __getitem__(self, item_id):
+        try:
+            return self._items[item_id]
+        except KeyError:
+            pass
+        if self._complete or item_id in self._removed:
+            raise KeyError(item_id)
+        item = self._storage.load_item(self._board_id, item_id)
+        if item is None:
+            raise KeyError(item_id)
+        self._items[item_id] = item
+        return item
+
+    def __setitem__(self, item_id, item):
+        self._removed.discard(item_id)
+        self._items[item_id] = item
+
+    def __delitem__(self, item_id):
+        self[item_id]  # KeyError, если элемента нет
+        del self._items[item_id]
+        self._removed.add(item_id)
+
+    def __contains__(self, item_id):
+        if item_id in self._items:
+            return True
+        if self._complete or item_id in self._removed:
+            return False
+        return self._storage.conn.execute(
+            "SELECT 1 FROM items WHERE board_id = ? AND id = ?",
+            (self._board_id, item_id)).fetchone() is not None
+
+    def _load(self):
+        """Загрузить все элементы доски в порядке добавления"""
+        if self._complete:
+            return
+        items = {}
+        for item_id, item in self._storage.load_items(self._board_id).items():
+            if item_id not in self._removed:
+                items[item_id] = self._items.get(item_id, item)
+        for item_id, item in self._items.items():
+            items.setdefault(item_id, item)
+        self._items = items
+        self._complete = True
+
+    def __iter__(self):
+        self._load()
+        return iter(list(self._items))
+
+    def __len__(self):
+        self._load()
+        return len(self._items)
+
+
+class SqliteBoards(MutableMapping):
+    """Доски, которые загружаются из базы при первом обращении
+
+    В памяти остаются max_cached последних досок: изменения пишутся в
+    базу сразу, поэтому вытесненная доска просто читается заново.
+    """
+
+    def __init__(self, storage: "SqliteStorage", max_cached: int = MAX_CACHED_BOARDS):
+        self.storage = storage
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def __getitem__(self, board_id):
+        if board_id in self._cache:
+            self._cache.move_to_end(board_id)
+            return self._cache[board_id]
+        board = self.storage.load_board(board_id)
+        if board is None:
+            raise KeyError(board_id)
+        self._remember(board_id, board)
+        return board
+
+    def __setitem__(self, board_id, board):
+        self._remember(board_id, board)
+
+    def __delitem__(self, board_id):
+        del self._cache[board_id]
+
+    def _remember(self, board_id: str, board: Dict):
+        self._cache[board_id] = board
+        self._cache.move_to_end(board_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def __contains__(self, board_id):
+        if board_id in self._cache:
+            return True
+        row = self.storage.conn.execute(
+            "SELECT 1 FROM boards WHERE id = ?", (board_id,)).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        rows = self.storage.conn.execute("SELECT id FROM boards ORDER BY rowid")
+        seen = set()
+        for (board_id,) in rows.fetchall():
+            seen.add(board_id)
+            yield board_id
+        # Доски, созданные в памяти, но ещё не сохранённые
+        for board_id in list(self._cache):
+            if board_id not in seen:
+                yield board_id
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def cached(self) -> Dict:
+        """Доски, уже загруженные в память"""
+        return self._cache
+
+
+class SqliteStorage:
+    """Хранение пользователей, досок, участников, элементов и комментариев в SQLite"""
+
+    queryable = True
+
+    def __init__(self, db_file: str, json_file: str = None):
+        self.db_file = db_file
+        self.json_file = json_file
+        self._commit_lock = FileLock(f"{db_file}.lock")
+        is_new = not os.path.exists(db_file)
+        # Запись может прийти из потока отложенного сохранения;
+        # PyMonday сам не допускает одновременных обращений
+        self.conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # В режиме WAL чтение не блокирует запись другого процесса
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Удалённые и заменённые записи (например, прежние пароли) затираются нулями
+        self.conn.execute("PRAGMA secure_delete=ON")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(boards)")}
+        if "version" not in columns:
+            # База создана до появления счётчика версий
+            self.conn.execute(
+                "ALTER TABLE boards ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+        if "item_counter" not in columns:
+            # Без счётчика id элементов (NULL) он считается по id при чтении доски
+            self.conn.execute("ALTER TABLE boards ADD COLUMN item_counter INTEGER")
+            self.conn.commit()
+        if "cold" not in columns:
+            # Холодные данные доски (Board.cold) в JSON, NULL - их нет
+            self.conn.execute("ALTER TABLE boards ADD COLUMN cold TEXT")
+            self.conn.commit()
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone() is not None
+        self.conn.executescript(FTS_SCHEMA)
+        if not has_fts:
+            # База создана до появления полнотекстового индекса
+            self.conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+            self.conn.commit()
+        self._data_version = None
+        if is_new and json_file and os.path.exists(json_file):
+            # Перенос данных из JSON файла при первом запуске
+            data = read_json(json_file)
+            self.save(data.get("users", {}), data.get("boards", {}))
+
+    def load(self) -> Tuple[Dict, MutableMapping]:
+        """Загрузить пользователей; доски будут читаться по требованию"""
+        users = {}
+        for email, name, password, created_at in self.conn.execute(
+                "SELECT email, name, password, created_at FROM users"):
+            users[email] = {
+                "name": name,
+                "password": password,
+                "created_at": created_at
+            }
+        self.boards = SqliteBoards(self)
+        self._data_version = self._read_data_version()
+        return users, self.boards
+
+    def _read_data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def lock(self):
+        """Запись между процессами упорядочивает сама SQLite"""
+        return nullcontext()
+
+    def commit_lock(self) -> FileLock:
+        """Блокировка от фиксации до записи событий
+
+        Берётся, когда транзакция уже держит блокировку записи базы, а
+        отпускается после записи событий: следующий процесс зафиксирует
+        свою транзакцию и допишет события только после нас.
+        """
+        return self._commit_lock
+
+    def changed(self) -> bool:
+        """Зафиксировал ли изменения другой процесс"""
+        return self._read_data_version() != self._data_version
+
+    def read_changes(self):
+        """Загрузка лёгкая (доски читаются по требованию): перезагружаем"""
+        return None
+
+    def load_board(self, board_id: str):
+        """Прочитать доску; элементы читаются по требованию (``SqliteItems``)"""
+        row = self.conn.execute(
+            "SELECT id, name, owner, created_at, columns, version, item_counter, cold "
+            "FROM boards WHERE id = ?",
+            (board_id,)).fetchone()
+        if row is None:
+            return None
+        item_counter = row[6]
+        if item_counter is None:
+            # Без счётчика он считается по id элементов
+            item_counter = max((id_number(item_id) for (item_id,) in self.conn.execute(
+                "SELECT id FROM items WHERE board_id = ?", (board_id,))), default=0)
+        board = Board(row[0], row[1], row[2], row[3], json.loads(row[4]),
+                      members=self._members(board_id), version=row[5],
+                      item_counter=item_counter, cold=json.loads(row[7]) if row[7] else None)
+        board.items = SqliteItems(self, board_id)
+        return board
+
+    def load_items(self, board_id: str) -> Dict[str, Item]:
+        """Все элементы доски с комментариями в порядке добавления"""
+        comments = {}
+        for item_id, text, author, created_at in self.conn.execute(
+                "SELECT item_id, text, author, created_at FROM comments "
+                "WHERE board_id = ? ORDER BY rowid", (board_id,)):
+            comments.setdefault(item_id, []).append(Comment(text, author, created_at))
+        items = {}
+        for item_row in self.conn.execute(
+                f"SELECT {', '.join(ITEM_FIELDS)} FROM items WHERE board_id = ? ORDER BY rowid",
+                (board_id,)):
+            items[item_row[0]] = Item(*item_row, comments.get(item_row[0], ()))
+        return items
+
+    def load_item(self, board_id: str, item_id: str) -> Optional[Item]:
+        """Один элемент доски с комментариями или None"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(ITEM_FIELDS)} FROM items WHERE board_id = ? AND id = ?",
+            (board_id, item_id)).fetchone()
+        if row is None:
+            return None
+        comments = [Comment(*comment) for comment in self.conn.execute(
+            "SELECT text, author, created_at FROM comments "
+            "WHERE board_id = ? AND item_id = ? ORDER BY rowid", (board_id, item_id))]
+        return Item(*row, comments)
+
+    def _members(self, board_id: str) -> Set[str]:
+        return {email for (email,) in self.conn.execute(
+            "SELECT email FROM board_members WHERE board_id = ?", (board_id,))}
+
+    def _items(self, where: str, params: Tuple) -> List[Dict]:
+        rows = self.conn.execute(
+            f"SELECT board_id, {', '.join(ITEM_FIELDS)} FROM items {where}", params).fetchall()
+        return self._with_comments(rows)
+
+    def _with_comments(self, rows: List[Tuple]) -> List[Item]:
+        """Элементы из строк (board_id, *ITEM_FIELDS) с комментариями
+
+        Комментарии читаются одним запросом на доску; длинные списки
+        элементов делятся на части, чтобы не превысить число параметров.
+        """
+        wanted = {}
+        for row in rows:
+            wanted.setdefault(row[0], []).append(row[1])
+        comments = {}
+        for board_id, item_ids in wanted.items():
+            for start in range(0, len(item_ids), IN_CHUNK):
+                chunk = item_ids[start:start + IN_CHUNK]
+                for item_id, text, author, created_at in self.conn.execute(
+                        "SELECT item_id, text, author, created_at FROM comments "
+                        f"WHERE board_id = ? AND item_id IN ({', '.join('?' * len(chunk))}) "
+                        "ORDER BY rowid", [board_id, *chunk]):
+                    comments.setdefault((board_id, item_id), []).append(
+                        Comment(text, author, created_at))
+        return [Item(*row[1:], comments.get((row[0], row[1]), ())) for row in rows]
+
+    # --- запись ---
+
+    def _insert_user(self, email: str, user: Dict):
+        self.conn.execute(
+            "INSERT INTO users (email, name, password, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET name = excluded.name, "
+            "password = excluded.password, created_at = excluded.created_at",
+            (email, user["name"], user["password"], user["created_at"]))
+
+    def _insert_board(self, board: Dict):
+        self.conn.execute(
+            "INSERT INTO boards (id, name, owner, created_at, columns, version, item_counter, "
+            "cold) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET name = excluded.name, owner = excluded.owner, "
+            "created_at = excluded.created_at, columns = excluded.columns, "
+            "version = excluded.version, item_counter = excluded.item_counter, "
+            "cold = excluded.cold",
+            (board["id"], board["name"], board["owner"], board["created_at"],
+             json.dumps(board["columns"], ensure_ascii=False), board.get("version", 0),
+             board.get("item_counter"), _cold_json(board)))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO board_members (board_id, email) VALUES (?, ?)",
+            [(board["id"], email) for email in board["members"]])
+        for item in board["items"].values():
+            self._insert_item(board["id"], item)
+
+    def _insert_item(self, board_id: str, item: Dict):
+        # UPSERT, а не REPLACE: замена строки не вызывает триггер удаления из items_fts
+        self.conn.execute(
+            "INSERT INTO items (board_id, id, name, description, status, "
+            "created_by, created_at, assigned_to, search_text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (board_id, id) DO UPDATE SET name = excluded.name, "
+            "description = excluded.description, status = excluded.status, "
+            "created_by = excluded.created_by, created_at = excluded.created_at, "
+            "assigned_to = excluded.assigned_to, search_text = excluded.search_text",
+            (board_id, item["id"], item["name"], item["description"], item["status"],
+             item["created_by"], item["created_at"], item["assigned_to"],
+             _search_text(item)))
+        for comment in item["comments"]:
+            self._insert_comment(board_id, item["id"], comment)
+
+    def _insert_comment(self, board_id: str, item_id: str, comment: Dict):
+        self.conn.execute(
+            "INSERT INTO comments (board_id, item_id, text, author, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (board_id, item_id, comment["text"], comment["author"],
+             comment["created_at"]))
+
+    def _delete_board_contents(self, board_id: str):
+        """Удалить участников, элементы и комментарии доски (запись доски остаётся)"""
+        for table in ("board_members", "items", "comments"):
+            self.conn.execute(f"DELETE FROM {table} WHERE board_id = ?", (board_id,))
+
+    def record(self, op: str, data: Dict, users: Dict, boards: Dict):
+        """Выполнить операцию в текущей транзакции (фиксируется в flush)"""
+        if op == "user_registered":
+            self._insert_user(data["email"], data["user"])
+            return
+        if op == "password_changed":
+            self._insert_user(data["email"], users[data["email"]])
+            return
+        if op == "board_created":
+            self._insert_board(data["board"])
+            return
+
+        self.conn.execute("UPDATE boards SET version = version + 1 WHERE id = ?",
+                          (data["board_id"],))
+        if op == "member_added":
+            self.conn.execute(
+                "INSERT OR IGNORE INTO board_members (board_id, email) VALUES (?, ?)",
+                (data["board_id"], data["email"]))
+        elif op == "member_removed":
+            self.conn.execute(
+                "DELETE FROM board_members WHERE board_id = ? AND email = ?",
+                (data["board_id"], data["email"]))
+        elif op in ("item_added", "item_restored"):
+            self._insert_item(data["board_id"], data["item"])
+            self.conn.execute("UPDATE boards SET item_counter = ? WHERE id = ?",
+                              (boards[data["board_id"]]["item_counter"], data["board_id"]))
+        elif op == "item_moved":
+            self.conn.execute(
+                "UPDATE items SET status = ? WHERE board_id = ? AND id = ?",
+                (data["status"], data["board_id"], data["item_id"]))
+        elif op == "comment_added":
+            self._insert_comment(data["board_id"], data["item_id"], data["comment"])
+        elif op in ("item_deleted", "item_archived"):
+            for table, column in (("items", "id"), ("comments", "item_id")):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE board_id = ? AND {column} = ?",
+                    (data["board_id"], data["item_id"]))
+        elif op == "board_tiered":
+            board_id = data["board_id"]
+            for item_id in data["item_ids"]:
+                for table, column in (("items", "id"), ("comments", "item_id")):
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE board_id = ? AND {column} = ?",
+                        (board_id, item_id))
+            for item_id, count in data["comments"].items():
+                # Комментарии элемента идут в порядке rowid, холодные - первые
+                self.conn.execute(
+                    "DELETE FROM comments WHERE rowid IN (SELECT rowid FROM comments "
+                    "WHERE board_id = ? AND item_id = ? ORDER BY rowid LIMIT ?)",
+                    (board_id, item_id, count))
+            self.conn.execute("UPDATE boards SET cold = ? WHERE id = ?",
+                              (_cold_json(boards[board_id]), board_id))
+        elif op in ("board_deleted", "board_archived", "board_restored"):
+            self._delete_board_contents(data["board_id"])
+            self._insert_board(boards[data["board_id"]])
+        else:
+            raise ValueError(f"Неизвестная операция: {op}")
+
+    def flush(self, users: Dict, boards: Dict):
+        """Зафиксировать транзакцию"""
+        self.conn.commit()
+
+    def discard(self):
+        """Откатить незафиксированные изменения"""
+        self.conn.rollback()
+
+    def scrub_passwords(self, users: Dict, boards: Dict):
+        """Перенести WAL в базу и убрать прежние пароли из исходного JSON файла"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        scrub_legacy_passwords(self.json_file, users)
+
+    def save(self, users: Dict, boards: Dict):
+        """Сохранить всех пользователей и загруженные в память доски"""
+        if isinstance(boards, SqliteBoards):
+            boards = boards.cached()
+        with self.conn:
+            for email, user in users.items():
+                self._insert_user(email, user)
+            for board in boards.values():
+                self._delete_board_contents(board["id"])
+                self._insert_board(board)
+
+    def close(self):
+        """Закрыть соединение с базой (незафиксированные изменения теряются)"""
+        self.conn.close()
+
+    # --- запросы ---
+
+    def _headers(self, where: str, params: Tuple) -> List[Dict]:
+        rows = self.conn.execute(
+            "SELECT b.id, b.name, b.owner, b.created_at, b.version, "
+            "(SELECT COUNT(*) FROM items i WHERE i.board_id = b.id) "
+            f"FROM boards b {where}", params)
+        return [{
+            "id": board_id,
+            "name": name,
+            "owner": owner,
+            "created_at": created_at,
+            "members": self._members(board_id),
+            "items_count": items_count,
+            "version": version
+        } for board_id, name, owner, created_at, version, items_count in rows.fetchall()]
+
+    def user_boards(self, email: str) -> List[Dict]:
+        """Заголовки досок, в которых участвует пользователь"""
+        return self._headers(
+            "JOIN board_members m ON b.id = m.board_id WHERE m.email = ? ORDER BY b.rowid",
+            (email,))
+
+    def is_member(self, email: str, board_id: str) -> bool:
+        """Участвует ли пользователь в доске"""
+        row = self.conn.execute(
+            "SELECT 1 FROM board_members WHERE board_id = ? AND email = ?",
+            (board_id, email)).fetchone()
+        return row is not None
+
+    def board_header(self, board_id: str) -> Dict:
+        """Заголовок одной доски"""
+        return self._headers("WHERE b.id = ?", (board_id,))[0]
+
+    def items_by_column(self, board_id: str) -> Dict[str, List[Dict]]:
+        """Элементы доски, сгруппированные по колонкам"""
+        row = self.conn.execute(
+            "SELECT columns FROM boards WHERE id = ?", (board_id,)).fetchone()
+        items_by_column = {col: [] for col in json.loads(row[0])}
+        for col in items_by_column:
+            items_by_column[col] = self._items(
+                "WHERE board_id = ? AND status = ? ORDER BY rowid", (board_id, col))
+        return items_by_column
+
+    def column_pages(self, board_id: str, offsets: Dict[str, int],
+                     limit: int) -> Dict[str, Dict]:
+        """Страница элементов каждой колонки доски и общее число элементов в ней"""
+        row = self.conn.execute(
+            "SELECT columns FROM boards WHERE id = ?", (board_id,)).fetchone()
+        counts = dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM items WHERE board_id = ? GROUP BY status",
+            (board_id,)))
+        result = {}
+        for col in json.loads(row[0]):
+            result[col] = {
+                "total": counts.get(col, 0),
+                "items": self._items(
+                    "WHERE board_id = ? AND status = ? ORDER BY rowid LIMIT ? OFFSET ?",
+                    (board_id, col, limit, offsets.get(col, 0)))
+            }
+        return result
+
+    def on_change(self, op: str, data: Dict):
+        """Индексы SQLite обновляет сама база"""
+
+    def search(self, email: str, term: str, limit: Optional[int] = None,
+               substring: bool = False) -> List[Dict]:
+        """Поиск элементов по словам в названии или описании
+
+        Элементы, содержащие все слова запроса (как начала слов), находит
+        FTS5, результаты идут по убыванию релевантности. Если ничего не
+        найдено или передан substring=True, выполняется поиск по подстроке.
+        """
+        query_tokens = tokenize(term)
+        if query_tokens and not substring:
+            # Совпадения FTS5 отбираются среди элементов досок пользователя;
+            # релевантность считается по названию и описанию, элементы
+            # целиком читаются только для попавших в результат
+            scored = []
+            for rowid, name, description in self.conn.execute(
+                    "SELECT i.rowid, i.name, i.description FROM board_members m "
+                    "JOIN items i ON i.board_id = m.board_id "
+                    "WHERE m.email = ? AND i.rowid IN "
+                    "(SELECT rowid FROM items_fts WHERE items_fts MATCH ?)",
+                    (email, " AND ".join(f'"{token}"*' for token in query_tokens))):
+                score = match_score({"name": name, "description": description}, query_tokens)
+                if score:
+                    scored.append((-score, rowid))
+            if scored:
+                scored.sort()
+                if limit is not None:
+                    scored = scored[:limit]
+                rows = {row[0]: row[1:] for row in self.conn.execute(
+                    "SELECT i.rowid, b.name, i.board_id, "
+                    f"{', '.join('i.' + f for f in ITEM_FIELDS)} "
+                    "FROM items i JOIN boards b ON b.id = i.board_id "
+                    f"WHERE i.rowid IN ({', '.join('?' * len(scored))})",
+                    [rowid for _, rowid in scored])}
+                items = self._with_comments([rows[rowid][1:] for _, rowid in scored])
+                return [{"board": rows[rowid][0], "item": item, "score": -score}
+                        for (score, rowid), item in zip(scored, items)]
+        return self.substring_search(email, term, limit)
+
+    def substring_search(self, email: str, term: str,
+                         limit: Optional[int] = None) -> List[Dict]:
+        """Поиск элементов по подстроке в названии или описании"""
+        rows = self.conn.execute(
+            f"SELECT b.name, i.board_id, {', '.join('i.' + f for f in ITEM_FIELDS)} "
+            "FROM board_members m "
+            "JOIN boards b ON b.id = m.board_id "
+            "JOIN items i ON i.board_id = m.board_id "
+            "WHERE m.email = ? AND instr(i.search_text, ?) > 0 "
+            "ORDER BY b.rowid, i.rowid LIMIT ?",
+            (email, term.lower(), -1 if limit is None else limit)).fetchall()
+        items = self._with_comments([row[1:] for row in rows])
+        return [{"board": row[0], "item": item} for row, item in zip(rows, items)]
+
+    def board_stats(self, board_id: str) -> Dict:
+        """Количество элементов доски по статусам (с холодными)"""
+        columns, cold = self.conn.execute(
+            "SELECT columns, cold FROM boards WHERE id = ?", (board_id,)).fetchone()
+        items_by_status = _status_counts(columns, cold, dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM items WHERE board_id = ? GROUP BY status",
+            (board_id,))))
+        return {
+            "total_items": sum(items_by_status.values()),
+            "items_by_status": items_by_status
+        }
+
+    def dashboard_stats(self, email: str, recent_limit: int = 5) -> Dict:
+        """Статистика по доскам пользователя и последние элементы"""
+        (boards_count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM board_members WHERE email = ?", (email,)).fetchone()
+        grouped = {}
+        for board_id, status, count in self.conn.execute(
+                "SELECT i.board_id, i.status, COUNT(*) FROM board_members m "
+                "JOIN items i ON i.board_id = m.board_id "
+                "WHERE m.email = ? GROUP BY i.board_id, i.status", (email,)):
+            grouped.setdefault(board_id, {})[status] = count
+        # Статусы идут по колонкам досок, как в хранилищах в памяти
+        items_by_status = {}
+        for board_id, columns, cold in self.conn.execute(
+                "SELECT b.id, b.columns, b.cold FROM board_members m "
+                "JOIN boards b ON b.id = m.board_id WHERE m.email = ? ORDER BY b.rowid",
+                (email,)):
+            for status, count in _status_counts(columns, cold,
+                                                grouped.get(board_id, {})).items():
+                if count:
+                    items_by_status[status] = items_by_status.get(status, 0) + count
+        rows = self.conn.execute(
+            f"SELECT b.name, b.id, {', '.join('i.' + f for f in RECENT_ITEM_FIELDS)} "
+            "FROM items i "
+            "JOIN board_members m ON m.board_id = i.board_id AND m.email = ? "
+            "JOIN boards b ON b.id = i.board_id "
+            "ORDER BY i.created_at DESC LIMIT ?", (email, recent_limit))
+        return {
+            "boards_count": boards_count,
+            "total_items": sum(items_by_status.values()),
+            "items_by_status": items_by_status,
+            "recent_items": [{"board": row[0], "board_id": row[1],
+                              "item": dict(zip(RECENT_ITEM_FIELDS, row[2:]))}
+                             for row in rows]
+        }
@@ -0,0 +1,545 @@
+"""Хранилища данных PyMonday.
+
+Хранилище отвечает только за сохранение и загрузку ``users`` и ``boards``.
+Каждое изменение описывается операцией ``(op, data)``: одна и та же функция
+``apply_change`` применяет её к данным в памяти и при повторном проигрывании
+журнала, поэтому состояние после загрузки всегда совпадает с состоянием
+до выхода из программы.
+
+Изменения передаются хранилищу методом ``record``, а ``flush`` делает все
+накопленные изменения постоянными одной атомарной записью. ``discard``
+отменяет изменения, переданные после последнего ``flush``.
+
+Несколько процессов могут работать с одними файлами: ``lock()`` даёт
+блокировку для записи, ``changed()`` сообщает, что файлы изменил другой
+процесс, а ``read_changes()`` возвращает его операции, если их можно
+дочитать без полной перезагрузки (иначе None).
+
+``scrub_passwords`` вызывается после пересчёта пароля, сохранённого
+открытым текстом: хранилище убирает прежнее значение из своих файлов
+(журнала, исходного JSON файла после переноса данных).
+"""
+import json
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple
+
+from pymonday.concurrency import FileLock, file_signature
+from pymonday.instrumentation import metrics
+from pymonday.models import Board, Comment, Item, Record, id_number
+
+
+def apply_change(users: Dict, boards: Dict, op: str, data: Dict):
+    """Применить одну операцию к данным в памяти
+
+    Доски, элементы и комментарии из data (словари после чтения JSON)
+    превращаются в объекты ``models`` и подставляются обратно в data.
+    Каждая операция над доской увеличивает её счётчик ``version``.
+
+    Удаление и перенос в архив кладут в data то, что убрано из данных
+    (элемент - в ``item``, участников доски - в ``members``), чтобы
+    индексы могли его забыть. Убранная доска остаётся пустой записью
+    без участников (см. ``models.Board``). Перенос в холодные сегменты
+    (``board_tiered``) затрагивает много элементов сразу, поэтому индексы
+    доски после него строятся заново.
+    """
+    if op == "user_registered":
+        users[data["email"]] = data["user"]
+        return
+    if op == "password_changed":
+        users[data["email"]]["password"] = data["password"]
+        return
+    if op == "board_created":
+        board = data["board"] = Board.from_dict(data["board"])
+        board.version = board.version or 1
+        boards[board.id] = board
+        return
+
+    board = boards[data["board_id"]]
+    board.version += 1
+    if op == "member_added":
+        boards[data["board_id"]]["members"].add(sys.intern(data["email"]))
+    elif op == "member_removed":
+        boards[data["board_id"]]["members"].discard(data["email"])
+    elif op in ("item_added", "item_restored"):
+        item = data["item"] = Item.from_dict(data["item"])
+        board["items"][item.id] = item
+        board.item_counter = max(board.item_counter, id_number(item.id))
+    elif op == "item_moved":
+        boards[data["board_id"]]["items"][data["item_id"]]["status"] = data["status"]
+    elif op == "comment_added":
+        item = boards[data["board_id"]]["items"][data["item_id"]]
+        comment = data["comment"] = Comment.from_dict(data["comment"])
+        item.comments = (*item.comments, comment)
+    elif op in ("item_deleted", "item_archived"):
+        data["item"] = board["items"].pop(data["item_id"])
+    elif op in ("board_deleted", "board_archived"):
+        data["members"] = sorted(board.members)
+        board.items = {}
+        board.members = set()
+        board.cold = {}
+    elif op == "board_tiered":
+        # Элементы остаются на доске в счётчиках по статусам
+        cold = board.cold = board.cold or {"counts": {}, "segments": []}
+        counts = cold["counts"]
+        for item_id in data["item_ids"]:
+            status = board["items"].pop(item_id)["status"]
+            counts[status] = counts.get(status, 0) + 1
+        for item_id, count in data["comments"].items():
+            item = board["items"][item_id]
+            item.comments = item.comments[count:]
+        cold["segments"].append(data["segment"])
+    elif op == "board_restored":
+        restored = data["board"] = Board.from_dict(data["board"])
+        restored.version = board.version
+        restored.item_counter = max(restored.item_counter, board.item_counter)
+        boards[restored.id] = restored
+    else:
+        raise ValueError(f"Неизвестная операция: {op}")
+
+
+def json_default(obj):
+    """Сериализация значений, которых нет в JSON
+
+    Участники доски - множество, доски и элементы - объекты ``models``,
+    элементы доски из двоичного снимка - ленивое отображение.
+    """
+    if isinstance(obj, set):
+        return sorted(obj)
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def decode_boards(boards: Dict) -> Dict:
+    """Привести доски, прочитанные из JSON, к виду в памяти"""
+    return {board_id: Board.from_dict(board) for board_id, board in boards.items()}
+
+
+def fsync_dir(path: str):
+    """Сбросить на диск запись каталога (переименования в нём)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        # Windows не позволяет открыть каталог как файл
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path: str, data: Dict, indent: Optional[int] = 2):
+    """Записать JSON во временный файл и атомарно заменить им исходный
+
+    Файл сбрасывается на диск до переименования, поэтому после сбоя
+    на месте остаётся либо старая, либо новая версия целиком.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent, default=json_default)
+        metrics.count("bytes_written", f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+def trim_torn_tail(f, block: int = 64 * 1024):
+    """Отрезать недописанную после сбоя строку в конце файла журнала
+
+    Файл открыт для чтения и записи; после вызова позиция стоит в конце.
+    """
+    end = f.seek(0, os.SEEK_END)
+    position = end
+    while position > 0:
+        start = max(0, position - block)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b"\n")
+        if newline >= 0:
+            position = start + newline + 1
+            break
+        position = start
+    if position < end:
+        f.truncate(position)
+        f.seek(position)
+
+
+def read_json(path: str) -> Dict:
+    """Прочитать JSON файл, если он существует"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class JsonStorage:
+    """Все данные в одном JSON файле, каждая запись перезаписывает файл"""
+
+    def __init__(self, data_file: str):
+        self.data_file = data_file
+        self._dirty = False
+        self._lock = FileLock(f"{data_file}.lock")
+        self._signature = None
+
+    def load(self) -> Tuple[Dict, Dict]:
+        """Загрузить пользователей и доски"""
+        self._signature = file_signature(self.data_file)
+        data = read_json(self.data_file)
+        return data.get("users", {}), decode_boards(data.get("boards", {}))
+
+    def lock(self) -> FileLock:
+        """Блокировка для записи между процессами"""
+        return self._lock
+
+    def commit_lock(self) -> FileLock:
+        """Фиксация изменений и запись событий идут под той же блокировкой"""
+        return self._lock
+
+    def changed(self) -> bool:
+        """Изменил ли файл другой процесс после load или нашей записи"""
+        return file_signature(self.data_file) != self._signature
+
+    def read_changes(self) -> Optional[List[Tuple[str, Dict]]]:
+        """Файл перезаписывается целиком: нужна полная перезагрузка"""
+        return None
+
+    def save(self, users: Dict, boards: Dict):
+        """Полностью сохранить пользователей и доски"""
+        write_json_atomic(self.data_file, {
+            "users": users,
+            "boards": boards
+        })
+        self._signature = file_signature(self.data_file)
+        self._dirty = False
+
+    def record(self, op: str, data: Dict, users: Dict, boards: Dict):
+        """Отметить, что данные изменились"""
+        self._dirty = True
+
+    def flush(self, users: Dict, boards: Dict):
+        """Перезаписать файл, если были изменения"""
+        if self._dirty:
+            self.save(users, boards)
+
+    def discard(self):
+        """Забыть несохранённые изменения"""
+        self._dirty = False
+
+    def scrub_passwords(self, users: Dict, boards: Dict):
+        """Файл перезаписывается целиком, прежних паролей в нём не остаётся"""
+
+    def close(self):
+        """Завершить работу с хранилищем"""
+
+
+class JournalStorage:
+    """Снимок в JSON файле плюс журнал изменений в формате JSON Lines.
+
+    Каждая запись дописывает в журнал одну строку, поэтому стоимость
+    записи зависит только от размера изменения. Если при ``flush``
+    накоплено несколько изменений, они пишутся одной строкой ``batch``:
+    недописанная после сбоя строка отбрасывается целиком, так что пакет
+    применяется либо полностью, либо никак. Когда журнал становится
+    больше ``compact_threshold`` байт, он переименовывается в сегмент
+    ``.compacting`` и фоновый поток сворачивает снимок и этот сегмент
+    в новый снимок, не трогая данные в памяти. Номер последней применённой
+    операции хранится в снимке (``journal_seq``), поэтому повторное
+    проигрывание после сбоя не применяет одну операцию дважды.
+
+    Другие процессы дописывают журнал под той же блокировкой; их операции
+    дочитываются с места, до которого журнал уже прочитан. Сворачивать
+    сегмент одновременно может только один процесс (блокировка
+    ``.compact.lock``).
+
+    Формат снимка задают ``read_snapshot`` и ``write_snapshot``
+    (двоичный снимок - в ``snapshot.BinaryJournalStorage``).
+    """
+
+    def __init__(self, data_file: str, compact_threshold: int = 8 * 1024 * 1024,
+                 background: bool = True, fsync: bool = True):
+        self.data_file = data_file
+        self.journal_file = f"{data_file}.journal"
+        self.compacting_file = f"{data_file}.journal.compacting"
+        self.compact_threshold = compact_threshold
+        self.background = background
+        self.fsync = fsync
+        self.seq = 0
+        self._pending: List[str] = []
+        self._journal = None
+        self._journal_size = 0  # Сколько байт журнала уже прочитано или записано
+        self._journal_seen = 0  # Размер журнала, когда мы его последний раз видели
+        self._journal_ino: Optional[int] = None
+        self._snapshot_signature = None
+        self._compactor: Optional[threading.Thread] = None
+        self._lock = FileLock(f"{data_file}.lock")
+        self._compact_lock = FileLock(f"{data_file}.compact.lock")
+
+    def load(self) -> Tuple[Dict, Dict]:
+        """Загрузить снимок и проиграть поверх него журнал"""
+        self.wait_for_compaction()
+        self._close_journal()
+        while True:
+            signature = file_signature(self.data_file)
+            data = self.read_snapshot(self.data_file)
+            users = data.get("users", {})
+            boards = decode_boards(data.get("boards", {}))
+            self.seq = self._replay(self.compacting_file, users, boards,
+                                    data.get("journal_seq", 0))
+            self._journal_ino, self._journal_size, self._journal_seen = None, 0, 0
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    self._journal_ino, self._journal_seen = stat.st_ino, stat.st_size
+                    changes, self._journal_size = self._read_entries(f, self.seq)
+                for change in changes:
+                    apply_change(users, boards, change["op"], change["data"])
+                    self.seq = change["seq"]
+            # Другой процесс мог свернуть журнал, пока мы читали: читаем заново
+            if file_signature(self.data_file) == signature:
+                self._snapshot_signature = signature
+                return users, boards
+
+    @staticmethod
+    def read_snapshot(path: str) -> Dict:
+        """Прочитать снимок: словарь с ``users``, ``boards`` и ``journal_seq``"""
+        return read_json(path)
+
+    @staticmethod
+    def write_snapshot(path: str, users: Dict, boards: Dict, seq: int):
+        """Атомарно записать снимок"""
+        write_json_atomic(path, {
+            "users": users,
+            "boards": boards,
+            "journal_seq": seq
+        })
+
+    @staticmethod
+    def _read_entries(f, seq: int) -> Tuple[List[Dict], int]:
+        """Прочитать операции с номером больше ``seq`` из открытого журнала
+
+        Возвращает операции и количество байт в прочитанных целых строках.
+        Чтение останавливается на недописанной строке: её ещё пишет
+        другой процесс или она осталась после аварийного завершения.
+        """
+        changes = []
+        consumed = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            consumed += len(line)
+            for change in entry.get("batch", [entry]):
+                if change["seq"] > seq:
+                    changes.append(change)
+                    seq = change["seq"]
+        return changes, consumed
+
+    @classmethod
+    def _replay(cls, path: str, users: Dict, boards: Dict, seq: int) -> int:
+        """Применить операции из журнала с номером больше ``seq``"""
+        if not os.path.exists(path):
+            return seq
+        with open(path, 'rb') as f:
+            changes, _ = cls._read_entries(f, seq)
+        for change in changes:
+            apply_change(users, boards, change["op"], change["data"])
+            seq = change["seq"]
+        return seq
+
+    def lock(self) -> FileLock:
+        """Блокировка для записи между процессами"""
+        return self._lock
+
+    def commit_lock(self) -> FileLock:
+        """Фиксация изменений и запись событий идут под той же блокировкой"""
+        return self._lock
+
+    def _journal_state(self) -> Tuple[Optional[int], int]:
+        signature = file_signature(self.journal_file)
+        return (None, 0) if signature is None else (signature[0], signature[1])
+
+    def changed(self) -> bool:
+        """Изменил ли другой процесс снимок или журнал"""
+        return (file_signature(self.data_file) != self._snapshot_signature
+                or self._journal_state() != (self._journal_ino, self._journal_seen))
+
+    def read_changes(self) -> Optional[List[Tuple[str, Dict]]]:
+        """Дочитать операции, которые другие процессы дописали в журнал
+
+        Если снимок перезаписан или журнал заменён новым, дочитать
+        нельзя и возвращается None.
+        """
+        if file_signature(self.data_file) != self._snapshot_signature:
+            return None
+        ino, size = self._journal_state()
+        if ino != self._journal_ino:
+            return None
+        if size == self._journal_seen:
+            return []
+        with open(self.journal_file, 'rb') as f:
+            self._journal_seen = os.fstat(f.fileno()).st_size
+            f.seek(self._journal_size)
+            changes, consumed = self._read_entries(f, self.seq)
+        self._journal_size += consumed
+        if changes:
+            self.seq = changes[-1]["seq"]
+        return [(change["op"], change["data"]) for change in changes]
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+            self._journal_ino = os.fstat(self._journal.fileno()).st_ino
+            if self._journal.tell() > self._journal_size:
+                # Хвост недописанной строки после аварийного завершения
+                self._journal.truncate(self._journal_size)
+                self._journal.seek(self._journal_size)
+            self._journal_seen = self._journal_size
+        return self._journal
+
+    def record(self, op: str, data: Dict, users: Dict, boards: Dict):
+        """Подготовить строку журнала для операции"""
+        self.seq += 1
+        # Сериализуем сразу: объекты в data могут измениться до flush
+        self._pending.append(json.dumps({"seq": self.seq, "op": op, "data": data},
+                                        ensure_ascii=False, separators=(',', ':'),
+                                        default=json_default))
+
+    def flush(self, users: Dict, boards: Dict):
+        """Дописать накопленные операции в журнал одной строкой"""
+        if not self._pending:
+            return
+        if len(self._pending) == 1:
+            line = self._pending[0] + "\n"
+        else:
+            line = '{"batch":[' + ",".join(self._pending) + ']}\n'
+        self._pending = []
+        journal = self._open_journal()
+        line = line.encode('utf-8')
+        journal.write(line)
+        metrics.count("bytes_written", len(line))
+        journal.flush()
+        if self.fsync:
+            os.fsync(journal.fileno())
+        self._journal_size += len(line)
+        self._journal_seen = self._journal_size
+        if self._journal_size >= self.compact_threshold:
+            self.compact()
+
+    def discard(self):
+        """Забыть операции, ещё не записанные в журнал"""
+        self.seq -= len(self._pending)
+        self._pending = []
+
+    def save(self, users: Dict, boards: Dict):
+        """Записать полный снимок и очистить журнал"""
+        self.wait_for_compaction()
+        self._close_journal()
+        self._pending = []
+        with self._compact_lock:
+            self.write_snapshot(self.data_file, users, boards, self.seq)
+            for path in (self.compacting_file, self.journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._snapshot_signature = file_signature(self.data_file)
+        self._journal_ino, self._journal_size, self._journal_seen = None, 0, 0
+
+    def scrub_passwords(self, users: Dict, boards: Dict):
+        """Записать снимок, чтобы прежние пароли не остались в журнале"""
+        self.save(users, boards)
+
+    def compact(self):
+        """Свернуть накопленный журнал в снимок"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        if not self._compact_lock.acquire(blocking=False):
+            # Сегмент сворачивает другой процесс
+            return
+        try:
+            self._close_journal()
+            if not os.path.exists(self.journal_file):
+                return
+            # Предыдущий сегмент мог остаться после сбоя: сначала сворачиваем его
+            if os.path.exists(self.compacting_file):
+                self._compact_segment()
+            os.replace(self.journal_file, self.compacting_file)
+            self._journal_ino, self._journal_size, self._journal_seen = None, 0, 0
+        finally:
+            self._compact_lock.release()
+        if self.background:
+            self._compactor = threading.Thread(target=self._compact_segment,
+                                               name="pymonday-compactor",
+                                               daemon=True)
+            self._compactor.start()
+        else:
+            self._compact_segment()
+
+    def _compact_segment(self):
+        """Проиграть сегмент поверх снимка на диске и записать новый снимок"""
+        with self._compact_lock:
+            # Сегмент мог уже свернуть другой процесс
+            if not os.path.exists(self.compacting_file):
+                return
+            known = file_signature(self.data_file) == self._snapshot_signature
+            data = self.read_snapshot(self.data_file)
+            users = data.get("users", {})
+            boards = decode_boards(data.get("boards", {}))
+            seq = self._replay(self.compacting_file, users, boards,
+                               data.get("journal_seq", 0))
+            self.write_snapshot(self.data_file, users, boards, seq)
+            os.remove(self.compacting_file)
+            if known:
+                # Содержимое не изменилось, перечитывать снимок не нужно
+                self._snapshot_signature = file_signature(self.data_file)
+
+    def wait_for_compaction(self):
+        """Дождаться завершения фонового сворачивания"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        """Закрыть журнал и дождаться фоновых операций"""
+        self.wait_for_compaction()
+        self._close_journal()
+
+
+STORAGE_BACKENDS = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+}
+
+
+def open_storage(kind: str, data_file: str):
+    """Создать хранилище по его имени"""
+    if kind == "sqlite":
+        from pymonday.sqlite_storage import SqliteStorage
+        db_file = os.path.splitext(data_file)[0] + ".db"
+        return SqliteStorage(db_file, json_file=data_file)
+    if kind == "binary":
+        from pymonday.snapshot import BinaryJournalStorage
+        snapshot_file = os.path.splitext(data_file)[0] + ".snap"
+        return BinaryJournalStorage(snapshot_file, json_file=data_file)
+    if kind == "sharded":
+        from pymonday.sharded_storage import ShardedStorage
+        data_dir = os.path.splitext(data_file)[0]
+        return ShardedStorage(data_dir, json_file=data_file)
+    try:
+        backend = STORAGE_BACKENDS[kind]
+    except KeyError:
+        raise ValueError(f"Неизвестное хранилище: {kind}")
+    return backend(data_file)
@@ -0,0 +1,846 @@
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from pymonday import cli, instrumentation
+from pymonday.archive import COMPRESSORS, TieringPolicy
+from pymonday.auth import SCHEMES, PasswordHasher
+from pymonday.instrumentation import timed
+from pymonday.service import PAGE_SIZE, TrackerService, TrackerError
+
+
+SEARCH_LIMIT = 50  # Сколько результатов поиска показывать
+
+
+class PyMonday:
+    def __init__(self, data_file="pymonday_data.json", storage="journal",
+                 flush_interval=None, page_size=PAGE_SIZE, tiering=None, hasher=None):
+        """Инициализация системы PyMonday
+
+        Все операции выполняет TrackerService, а PyMonday только
+        спрашивает пользователя и печатает результат.
+        page_size - сколько элементов колонки показывать на странице доски
+        tiering - политика холодных данных (TieringPolicy) или None
+        hasher - хеширование паролей (PasswordHasher) или None
+
+        Данные загружаются в фоновом потоке, чтобы меню появилось сразу;
+        первое обращение к self.service дожидается конца загрузки.
+        """
+        self.current_user = None
+        self.page_size = page_size
+        self._service = None
+        self._load_error = None
+        self._demo_created = False
+        self._loader = threading.Thread(
+            target=self._load, args=(data_file, storage, flush_interval, tiering, hasher),
+            daemon=True)
+        self._loader.start()
+
+    def _load(self, data_file, storage, flush_interval, tiering, hasher):
+        """Загрузка данных (в фоновом потоке)"""
+        try:
+            service = TrackerService(data_file, storage=storage, flush_interval=flush_interval,
+                                     tiering=tiering, hasher=hasher)
+            # Создадим тестовые данные, если система пустая
+            if not service.users and not service.boards:
+                create_demo_data(service)
+                self._demo_created = True
+            self._service = service
+        except BaseException as e:
+            self._load_error = e
+
+    @property
+    def service(self) -> TrackerService:
+        """Сервис с загруженными данными"""
+        if self._service is None:
+            self._loader.join()
+            if self._load_error is not None:
+                raise self._load_error
+            if self._demo_created:
+                print("\nДобро пожаловать в PyMonday!")
+                print("Похоже, это ваш первый запуск: созданы тестовые данные для демонстрации.")
+                print("Вы можете войти с email: demo@example.com, пароль: demo123")
+        return self._service
+
+    @property
+    def users(self):
+        return self.service.users
+
+    @property
+    def boards(self):
+        return self.service.boards
+
+    def save_data(self):
+        """Полное сохранение данных в хранилище"""
+        self.service.save_data()
+
+    def close(self):
+        """Завершение работы с хранилищем"""
+        self._loader.join()
+        if self._service is not None:
+            self._service.close()
+
+    def register_user(self):
+        """Регистрация нового пользователя"""
+        print("\n=== РЕГИСТРАЦИЯ ===")
+        email = input("Email: ").strip()
+
+        if email in self.users:
+            print("Пользователь с таким email уже существует!")
+            return
+
+        name = input("Имя: ").strip()
+        password = input("Пароль: ").strip()
+
+        try:
+            self.service.register_user(email, name, password)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Пользователь {name} успешно зарегистрирован!")
+
+    def login(self):
+        """Вход в систему"""
+        print("\n=== ВХОД ===")
+        # Дожидаемся загрузки данных до вопросов
+        service = self.service
+        email = input("Email: ").strip()
+        password = input("Пароль: ").strip()
+
+        try:
+            user = service.authenticate(email, password)
+        except TrackerError as e:
+            print(e)
+            return False
+        self.current_user = email
+        print(f"Добро пожаловать, {user['name']}!")
+        return True
+
+    def logout(self):
+        """Выход из системы"""
+        self.current_user = None
+        print("Вы вышли из системы.")
+
+    def create_board(self):
+        """Создание новой доски"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        print("\n=== СОЗДАНИЕ ДОСКИ ===")
+        board_name = input("Название доски: ").strip()
+        try:
+            self.service.create_board(self.current_user, board_name)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Доска '{board_name}' создана!")
+
+    @timed
+    def list_boards(self):
+        """Показать все доски пользователя"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        print("\n=== ВАШИ ДОСКИ ===")
+        user_boards = self.service.list_boards(self.current_user)
+
+        if not user_boards:
+            print("У вас нет досок. Создайте первую!")
+            return user_boards
+
+        for i, board in enumerate(user_boards, 1):
+            items_count = board["items_count"]
+            print(f"{i}. {board['name']} (ID: {board['id']})")
+            print(f"   Элементов: {items_count}, Участников: {len(board['members'])}")
+            print(f"   Создана: {board['created_at'][:10]}")
+
+        return user_boards
+
+    def _choose_board(self, prompt):
+        """Показать доски и спросить номер; вернуть id доски или None"""
+        user_boards = self.list_boards()
+        board_num = input(prompt).strip()
+
+        try:
+            board_index = int(board_num) - 1
+        except ValueError:
+            print("Введите номер!")
+            return None
+        if not 0 <= board_index < len(user_boards):
+            print("Неверный номер доски!")
+            return None
+        return user_boards[board_index]["id"]
+
+    def _choose_column(self, columns, prompt):
+        """Показать колонки и спросить номер; вернуть колонку или None"""
+        for i, col in enumerate(columns, 1):
+            print(f"{i}. {col}")
+
+        try:
+            col_index = int(input(prompt).strip()) - 1
+        except ValueError:
+            print("Введите номер колонки!")
+            return None
+        if not 0 <= col_index < len(columns):
+            print("Неверный номер колонки!")
+            return None
+        return columns[col_index]
+
+    def _choose_item(self, items, show_status=False):
+        """Показать элементы и спросить номер; вернуть id элемента или None"""
+        if not items:
+            print("На экране нет элементов!")
+            return None
+
+        lines = ["\nДоступные элементы:"]
+        for i, item in enumerate(items, 1):
+            if show_status:
+                lines.append(f"{i}. {item['name']} (текущий статус: {item['status']})")
+            else:
+                lines.append(f"{i}. {item['name']}")
+        self._write(lines)
+
+        try:
+            item_choice = int(input("Выберите элемент (номер): ").strip()) - 1
+        except ValueError:
+            print("Введите номер!")
+            return None
+        if not 0 <= item_choice < len(items):
+            print("Неверный номер элемента!")
+            return None
+        return items[item_choice]["id"]
+
+    @staticmethod
+    def _write(lines):
+        """Вывести строки одной записью в терминал"""
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    def add_item_to_board(self):
+        """Добавление элемента на доску"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        board_id = self._choose_board("\nВыберите номер доски: ")
+        if board_id is not None:
+            self._add_item_to_specific_board(board_id)
+
+    def view_board(self):
+        """Просмотр содержимого доски"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        board_id = self._choose_board("\nВыберите номер доски для просмотра: ")
+        if board_id is None:
+            return
+
+        # Номер показываемой страницы каждой колонки и колонка, которую листают
+        pages = {}
+        view = self.service.board_page(self.current_user, board_id, pages, self.page_size)
+        active = next((column for column, page in view["columns"].items() if page["total"]),
+                      next(iter(view["columns"]), None))
+        self._print_board(view, active)
+
+        # Меню действий с доской
+        while True:
+            # Доску мог изменить другой процесс: тогда показываем её заново
+            if self.service.refresh():
+                try:
+                    fresh = self.service.board_page(self.current_user, board_id, pages,
+                                                    self.page_size)
+                except TrackerError as e:
+                    print(e)
+                    break
+                if fresh["board"]["version"] != view["board"]["version"]:
+                    print("\nДоска изменена другим пользователем.")
+                    view = fresh
+                    self._print_board(view, active)
+
+            self._write([
+                "\nДействия с доской:",
+                "1. Добавить элемент",
+                "2. Переместить элемент",
+                "3. Добавить комментарий",
+                "4. Пригласить участника",
+                "5. Покинуть доску",
+                "6. Вернуться в главное меню",
+                "7. Перенести элемент в архив",
+                "8. Удалить элемент",
+                "9. Архив элементов доски",
+                "a/d. Перенести доску в архив/удалить доску",
+                f"n/p. Следующая/предыдущая страница колонки '{active}'",
+                "g. Перейти к странице",
+                "c. Выбрать колонку для листания",
+            ])
+
+            action = input("Выберите действие: ").strip().lower()
+            visible = [item for page in view["columns"].values() for item in page["items"]]
+
+            if action == "1":
+                self._add_item_to_specific_board(board_id)
+            elif action == "2":
+                self._move_item(board_id, visible)
+            elif action == "3":
+                self._add_comment(board_id, visible)
+            elif action == "4":
+                self._add_member(board_id)
+            elif action == "5":
+                if self._leave_board(board_id):
+                    break
+            elif action == "6":
+                break
+            elif action == "7":
+                self._archive_item(board_id, visible)
+            elif action == "8":
+                self._delete_item(board_id, visible)
+            elif action == "9":
+                self._restore_item(board_id)
+            elif action in ("a", "d"):
+                if self._remove_board(board_id, archive=action == "a"):
+                    break
+            elif action in ("n", "p", "g") and active is not None:
+                column = view["columns"][active]
+                if action == "g":
+                    try:
+                        page = int(input(f"Номер страницы (1-{column['pages']}): ").strip()) - 1
+                    except ValueError:
+                        print("Введите номер!")
+                        continue
+                else:
+                    page = column["page"] + (1 if action == "n" else -1)
+                if not 0 <= page < column["pages"]:
+                    print("Такой страницы нет!")
+                    continue
+                pages[active] = page
+                view = self.service.board_page(self.current_user, board_id, pages,
+                                               self.page_size)
+                self._print_board(view, active)
+                continue
+            elif action == "c":
+                column = self._choose_column(list(view["columns"]), "Выберите колонку (номер): ")
+                if column is not None:
+                    active = column
+                continue
+            else:
+                print("Неверный выбор!")
+                continue
+            # Элементы на экране могли измениться
+            view = self.service.board_page(self.current_user, board_id, pages, self.page_size)
+
+    @timed
+    def _print_board(self, view, active=None):
+        """Показать доску: по одной странице элементов каждой колонки"""
+        board = view["board"]
+        names = {}
+
+        def user_name(email):
+            if email not in names:
+                names[email] = self.service.user_name(email)
+            return names[email]
+
+        lines = [
+            f"\n=== ДОСКА: {board['name']} ===",
+            f"Владелец: {user_name(board['owner'])}",
+            f"Участники: {', '.join(sorted(user_name(m) for m in board['members']))}",
+        ]
+
+        # Выводим колонки с элементами
+        for column, page in view["columns"].items():
+            title = f"\n--- {column} ---"
+            if page["pages"] > 1:
+                first = page["page"] * self.page_size + 1
+                last = first + len(page["items"]) - 1
+                title = (f"\n--- {column} (стр. {page['page'] + 1}/{page['pages']}, "
+                         f"элементы {first}-{last} из {page['total']}) ---")
+            if column == active and len(view["columns"]) > 1:
+                title += " *"
+            lines.append(title)
+
+            if not page["items"]:
+                lines.append("  (пусто)")
+            for item in page["items"]:
+                lines.append(f"  • {item['name']}")
+                lines.append(f"    ID: {item['id']}, Назначено: {user_name(item['assigned_to'])}")
+                if item["description"]:
+                    lines.append(f"    Описание: {item['description'][:50]}...")
+                lines.append(f"    Создано: {item['created_at'][:10]}")
+        self._write(lines)
+
+    def _add_item_to_specific_board(self, board_id):
+        """Добавить элемент в конкретную доску"""
+        try:
+            board = self.service.get_board(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return
+
+        print(f"\nДобавление элемента в доску '{board['name']}'")
+        item_name = input("Название элемента: ").strip()
+        item_desc = input("Описание: ").strip()
+
+        print("Доступные колонки:")
+        status = self._choose_column(board["columns"], "Выберите колонку (номер): ")
+        if status is None:
+            return
+
+        try:
+            self.service.add_item(self.current_user, board_id, item_name, item_desc, status)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Элемент '{item_name}' добавлен в колонку '{status}'!")
+
+    def _move_item(self, board_id, items):
+        """Переместить один из показанных элементов в другую колонку"""
+        try:
+            board = self.service.get_board(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return
+
+        item_id = self._choose_item(items, show_status=True)
+        if item_id is None:
+            return
+
+        print("\nДоступные колонки:")
+        new_status = self._choose_column(board["columns"], "Выберите новую колонку (номер): ")
+        if new_status is None:
+            return
+
+        try:
+            self.service.move_item(self.current_user, board_id, item_id, new_status)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Элемент перемещен в колонку '{new_status}'!")
+
+    def _add_comment(self, board_id, items):
+        """Добавить комментарий к одному из показанных элементов"""
+        item_id = self._choose_item(items)
+        if item_id is None:
+            return
+
+        comment_text = input("Введите комментарий: ").strip()
+        try:
+            self.service.add_comment(self.current_user, board_id, item_id, comment_text)
+        except TrackerError as e:
+            print(e)
+            return
+        print("Комментарий добавлен!")
+
+    def _add_member(self, board_id):
+        """Пригласить пользователя на доску"""
+        email = input("Email участника: ").strip()
+
+        try:
+            self.service.add_member(self.current_user, board_id, email)
+        except TrackerError as e:
+            print(e)
+            return
+        board = self.service.get_board(self.current_user, board_id)
+        print(f"{self.service.user_name(email)} добавлен(а) на доску '{board['name']}'!")
+
+    def _leave_board(self, board_id):
+        """Покинуть доску"""
+        try:
+            board = self.service.get_board(self.current_user, board_id)
+            self.service.leave_board(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return False
+        print(f"Вы покинули доску '{board['name']}'.")
+        return True
+
+    def _archive_item(self, board_id, items):
+        """Перенести один из показанных элементов в архив"""
+        item_id = self._choose_item(items)
+        if item_id is None:
+            return
+
+        try:
+            item = self.service.archive_item(self.current_user, board_id, item_id)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Элемент '{item['name']}' перенесён в архив.")
+
+    def _delete_item(self, board_id, items):
+        """Удалить один из показанных элементов"""
+        item_id = self._choose_item(items)
+        if item_id is None:
+            return
+
+        answer = input("Удалить элемент без возможности восстановления? (да/нет): ")
+        if answer.strip().lower() != "да":
+            print("Удаление отменено.")
+            return
+        try:
+            self.service.delete_item(self.current_user, board_id, item_id)
+        except TrackerError as e:
+            print(e)
+            return
+        print("Элемент удалён.")
+
+    def _restore_item(self, board_id):
+        """Показать архив элементов доски и вернуть элемент на доску"""
+        try:
+            items = self.service.archived_items(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return
+        if not items:
+            print("В архиве доски нет элементов.")
+            return
+
+        print("\n=== АРХИВ ЭЛЕМЕНТОВ ===")
+        item_id = self._choose_item(items, show_status=True)
+        if item_id is None:
+            return
+        try:
+            item = self.service.restore_item(self.current_user, board_id, item_id)
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Элемент '{item['name']}' возвращён в колонку '{item['status']}'!")
+
+    def _remove_board(self, board_id, archive):
+        """Перенести доску в архив или удалить её; True, если доска убрана"""
+        try:
+            board = self.service.get_board(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return False
+        if not archive:
+            answer = input(f"Удалить доску '{board['name']}' со всеми элементами "
+                           "без возможности восстановления? (да/нет): ")
+            if answer.strip().lower() != "да":
+                print("Удаление отменено.")
+                return False
+
+        try:
+            if archive:
+                self.service.archive_board(self.current_user, board_id)
+            else:
+                self.service.delete_board(self.current_user, board_id)
+        except TrackerError as e:
+            print(e)
+            return False
+        print(f"Доска '{board['name']}' {'перенесена в архив' if archive else 'удалена'}.")
+        return True
+
+    def archived_boards(self):
+        """Показать архив досок и вернуть доску из него"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        print("\n=== АРХИВ ДОСОК ===")
+        boards = self.service.archived_boards(self.current_user)
+        if not boards:
+            print("В архиве нет ваших досок.")
+            return
+        for i, board in enumerate(boards, 1):
+            print(f"{i}. {board['name']} (ID: {board['id']}, элементов: {len(board['items'])})")
+
+        choice = input("Номер доски для восстановления (Enter - назад): ").strip()
+        if not choice:
+            return
+        try:
+            board_index = int(choice) - 1
+        except ValueError:
+            print("Введите номер!")
+            return
+        if not 0 <= board_index < len(boards):
+            print("Неверный номер доски!")
+            return
+        try:
+            board = self.service.restore_board(self.current_user, boards[board_index]["id"])
+        except TrackerError as e:
+            print(e)
+            return
+        print(f"Доска '{board['name']}' восстановлена!")
+
+    def search_items(self):
+        """Поиск элементов по названию"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        search_term = input("Введите текст для поиска: ").strip().lower()
+        self._print_search_results(search_term)
+
+    @timed
+    def _print_search_results(self, search_term):
+        """Найти элементы и показать результаты поиска"""
+        found_items = self.service.search(self.current_user, search_term,
+                                          limit=SEARCH_LIMIT + 1)
+
+        print(f"\n=== РЕЗУЛЬТАТЫ ПОИСКА: '{search_term}' ===")
+        if found_items:
+            for result in found_items[:SEARCH_LIMIT]:
+                item = result["item"]
+                print(f"Доска: {result['board']}")
+                print(f"Элемент: {item['name']}")
+                print(f"Статус: {item['status']}")
+                print(f"Описание: {item['description'][:100]}...")
+                print("-" * 40)
+            if len(found_items) > SEARCH_LIMIT:
+                print(f"Показаны первые {SEARCH_LIMIT} результатов, уточните запрос.")
+        else:
+            print("Ничего не найдено.")
+
+    @timed
+    def dashboard(self):
+        """Панель управления с общей статистикой"""
+        if not self.current_user:
+            print("Сначала войдите в систему!")
+            return
+
+        print("\n=== ПАНЕЛЬ УПРАВЛЕНИЯ ===")
+
+        # Статистика
+        stats = self.service.dashboard_stats(self.current_user)
+
+        print(f"Количество досок: {stats['boards_count']}")
+        print(f"Всего элементов: {stats['total_items']}")
+        print("\nЭлементы по статусам:")
+        for status, count in stats["items_by_status"].items():
+            print(f"  {status}: {count}")
+
+        # Недавние элементы
+        print("\n=== ПОСЛЕДНИЕ ЭЛЕМЕНТЫ ===")
+        for i, entry in enumerate(stats["recent_items"], 1):
+            item = entry["item"]
+            print(f"{i}. {item['name']} (Доска: {entry['board']})")
+            print(f"   Статус: {item['status']}, Создано: {item['created_at'][:10]}")
+
+    def stats(self):
+        """Статистика замеров и выгрузка её в файл"""
+        print("\n=== СТАТИСТИКА РАБОТЫ ===")
+        if not instrumentation.metrics.enabled:
+            print("Замеры выключены: запустите программу с флагом --instrument "
+                  f"или переменной {instrumentation.INSTRUMENT_ENV}=1.")
+            return
+        print(instrumentation.format_report(instrumentation.metrics.report()))
+
+        path = input("\nФайл для выгрузки (.json или .prom, Enter - пропустить): ").strip()
+        if path:
+            try:
+                fmt = instrumentation.metrics.export(path)
+            except OSError as e:
+                print(f"Не удалось сохранить: {e}")
+                return
+            print(f"Статистика сохранена в {path} ({fmt}).")
+
+    def main_menu(self):
+        """Главное меню системы"""
+        while True:
+            # Подхватываем изменения, сделанные другими процессами
+            # (пока данные ещё загружаются, они и так будут свежими)
+            if self._service is not None:
+                self.service.refresh()
+            print("\n" + "="*50)
+            print("PYMONDAY - Система управления задачами")
+            print("="*50)
+
+            if self.current_user:
+                user_name = self.service.user_name(self.current_user)
+                print(f"Вы вошли как: {user_name}")
+                print("\nГлавное меню:")
+                print("1. Просмотреть все доски")
+                print("2. Создать новую доску")
+                print("3. Просмотреть доску")
+                print("4. Поиск элементов")
+                print("5. Панель управления (Dashboard)")
+                print("6. Выйти из системы")
+                print("7. Статистика работы")
+                print("8. Архив досок")
+                print("0. Выход из программы")
+            else:
+                print("\n1. Вход в систему")
+                print("2. Регистрация")
+                print("0. Выход")
+
+            choice = input("\nВыберите действие: ").strip()
+
+            if not self.current_user:
+                # Меню для неавторизованного пользователя
+                if choice == "1":
+                    if self.login():
+                        continue
+                elif choice == "2":
+                    self.register_user()
+                elif choice == "0":
+                    print("До свидания!")
+                    break
+                else:
+                    print("Неверный выбор!")
+
+            else:
+                # Меню для авторизованного пользователя
+                if choice == "1":
+                    self.list_boards()
+                elif choice == "2":
+                    self.create_board()
+                elif choice == "3":
+                    self.view_board()
+                elif choice == "4":
+                    self.search_items()
+                elif choice == "5":
+                    self.dashboard()
+                elif choice == "6":
+                    self.logout()
+                elif choice == "7":
+                    self.stats()
+                elif choice == "8":
+                    self.archived_boards()
+                elif choice == "0":
+                    print("До свидания!")
+                    break
+                else:
+                    print("Неверный выбор!")
+
+
+def create_demo_data(service):
+    """Тестовые данные для первого запуска"""
+    email = "demo@example.com"
+    with service.transaction():
+        service.register_user(email, "Демо Пользователь", "demo123")
+        board_id = service.create_board(email, "Мой первый проект")["id"]
+        item = service.add_item(email, board_id, "Изучить Python",
+                                "Пройти курс по основам Python", "In Progress")
+        service.add_comment(email, board_id, item["id"], "Начал изучение!")
+        service.add_item(email, board_id, "Создать проект", "Разработать консольное приложение")
+
+
+def positive_int(value):
+    """Целое число не меньше 1 для аргументов командной строки"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается целое число больше нуля: {value}")
+    return number
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="PyMonday - система управления задачами")
+    parser.add_argument("--data-file", default="pymonday_data.json",
+                        help="файл с данными (для SQLite рядом создаётся файл .db, "
+                             "для binary - .snap, для sharded - каталог с тем же именем)")
+    parser.add_argument("--storage", default="journal",
+                        choices=["journal", "json", "binary", "sqlite", "sharded"],
+                        help="способ хранения данных")
+    parser.add_argument("--flush-interval", type=float, default=None, metavar="SECONDS",
+                        help="копить изменения и записывать их не чаще, чем раз в SECONDS")
+    parser.add_argument("--page-size", type=positive_int, default=PAGE_SIZE, metavar="N",
+                        help="сколько элементов колонки показывать на странице доски")
+    parser.add_argument("--cold-done-days", type=float, default=None, metavar="DAYS",
+                        help="переносить в холодные сегменты элементы последней колонки "
+                             "без активности дольше DAYS дней")
+    parser.add_argument("--cold-comment-days", type=float, default=None, metavar="DAYS",
+                        help="переносить в холодные сегменты комментарии старше DAYS дней")
+    parser.add_argument("--cold-compression", choices=sorted(COMPRESSORS), default="zlib",
+                        help="сжатие холодных сегментов")
+    parser.add_argument("--kdf", choices=SCHEMES, default=None,
+                        help="хеширование паролей (по умолчанию - scrypt, если доступен)")
+    parser.add_argument("--kdf-cost", type=int, default=None, metavar="N",
+                        help="стоимость хеширования: N для scrypt (степень двойки) "
+                             "или число итераций PBKDF2")
+    parser.add_argument("--instrument", action="store_true",
+                        help="замерять задержки операций и считать записанные байты "
+                             f"(или {instrumentation.INSTRUMENT_ENV}=1)")
+    parser.add_argument("--profile", choices=instrumentation.PROFILERS,
+                        default=instrumentation.profiler_from_env(),
+                        help="профилировать всю работу программы "
+                             f"(или {instrumentation.PROFILE_ENV}=cprofile)")
+
+    cli.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.profile is not None and args.profile not in instrumentation.PROFILERS:
+        parser.error(f"{instrumentation.PROFILE_ENV}: неизвестный профилировщик {args.profile}")
+    try:
+        password_hasher(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def install_signal_handlers():
+    """Завершать программу штатно по сигналам, чтобы сработал app.close()"""
+    def handle_signal(signum, frame):
+        raise SystemExit(128 + signum)
+
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handle_signal)
+
+
+def main(argv=None):
+    """Основная функция запуска программы"""
+    args = parse_args(argv)
+    install_signal_handlers()
+    # Предупреждения сервиса (сбой загрузки, отменённые изменения) - в stderr
+    logging.basicConfig(format="%(message)s")
+    if args.instrument:
+        instrumentation.metrics.enabled = True
+
+    profiler = None
+    if args.profile:
+        profiler = instrumentation.Profiler(args.profile)
+        profiler.start()
+    try:
+        run(args)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+
+def tiering_policy(args):
+    """Политика холодных данных из аргументов (None, если правила не заданы)"""
+    if args.cold_done_days is None and args.cold_comment_days is None:
+        return None
+    return TieringPolicy(done_days=args.cold_done_days, comment_days=args.cold_comment_days,
+                         compression=args.cold_compression)
+
+
+def password_hasher(args):
+    """Хеширование паролей из аргументов"""
+    if args.kdf is None:
+        return PasswordHasher(cost=args.kdf_cost)
+    return PasswordHasher(args.kdf, args.kdf_cost)
+
+
+def run(args):
+    """Выполнить команду или запустить интерактивное меню"""
+    if args.command:
+        service = TrackerService(args.data_file, storage=args.storage,
+                                 flush_interval=args.flush_interval,
+                                 tiering=tiering_policy(args), hasher=password_hasher(args))
+        try:
+            code = cli.run_command(service, args)
+        finally:
+            service.close()
+        sys.exit(code)
+
+    app = PyMonday(args.data_file, storage=args.storage,
+                   flush_interval=args.flush_interval, page_size=args.page_size,
+                   tiering=tiering_policy(args), hasher=password_hasher(args))
+
+    # Запускаем главное меню
+    try:
+        app.main_menu()
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Пароли: пересчёт при входе и удаление открытого текста из файлов"""
+import json
+
+import pytest
+
+from pymonday.auth import PasswordHasher, hash_params, verify_password
+from pymonday.service import TrackerError, TrackerService
+
+STORAGES = ["journal", "json", "binary", "sqlite", "sharded"]
+EMAIL = "ivan@example.com"
+PLAINTEXT = "plain-secret-42"
+
+
+def files_with(directory, needle: bytes):
+    return sorted(str(path.relative_to(directory)) for path in directory.rglob("*")
+                  if path.is_file() and needle in path.read_bytes())
+
+
+def write_legacy(data_file, journal: bool):
+    # Данные прежней версии: пароли открытым текстом, второй пользователь - в журнале
+    users = {EMAIL: {"name": "Иван", "password": PLAINTEXT,
+                     "created_at": "2024-01-01T00:00:00"}}
+    petr = {"name": "Пётр", "password": "petr-plain", "created_at": "2024-01-01T00:00:00"}
+    if journal:
+        entry = {"seq": 1, "op": "user_registered",
+                 "data": {"email": "petr@example.com", "user": petr}}
+        (data_file.parent / f"{data_file.name}.journal").write_text(
+            json.dumps(entry) + "\n", encoding="utf-8")
+    else:
+        users["petr@example.com"] = petr
+    data_file.write_text(json.dumps({"users": users, "boards": {}}), encoding="utf-8")
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_rehash_removes_plaintext_from_files(tmp_path, storage):
+    data_file = tmp_path / "data.json"
+    write_legacy(data_file, journal=storage in ("journal", "binary"))
+    hasher = PasswordHasher("pbkdf2", 1000)
+    service = TrackerService(str(data_file), storage=storage, hasher=hasher)
+    assert files_with(tmp_path, PLAINTEXT.encode())
+
+    user = service.authenticate(EMAIL, PLAINTEXT)
+    assert hash_params(user["password"]) == ("pbkdf2", 1000)
+    # Проверяется до close: файлы должны быть чистыми сразу после входа
+    assert files_with(tmp_path, PLAINTEXT.encode()) == []
+    # Пароль другого пользователя пересчитывается при его входе
+    assert service.authenticate("petr@example.com", "petr-plain")
+    assert files_with(tmp_path, b"petr-plain") == []
+    service.close()
+
+    service = TrackerService(str(data_file), storage=storage, hasher=hasher)
+    assert verify_password(service.users[EMAIL]["password"], PLAINTEXT)
+    service.close()
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_password_with_old_cost_is_rehashed_on_login(tmp_path, storage):
+    data_file = tmp_path / "data.json"
+    service = TrackerService(str(data_file), storage=storage,
+                             hasher=PasswordHasher("pbkdf2", 1000))
+    service.register_user(EMAIL, "Иван", PLAINTEXT)
+    old = service.users[EMAIL]["password"]
+    service.close()
+
+    service = TrackerService(str(data_file), storage=storage,
+                             hasher=PasswordHasher("pbkdf2", 2000))
+    with pytest.raises(TrackerError):
+        service.authenticate(EMAIL, "wrong")
+    assert service.users[EMAIL]["password"] == old
+    service.authenticate(EMAIL, PLAINTEXT)
+    assert hash_params(service.users[EMAIL]["password"]) == ("pbkdf2", 2000)
+    service.close()
+
+    service = TrackerService(str(data_file), storage=storage,
+                             hasher=PasswordHasher("pbkdf2", 2000))
+    stored = service.users[EMAIL]["password"]
+    assert hash_params(stored) == ("pbkdf2", 2000) and verify_password(stored, PLAINTEXT)
+    # Хеш с текущей стоимостью не пересчитывается
+    service.authenticate(EMAIL, PLAINTEXT)
+    assert service.users[EMAIL]["password"] == stored
+    service.close()
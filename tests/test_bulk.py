@@ -0,0 +1,128 @@
+"""Массовый импорт и экспорт"""
+import io
+import json
+from datetime import datetime, timedelta
+
+from pymonday.archive import TieringPolicy
+from pymonday.auth import PasswordHasher, hash_params
+from pymonday.bulk import export_file, import_file, import_records, read_records
+from pymonday.service import TrackerService
+
+
+def open_service(data_file):
+    return TrackerService(str(data_file), hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def import_lines(service, *records):
+    stream = io.StringIO("".join(json.dumps(record, ensure_ascii=False) + "\n"
+                                 for record in records))
+    errors = io.StringIO()
+    result = import_records(service, read_records(stream, "jsonl"), errors=errors)
+    return result, errors.getvalue()
+
+
+def test_imported_plaintext_password_is_hashed(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    exported = PasswordHasher("pbkdf2", 1000).hash("from-export")
+    result, _ = import_lines(
+        service,
+        {"type": "user", "email": "ivan@example.com", "name": "Иван", "password": "secret"},
+        {"type": "user", "email": "petr@example.com", "name": "Пётр", "password": exported})
+    assert result["imported"] == 2
+
+    ivan = service.users["ivan@example.com"]["password"]
+    assert hash_params(ivan) == ("pbkdf2", 1000)
+    assert service.users["petr@example.com"]["password"] == exported
+    service.close()
+    for path in tmp_path.iterdir():
+        assert b'"secret"' not in path.read_bytes()
+
+    service = open_service(tmp_path / "data.json")
+    assert service.authenticate("ivan@example.com", "secret")
+    assert service.authenticate("petr@example.com", "from-export")
+    service.close()
+
+
+def test_rows_with_wrong_field_types_are_skipped(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    result, errors = import_lines(
+        service,
+        {"type": "user", "email": "ivan@example.com", "name": "Иван", "password": "secret"},
+        {"type": "user", "email": ["petr@example.com"], "name": "Пётр", "password": "x"},
+        {"type": "board", "name": "Проект", "owner": "ivan@example.com",
+         "columns": ["To Do", 5]},
+        {"type": "board", "name": "Проект", "owner": "ivan@example.com", "members": None},
+        {"type": "item", "board": "board_1", "name": 42},
+        {"type": "item", "board": "board_1", "name": "task", "description": {"text": "x"}},
+        {"type": "item", "board": "board_1", "name": "task", "description": None},
+        {"type": "comment", "board": "board_1", "item": "item_1", "text": ["hi"],
+         "author": "ivan@example.com"})
+    assert (result["imported"], result["skipped"]) == (3, 5)
+    assert errors.count("\n") == 5 and "email" in errors and "columns" in errors
+    assert service.boards["board_1"]["items"]["item_1"]["description"] == ""
+    assert service.search("ivan@example.com", "task")[0]["item"]["id"] == "item_1"
+    service.close()
+
+
+def test_board_without_id_gets_free_id(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    result, errors = import_lines(
+        service,
+        {"type": "user", "email": "ivan@example.com", "name": "Иван", "password": "secret"},
+        {"type": "board", "id": "board_2", "name": "Старый", "owner": "ivan@example.com"},
+        {"type": "board", "name": "Новый", "owner": "ivan@example.com"})
+    assert (result["imported"], result["skipped"]) == (3, 0), errors
+    assert {board_id: service.boards[board_id]["name"] for board_id in service.boards} == {
+        "board_2": "Старый", "board_3": "Новый"}
+    service.close()
+
+
+def test_export_includes_cold_data_and_counts_archived(tmp_path):
+    email = "ivan@example.com"
+    service = TrackerService(str(tmp_path / "data.json"), hasher=PasswordHasher("pbkdf2", 1000),
+                             tiering=TieringPolicy(done_days=1, comment_days=1))
+    service.register_user(email, "Иван", "secret")
+    board_id = service.create_board(email, "Проект")["id"]
+    service.add_item(email, board_id, "в работе")
+    service.add_comment(email, board_id, "item_1", "старый")
+    service.add_item(email, board_id, "готово")
+    service.add_comment(email, board_id, "item_2", "сделано")
+    service.move_item(email, board_id, "item_2", "Done")
+    service.add_item(email, board_id, "в архив")
+    service.archive_item(email, board_id, "item_3")
+    service.archive_board(email, service.create_board(email, "Старая доска")["id"])
+    assert service.tier(now=datetime.now() + timedelta(days=2)) == {
+        "boards": 1, "items": 1, "comments": 1}
+    service.add_comment(email, board_id, "item_1", "новый")
+
+    result = export_file(service, str(tmp_path / "export.jsonl"))
+    assert (result["exported"], result["archived_boards"], result["archived_items"]) == (
+        7, 1, 1)
+    service.close()
+
+    (tmp_path / "copy").mkdir()
+    service = open_service(tmp_path / "copy" / "data.json")
+    assert import_file(service, str(tmp_path / "export.jsonl"),
+                       errors=io.StringIO())["imported"] == 7
+    items = service.get_board(email, board_id)["items"]
+    assert {item_id: (item["name"], [comment["text"] for comment in item["comments"]])
+            for item_id, item in items.items()} == {
+        "item_1": ("в работе", ["старый", "новый"]), "item_2": ("готово", ["сделано"])}
+    service.close()
+
+
+def test_rows_for_removed_board_are_skipped(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    email = "ivan@example.com"
+    service.register_user(email, "Иван", "secret")
+    board_id = service.create_board(email, "Проект")["id"]
+    service.add_item(email, board_id, "task")
+    service.delete_board(email, board_id)
+    result, errors = import_lines(
+        service,
+        {"type": "item", "board": board_id, "name": "ещё"},
+        {"type": "comment", "board": board_id, "item": "item_1", "text": "hi",
+         "author": email})
+    assert (result["imported"], result["skipped"]) == (0, 2)
+    assert errors.count("не найдена") == 2
+    service.close()
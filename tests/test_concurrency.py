@@ -0,0 +1,81 @@
+"""Применение своих операций поверх изменений другого процесса (merge_change)"""
+from pymonday.concurrency import free_id, merge_change
+from pymonday.models import Board, Item
+
+EMAIL = "ivan@example.com"
+CREATED = "2026-01-01T00:00:00"
+
+
+def item(item_id, status="To Do"):
+    return Item(item_id, f"task {item_id}", "", status, EMAIL, CREATED, EMAIL)
+
+
+def make_boards():
+    return {"board_1": Board("board_1", "Проект", EMAIL, CREATED, ["To Do", "Done"],
+                             {"item_1": item("item_1"), "item_2": item("item_2", "Done")},
+                             {EMAIL}, 3, 2)}
+
+
+def test_free_id_skips_taken_numbers():
+    assert free_id("board", {"board_1", "board_2", "board_4"}, 2) == "board_3"
+    assert free_id("board", {}, 1) == "board_1"
+
+
+def test_board_created_with_taken_id_is_renamed():
+    boards, remap = make_boards(), {}
+    data = {"board": Board("board_1", "Другой", EMAIL, CREATED, ["To Do"], {}, {EMAIL})}
+    assert merge_change({}, boards, "board_created", data, remap)
+    assert data["board"]["id"] == "board_2" and remap == {"board_1": "board_2"}
+
+    # Следующие операции той же пачки идут на новую доску
+    moved = {"board_id": "board_1", "item_id": "item_1", "from_status": "To Do",
+             "status": "Done"}
+    boards["board_2"] = Board("board_2", "Другой", EMAIL, CREATED, ["To Do", "Done"],
+                              {"item_1": item("item_1")}, {EMAIL})
+    assert merge_change({}, boards, "item_moved", moved, remap)
+    assert moved["board_id"] == "board_2"
+
+
+def test_item_added_with_issued_number_is_renamed():
+    boards, remap = make_boards(), {}
+    # Номер 2 уже выдан, даже если элемент с ним удалён
+    del boards["board_1"]["items"]["item_2"]
+    added = {"board_id": "board_1", "item": item("item_2")}
+    assert merge_change({}, boards, "item_added", added, remap)
+    assert added["item"]["id"] == "item_3"
+    assert remap == {("board_1", "item_2"): "item_3"}
+
+    comment = {"board_id": "board_1", "item_id": "item_2", "comment": None}
+    boards["board_1"]["items"]["item_3"] = added["item"]
+    assert merge_change({}, boards, "comment_added", comment, remap)
+    assert comment["item_id"] == "item_3"
+
+
+def test_item_moved_uses_current_status():
+    boards = make_boards()
+    moved = {"board_id": "board_1", "item_id": "item_2", "from_status": "To Do",
+             "status": "To Do"}
+    assert merge_change({}, boards, "item_moved", moved, {})
+    assert moved["from_status"] == "Done"
+
+
+def test_changes_to_removed_board_or_item_are_dropped():
+    boards = make_boards()
+    assert not merge_change({}, boards, "item_moved",
+                            {"board_id": "board_1", "item_id": "item_9",
+                             "from_status": "To Do", "status": "Done"}, {})
+    assert not merge_change({}, boards, "item_added",
+                            {"board_id": "board_9", "item": item("item_1")}, {})
+    assert not merge_change({}, boards, "board_tiered", {"board_id": "board_1"}, {})
+
+    boards["board_1"].members = set()
+    assert not merge_change({}, boards, "comment_added",
+                            {"board_id": "board_1", "item_id": "item_1"}, {})
+    assert merge_change({}, boards, "board_restored", {"board_id": "board_1"}, {})
+
+
+def test_user_operations():
+    users = {EMAIL: {"name": "Иван", "password": "x", "created_at": CREATED}}
+    assert not merge_change(users, {}, "user_registered", {"email": EMAIL}, {})
+    assert merge_change(users, {}, "password_changed", {"email": EMAIL}, {})
+    assert not merge_change(users, {}, "password_changed", {"email": "petr@example.com"}, {})
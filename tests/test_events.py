@@ -0,0 +1,122 @@
+"""Журнал событий досок: запись после сбоя и чтение с нужного места"""
+import multiprocessing
+import random
+import time
+
+import pytest
+
+from pymonday import events as events_module
+from pymonday.auth import PasswordHasher
+from pymonday.events import EventLog
+from pymonday.service import TrackerService
+
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file):
+    return TrackerService(str(data_file), hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def event(seq):
+    return {"seq": seq, "op": "item_added", "data": {"item": {"id": f"item_{seq}"}},
+            "at": "2026-10-16T12:00:00"}
+
+
+def test_torn_tail_is_cut_before_append(tmp_path):
+    log = EventLog(str(tmp_path / "events"))
+    log.append({"board_1": [event(1), event(2)]})
+    with open(log._board_file("board_1"), "ab") as f:
+        f.write(b'{"seq":3,"op":"item_ad')
+
+    log.append({"board_1": [event(3)]})
+    assert [event["seq"] for _, event in log.read("board_1")] == [1, 2, 3]
+
+
+def test_torn_only_line_is_cut(tmp_path):
+    log = EventLog(str(tmp_path / "events"))
+    log._store()
+    with open(log._board_file("board_1"), "wb") as f:
+        f.write(b'{"seq":1,"op"')
+
+    log.append({"board_1": [event(1)]})
+    assert [event["seq"] for _, event in log.read("board_1")] == [1]
+
+
+@pytest.mark.parametrize("seq", [0, 1, 57, 299, 300, 400])
+def test_offset_after_skips_older_events(tmp_path, monkeypatch, seq):
+    monkeypatch.setattr(events_module, "SEEK_BLOCK", 256)
+    log = EventLog(str(tmp_path / "events"))
+    log.append({"board_1": [event(number) for number in range(1, 301)]})
+
+    found = [event["seq"] for _, event in log.read("board_1", log.offset_after("board_1", seq))]
+    # Прочитаны все новые события и не больше блока старых
+    assert [number for number in found if number > seq] == list(range(seq + 1, 301))
+    assert len([number for number in found if number <= seq]) < 10
+
+
+def test_changes_and_report_read_only_new_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(events_module, "SEEK_BLOCK", 256)
+    service = open_service(tmp_path / "data.json")
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    for number in range(30):
+        service.add_item(EMAIL, board_id, f"task {number}")
+    service.move_item(EMAIL, board_id, "item_1", "Done")
+    assert service.board_report(EMAIL, board_id)["completed"] == 1
+
+    read = []
+    original = EventLog.read
+
+    def counting_read(self, board_id, offset=0):
+        for position, event in original(self, board_id, offset):
+            read.append(event["seq"])
+            yield position, event
+
+    monkeypatch.setattr(EventLog, "read", counting_read)
+    service.move_item(EMAIL, board_id, "item_2", "Done")
+    report = service.board_report(EMAIL, board_id)
+    assert report["completed"] == 2
+    assert len(read) == 1
+
+    read.clear()
+    changes = service.changes(EMAIL, board_id, since=31)
+    assert [event["seq"] for event in changes["events"]] == [32, 33]
+    assert len(read) < 10
+    service.close()
+
+
+def add_items(data_file, board_id, count):
+    service = TrackerService(str(data_file), storage="sqlite",
+                             hasher=PasswordHasher("pbkdf2", 1000))
+    for number in range(count):
+        service.add_item(EMAIL, board_id, f"task {number}")
+    service.close()
+
+
+def test_sqlite_events_are_logged_in_commit_order(tmp_path, monkeypatch):
+    data_file = tmp_path / "data.json"
+    service = TrackerService(str(data_file), storage="sqlite",
+                             hasher=PasswordHasher("pbkdf2", 1000))
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    service.close()
+
+    append = EventLog.append
+
+    def slow_append(self, events):
+        # Между фиксацией и записью событий успевает зафиксировать другой процесс
+        time.sleep(random.random() / 50)
+        append(self, events)
+
+    monkeypatch.setattr(EventLog, "append", slow_append)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=add_items, args=(data_file, board_id, 10))
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+    log = EventLog(f"{data_file}.events")
+    assert [event["seq"] for _, event in log.read(board_id)] == list(range(1, 32))
@@ -0,0 +1,60 @@
+"""Меню: ошибки сервиса печатаются, а не завершают сеанс"""
+import pytest
+
+from pymonday import treker
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerError
+
+EMAIL = "ivan@example.com"
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = treker.PyMonday(str(tmp_path / "data.json"),
+                          hasher=PasswordHasher("pbkdf2", 1000))
+    app.service.register_user(EMAIL, "Иван", "secret")
+    app.current_user = EMAIL
+    yield app
+    app.close()
+
+
+def answers(monkeypatch, *values):
+    values = iter(values)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(values))
+
+
+def test_actions_on_item_removed_elsewhere_print_error(app, monkeypatch, capsys):
+    board_id = app.service.create_board(EMAIL, "Проект")["id"]
+    item = app.service.add_item(EMAIL, board_id, "task")
+    # Элемент показан на экране, но его уже удалил другой процесс
+    app.service.delete_item(EMAIL, board_id, item["id"])
+    shown = [item]
+
+    answers(monkeypatch, "1", "2")
+    app._move_item(board_id, shown)
+    answers(monkeypatch, "1", "готово")
+    app._add_comment(board_id, shown)
+    answers(monkeypatch, "1")
+    app._archive_item(board_id, shown)
+    answers(monkeypatch, "1", "да")
+    app._delete_item(board_id, shown)
+    assert capsys.readouterr().out.count("не найден") == 4
+
+
+def test_actions_on_removed_board_print_error(app, capsys):
+    board_id = app.service.create_board(EMAIL, "Проект")["id"]
+    app.service.delete_board(EMAIL, board_id)
+
+    app._add_item_to_specific_board(board_id)
+    app._restore_item(board_id)
+    assert capsys.readouterr().out.count("Доска не найдена!") == 2
+
+
+def test_page_size_must_be_positive(app):
+    board_id = app.service.create_board(EMAIL, "Проект")["id"]
+    for page_size in (0, -1):
+        with pytest.raises(TrackerError):
+            app.service.board_page(EMAIL, board_id, page_size=page_size)
+        with pytest.raises(SystemExit):
+            treker.parse_args(["--page-size", str(page_size)])
+    assert treker.parse_args(["--page-size", "5"]).page_size == 5
@@ -0,0 +1,128 @@
+"""Поисковый индекс: сохранённый индекс сверяется с данными"""
+import pytest
+
+from pymonday.auth import PasswordHasher
+from pymonday.search_index import SearchIndex
+from pymonday.service import TrackerService
+
+STORAGES = ["journal", "json", "binary", "sqlite", "sharded"]
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file, storage):
+    return TrackerService(str(data_file), storage=storage,
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def found_ids(service, term):
+    return sorted(found["item"]["id"] for found in service.search(EMAIL, term))
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_index_saved_before_changes_is_not_used_stale(tmp_path, storage):
+    data_file = tmp_path / "data.json"
+    service = open_service(data_file, storage)
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    service.add_item(EMAIL, board_id, "alpha first")
+    service.add_item(EMAIL, board_id, "alpha second")
+    assert found_ids(service, "alpha") == ["item_1", "item_2"]
+    service.close()
+
+    # Изменения записаны, но индекс не сохранён (выход без close)
+    service = open_service(data_file, storage)
+    service.delete_item(EMAIL, board_id, "item_1")
+    service.add_item(EMAIL, board_id, "beta third")
+    service.flush()
+
+    for _ in range(2):
+        service = open_service(data_file, storage)
+        assert found_ids(service, "alpha") == ["item_2"]
+        assert found_ids(service, "beta") == ["item_3"]
+        service.close()
+
+
+def test_load_reindexes_only_changed_boards(tmp_path):
+    boards = {
+        "board_1": {"version": 1, "items": {"item_1": {"id": "item_1", "name": "alpha",
+                                                        "description": ""}}},
+        "board_2": {"version": 1, "items": {"item_1": {"id": "item_1", "name": "gamma",
+                                                        "description": ""}}}
+    }
+
+    def versions():
+        return {board_id: board["version"] for board_id, board in boards.items()}
+
+    index = SearchIndex(str(tmp_path / "search.idx"), versions=versions)
+    index.rebuild(boards)
+    index.save()
+
+    boards["board_1"]["items"]["item_1"]["name"] = "beta"
+    boards["board_1"]["version"] = 2
+    del boards["board_2"]
+    boards["board_3"] = {"version": 1, "items": {"item_1": {"id": "item_1", "name": "delta",
+                                                             "description": ""}}}
+
+    index = SearchIndex(str(tmp_path / "search.idx"), versions=versions)
+    assert index.load(versions()) == {"board_1", "board_2", "board_3"}
+
+    index = SearchIndex(str(tmp_path / "search.idx"), versions=versions)
+    index.load_lazily(boards)
+    assert index.search(boards, "alpha") == []
+    assert index.search(boards, "beta") == [("board_1", "item_1", 4)]
+    assert index.search(boards, "delta") == [("board_3", "item_1", 4)]
+    assert "board_2" not in index.postings
+
+
+def test_search_skips_items_missing_from_board(tmp_path):
+    service = open_service(tmp_path / "data.json", "journal")
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    service.add_item(EMAIL, board_id, "alpha first")
+    service.add_item(EMAIL, board_id, "alpha second")
+    service.search_index.add_item(board_id, {"id": "item_9", "name": "alpha ghost",
+                                             "description": ""})
+
+    assert found_ids(service, "alpha") == ["item_1", "item_2"]
+    assert "item_9" not in service.search_index.postings[board_id]["alpha"]
+    service.close()
+
+
+def fill(service):
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    service.add_item(EMAIL, board_id, "Отчёт за квартал", "собрать отчёты отделов")
+    service.add_item(EMAIL, board_id, "Отчётность", "")
+    service.add_item(EMAIL, board_id, "Встреча", "обсудить отчёт")
+    service.add_item(EMAIL, board_id, "release_notes", "quarterly report")
+    service.delete_item(EMAIL, board_id, "item_2")
+    service.add_item(EMAIL, board_id, "Отчёт удалён?", "")
+    return board_id
+
+
+@pytest.mark.parametrize("storage", ["sqlite", "sharded"])
+def test_search_ranks_like_memory_index(tmp_path, storage):
+    expected = open_service(tmp_path / "memory.json", "journal")
+    fill(expected)
+    service = open_service(tmp_path / "data.json", storage)
+    fill(service)
+    def ranked(app, term):
+        return [(found["item"]["id"], found.get("score")) for found in app.search(EMAIL, term)]
+
+    for term in ("отчёт", "отч", "отчёт квартал", "release", "REPORT", "нет"):
+        assert ranked(service, term) == ranked(expected, term), term
+    service.close()
+    expected.close()
+
+
+def test_sqlite_full_text_index_is_built_for_old_database(tmp_path):
+    service = open_service(tmp_path / "data.json", "sqlite")
+    fill(service)
+    service.storage.conn.executescript(
+        "DROP TRIGGER items_fts_insert; DROP TRIGGER items_fts_delete; "
+        "DROP TRIGGER items_fts_update; DROP TABLE items_fts;")
+    service.close()
+
+    service = open_service(tmp_path / "data.json", "sqlite")
+    assert found_ids(service, "встреча") == ["item_3"]
+    service.close()
@@ -0,0 +1,180 @@
+"""HTTP сервер: неверные запросы получают 400 и не меняют данные"""
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+
+from pymonday.auth import PasswordHasher
+from pymonday.server import TrackerServer
+from pymonday.service import TrackerError, TrackerService
+
+EMAIL = "ivan@example.com"
+AUTH = "Basic " + base64.b64encode(f"{EMAIL}:secret".encode()).decode()
+
+
+async def request(port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else (
+        body if isinstance(body, bytes) else json.dumps(body).encode())
+    head = {"Authorization": AUTH, "Connection": "close", "Content-Length": str(len(payload))}
+    head.update(headers or {})
+    writer.write(f"{method} {path} HTTP/1.1\r\n".encode() + "".join(
+        f"{name}: {value}\r\n" for name, value in head.items()).encode() + b"\r\n" + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    return int(status_line.split()[1]), json.loads(rest.partition(b"\r\n\r\n")[2] or b"null")
+
+
+def run_server(tmp_path, scenario):
+    service = TrackerService(str(tmp_path / "data.json"), hasher=PasswordHasher("pbkdf2", 1000))
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+
+    async def main():
+        server = TrackerServer(service)
+        _, port = await server.start(port=0)
+        try:
+            return await scenario(port, board_id)
+        finally:
+            await server.stop()
+
+    try:
+        return service, asyncio.run(main())
+    finally:
+        service.close()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/boards", {"name": 5}),
+    ("/boards", {}),
+    ("/boards/board_1/items", {"name": "task", "status": ["Done"]}),
+    ("/boards/board_1/items", {"name": "task", "description": 7}),
+    ("/boards/board_1/members", {"email": None}),
+    ("/users", {"email": "petr@example.com", "name": "Пётр", "password": 123}),
+])
+def test_bad_body_fields_are_rejected_without_changes(tmp_path, path, body):
+    async def scenario(port, board_id):
+        return await request(port, "POST", path, body)
+
+    service, (status, payload) = run_server(tmp_path, scenario)
+    assert status == 400 and "error" in payload
+    assert list(service.boards) == ["board_1"]
+    assert len(service.boards["board_1"]["items"]) == 0
+    assert list(service.users) == [EMAIL]
+
+
+@pytest.mark.parametrize("path", [
+    "/boards/board_1/changes?since=abc",
+    "/boards/board_1/changes?limit=-1",
+    "/search?q=task&limit=x",
+    "/dashboard?recent=1.5",
+])
+def test_bad_query_numbers_are_rejected(tmp_path, path):
+    async def scenario(port, board_id):
+        return await request(port, "GET", path)
+
+    _, (status, payload) = run_server(tmp_path, scenario)
+    assert status == 400 and "error" in payload
+
+
+def test_bad_content_length_is_rejected(tmp_path):
+    async def scenario(port, board_id):
+        bad = await request(port, "POST", "/boards", b"{}", {"Content-Length": "ten"})
+        good = await request(port, "POST", "/boards", {"name": "Ещё"})
+        return bad, good
+
+    _, ((bad_status, _), (good_status, board)) = run_server(tmp_path, scenario)
+    assert bad_status == 400
+    assert good_status == 201 and board["name"] == "Ещё"
+
+
+def test_concurrent_writes_are_all_applied(tmp_path):
+    async def scenario(port, board_id):
+        created = await asyncio.gather(*(
+            request(port, "POST", f"/boards/{board_id}/items", {"name": f"task {number}"})
+            for number in range(20)))
+        status, board = await request(port, "GET", f"/boards/{board_id}")
+        return [status for status, _ in created], status, board
+
+    _, (created, status, board) = run_server(tmp_path, scenario)
+    assert created == [201] * 20
+    assert status == 200
+    assert sum(len(items) for items in board["columns"].values()) == 20
+
+
+def test_password_check_does_not_block_event_loop(tmp_path, monkeypatch):
+    def slow_authenticate(self, email, password):
+        time.sleep(0.5)
+        return self.users[email]
+
+    monkeypatch.setattr(TrackerService, "authenticate", slow_authenticate)
+
+    async def scenario(port, board_id):
+        login = asyncio.create_task(request(port, "GET", "/boards"))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        status, _ = await request(port, "GET", "/metrics")
+        elapsed = time.perf_counter() - started
+        return status, elapsed, (await login)[0]
+
+    _, (status, elapsed, login_status) = run_server(tmp_path, scenario)
+    assert status == 200 and login_status == 200
+    assert elapsed < 0.3
+
+
+def test_metrics_are_not_cached(tmp_path):
+    async def scenario(port, board_id):
+        await request(port, "GET", "/metrics")
+        for _ in range(5):
+            await request(port, "GET", "/boards")
+        return await request(port, "GET", "/metrics")
+
+    _, (status, payload) = run_server(tmp_path, scenario)
+    assert status == 200
+    assert payload["routes"]["GET /boards"]["count"] == 5
+    assert payload["routes"]["GET /metrics"]["count"] == 1
+
+
+def test_reads_do_not_wait_for_flush(tmp_path, monkeypatch):
+    flush = TrackerService.flush
+
+    def slow_flush(self):
+        if self._unflushed:
+            time.sleep(0.5)
+        flush(self)
+
+    monkeypatch.setattr(TrackerService, "flush", slow_flush)
+
+    async def scenario(port, board_id):
+        write = asyncio.create_task(
+            request(port, "POST", f"/boards/{board_id}/items", {"name": "task"}))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        status, board = await request(port, "GET", f"/boards/{board_id}")
+        elapsed = time.perf_counter() - started
+        return status, elapsed, board, await write
+
+    service, (status, elapsed, board, (write_status, item)) = run_server(tmp_path, scenario)
+    assert status == 200 and elapsed < 0.3
+    assert write_status == 201 and item["id"] == "item_1"
+    assert service.boards["board_1"]["items"]["item_1"]["name"] == "task"
+
+
+def test_failed_flush_rolls_batch_back(tmp_path, monkeypatch):
+    def failing_flush(self):
+        if self._unflushed:
+            raise TrackerError("Изменения не сохранены: диск занят")
+
+    async def scenario(port, board_id):
+        monkeypatch.setattr(TrackerService, "flush", failing_flush)
+        created = await request(port, "POST", f"/boards/{board_id}/items", {"name": "task"})
+        monkeypatch.undo()
+        return created, await request(port, "GET", f"/boards/{board_id}")
+
+    _, ((status, error), (_, board)) = run_server(tmp_path, scenario)
+    assert status == 400 and "не сохранены" in error["error"]
+    assert sum(len(items) for items in board["columns"].values()) == 0
@@ -0,0 +1,116 @@
+"""Хранилище по доскам: изменения элементов дописываются в журнал доски"""
+import json
+import os
+
+from pymonday import sharded_storage
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerService
+
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file):
+    return TrackerService(str(data_file), storage="sharded",
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def create_board(data_file, items=20):
+    service = open_service(data_file)
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    for number in range(items):
+        service.add_item(EMAIL, board_id, f"task {number}")
+    service.storage.save(service.users, service.boards)
+    service.close()
+    return board_id
+
+
+def change_items(service, board_id):
+    service.add_item(EMAIL, board_id, "new task")
+    service.move_item(EMAIL, board_id, "item_3", "Done")
+    service.add_comment(EMAIL, board_id, "item_3", "готово")
+    service.delete_item(EMAIL, board_id, "item_4")
+
+
+def check_changes(service, board_id):
+    board = service.get_board(EMAIL, board_id)
+    assert board["items"]["item_3"]["status"] == "Done"
+    assert [comment["text"] for comment in board["items"]["item_3"]["comments"]] == ["готово"]
+    assert "item_4" not in board["items"] and board["items"]["item_21"]["name"] == "new task"
+    assert len(board["items"]) == 20
+    assert board["version"] == service.storage.headers[board_id]["version"]
+
+
+def test_item_changes_do_not_rewrite_board_file(tmp_path):
+    board_id = create_board(tmp_path / "data.json")
+    service = open_service(tmp_path / "data.json")
+    board_file = service.storage._board_file(board_id)
+    before = open(board_file, "rb").read()
+    change_items(service, board_id)
+    service.close()
+
+    assert open(board_file, "rb").read() == before
+    assert os.path.exists(service.storage._journal_file(board_id))
+    service = open_service(tmp_path / "data.json")
+    check_changes(service, board_id)
+    service.close()
+
+
+def test_large_journal_is_folded_into_board_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharded_storage, "BOARD_JOURNAL_MIN", 0)
+    board_id = create_board(tmp_path / "data.json", items=2)
+    service = open_service(tmp_path / "data.json")
+    for number in range(5):
+        service.add_comment(EMAIL, board_id, "item_1", f"комментарий {number}")
+    service.close()
+
+    # Файл доски переписан вместе с журналом, журнал не больше файла доски
+    board_file = service.storage._board_file(board_id)
+    with open(board_file, encoding="utf-8") as f:
+        assert json.load(f)["version"] > service.storage.headers[board_id]["version"] - 5
+    journal = service.storage._journal_file(board_id)
+    if os.path.exists(journal):
+        assert os.path.getsize(journal) < os.path.getsize(board_file)
+    service = open_service(tmp_path / "data.json")
+    comments = service.get_board(EMAIL, board_id)["items"]["item_1"]["comments"]
+    assert [comment["text"] for comment in comments] == [f"комментарий {n}" for n in range(5)]
+    service.close()
+
+
+def test_journal_already_in_board_file_is_not_applied_twice(tmp_path):
+    board_id = create_board(tmp_path / "data.json")
+    service = open_service(tmp_path / "data.json")
+    change_items(service, board_id)
+    service.close()
+
+    # Сбой после записи файла доски, но до удаления журнала
+    journal = service.storage._journal_file(board_id)
+    saved = open(journal, "rb").read()
+    service = open_service(tmp_path / "data.json")
+    service.storage._write_board(service.boards[board_id])
+    service.close()
+    with open(journal, "wb") as f:
+        f.write(saved)
+
+    service = open_service(tmp_path / "data.json")
+    check_changes(service, board_id)
+    service.close()
+
+
+def test_torn_journal_line_is_ignored_and_cut(tmp_path):
+    board_id = create_board(tmp_path / "data.json")
+    service = open_service(tmp_path / "data.json")
+    change_items(service, board_id)
+    service.close()
+    with open(service.storage._journal_file(board_id), "ab") as f:
+        f.write(b'{"version":99,"changes":[{"op":"item_mo')
+
+    service = open_service(tmp_path / "data.json")
+    check_changes(service, board_id)
+    service.move_item(EMAIL, board_id, "item_5", "Done")
+    service.close()
+
+    service = open_service(tmp_path / "data.json")
+    check_changes(service, board_id)
+    assert service.get_board(EMAIL, board_id)["items"]["item_5"]["status"] == "Done"
+    service.close()
@@ -0,0 +1,56 @@
+"""Хранилище SQLite: доски и элементы читаются по требованию"""
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerService
+from pymonday.sqlite_storage import MAX_CACHED_BOARDS, SqliteItems
+
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file):
+    return TrackerService(str(data_file), storage="sqlite",
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def test_item_changes_do_not_load_whole_board(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    for number in range(50):
+        service.add_item(EMAIL, board_id, f"task {number}")
+    service.close()
+
+    service = open_service(tmp_path / "data.json")
+    items = service.boards[board_id]["items"]
+    assert isinstance(items, SqliteItems)
+    service.add_item(EMAIL, board_id, "new task")
+    service.move_item(EMAIL, board_id, "item_3", "Done")
+    service.add_comment(EMAIL, board_id, "item_3", "готово")
+    service.delete_item(EMAIL, board_id, "item_4")
+    # Прочитаны только затронутые элементы
+    assert set(items._items) == {"item_51", "item_3"}
+    assert "item_4" not in items and "item_5" in items
+
+    ids = list(items)
+    assert len(ids) == 50 and ids[-1] == "item_51" and "item_4" not in ids
+    service.close()
+
+    service = open_service(tmp_path / "data.json")
+    board = service.get_board(EMAIL, board_id)
+    assert board["items"]["item_3"]["status"] == "Done"
+    assert [comment["text"] for comment in board["items"]["item_3"]["comments"]] == ["готово"]
+    assert "item_4" not in board["items"]
+    assert board["item_counter"] == 51
+    service.close()
+
+
+def test_board_cache_is_bounded(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    service.register_user(EMAIL, "Иван", "secret")
+    board_ids = [service.create_board(EMAIL, f"Доска {number}")["id"]
+                 for number in range(MAX_CACHED_BOARDS * 2)]
+    for board_id in board_ids:
+        service.add_item(EMAIL, board_id, "task")
+    assert len(service.boards.cached()) == MAX_CACHED_BOARDS
+    # Вытесненная доска читается заново вместе с изменениями
+    assert service.boards[board_ids[0]]["items"]["item_1"]["name"] == "task"
+    service.close()
@@ -0,0 +1,54 @@
+"""Быстрый запуск: меню появляется раньше, чем загрузятся данные"""
+import os
+import threading
+
+import pytest
+
+from pymonday import treker
+from pymonday.benchmarks.startup import command_time, menu_times, prepare_data
+from pymonday.service import TrackerService
+
+# Цель для появления меню на STARTUP_ITEMS элементах, мс (с запасом на медленные машины)
+STARTUP_TARGET_MS = float(os.environ.get("PYMONDAY_STARTUP_TARGET_MS", "1000"))
+STARTUP_ITEMS = 20000
+
+
+def test_menu_is_shown_before_data_is_loaded(tmp_path, monkeypatch):
+    loaded = threading.Event()
+    release = threading.Event()
+
+    class SlowService(TrackerService):
+        def load_data(self):
+            # Загрузка не закончится, пока меню не покажется
+            assert release.wait(10)
+            super().load_data()
+            loaded.set()
+
+    monkeypatch.setattr(treker, "TrackerService", SlowService)
+    prompts = []
+
+    def fake_input(prompt=""):
+        prompts.append(loaded.is_set())
+        release.set()
+        return "0"
+
+    monkeypatch.setattr("builtins.input", fake_input)
+    app = treker.PyMonday(str(tmp_path / "data.json"))
+    try:
+        app.main_menu()
+    finally:
+        app.close()
+
+    assert prompts == [False]
+    assert loaded.is_set()
+
+
+@pytest.mark.parametrize("storage", ["journal", "sqlite"])
+def test_menu_startup_time_target(tmp_path, storage):
+    data_file = str(tmp_path / "data.json")
+    prepare_data(data_file, storage, STARTUP_ITEMS)
+
+    menu = sorted(menu_times(data_file, storage)["menu"] for _ in range(3))[1]
+    assert menu * 1000 < STARTUP_TARGET_MS
+    # Команда с полной загрузкой данных идёт дольше, чем появление меню
+    assert menu < sorted(command_time(data_file, storage) for _ in range(3))[1]
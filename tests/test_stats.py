@@ -0,0 +1,79 @@
+"""Счётчики элементов доски и панели управления, с холодными элементами"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from pymonday.archive import TieringPolicy
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerService
+
+STORAGES = ["journal", "json", "binary", "sqlite", "sharded"]
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file, storage):
+    return TrackerService(str(data_file), storage=storage, tiering=TieringPolicy(done_days=1),
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_board_stats_total_includes_cold_items(tmp_path, storage):
+    data_file = tmp_path / "data.json"
+    service = open_service(data_file, storage)
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    for name in ("first", "second", "third"):
+        service.add_item(EMAIL, board_id, name)
+    service.move_item(EMAIL, board_id, "item_1", "Done")
+    service.move_item(EMAIL, board_id, "item_2", "Done")
+    assert service.tier(now=datetime.now() + timedelta(days=2))["items"] == 2
+    service.close()
+
+    service = open_service(data_file, storage)
+    stats = service.board_stats(board_id)
+    assert stats["items_by_status"]["Done"] == 2
+    assert stats["items_by_status"]["To Do"] == 1
+    assert stats["total_items"] == 3
+    dashboard = service.dashboard_stats(EMAIL)
+    assert dashboard["total_items"] == stats["total_items"]
+    service.close()
+
+
+def test_dashboard_recent_items_have_one_shape(tmp_path):
+    results = {}
+    for storage in STORAGES:
+        (tmp_path / storage).mkdir()
+        service = open_service(tmp_path / storage / "data.json", storage)
+        service.register_user(EMAIL, "Иван", "secret")
+        board_id = service.create_board(EMAIL, "Проект")["id"]
+        for name in ("first", "second", "third"):
+            service.add_item(EMAIL, board_id, name, "описание")
+        service.add_comment(EMAIL, board_id, "item_2", "комментарий")
+        service.close()
+        service = open_service(tmp_path / storage / "data.json", storage)
+        results[storage] = [(entry["board"], entry["board_id"], entry["item"]["id"],
+                             sorted(entry["item"]))
+                            for entry in service.dashboard_stats(EMAIL, 2)["recent_items"]]
+        service.close()
+
+    fields = sorted(("id", "name", "status", "created_at"))
+    expected = [("Проект", "board_1", "item_3", fields), ("Проект", "board_1", "item_2", fields)]
+    assert results == {storage: expected for storage in STORAGES}
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_status_counts_follow_columns(tmp_path, storage):
+    service = open_service(tmp_path / "data.json", storage)
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    for name in ("first", "second", "third"):
+        service.add_item(EMAIL, board_id, name)
+    service.move_item(EMAIL, board_id, "item_1", "Done")
+    service.move_item(EMAIL, board_id, "item_2", "Review")
+    service.move_item(EMAIL, board_id, "item_3", "Done")
+
+    stats = service.board_stats(board_id)["items_by_status"]
+    assert list(stats.items()) == [("To Do", 0), ("In Progress", 0), ("Review", 1), ("Done", 2)]
+    dashboard = service.dashboard_stats(EMAIL)["items_by_status"]
+    assert list(dashboard.items()) == [("Review", 1), ("Done", 2)]
+    service.close()
@@ -0,0 +1,144 @@
+"""Хранилища: данные переживают перезапуск, изменения двух процессов не теряются"""
+import pytest
+
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerService
+
+STORAGES = ["journal", "json", "binary", "sqlite", "sharded"]
+IVAN, PETR = "ivan@example.com", "petr@example.com"
+
+
+def open_service(data_file, storage):
+    return TrackerService(str(data_file), storage=storage,
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def snapshot(service, board_id):
+    board = service.get_board(IVAN, board_id)
+    return {
+        "name": board["name"],
+        "members": sorted(board["members"]),
+        "items": {item_id: (item["name"], item["status"],
+                            [comment["text"] for comment in item["comments"]])
+                  for item_id, item in board["items"].items()},
+        "boards": sorted(found["id"] for found in service.list_boards(IVAN))
+    }
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_data_survives_restart(tmp_path, storage):
+    service = open_service(tmp_path / "data.json", storage)
+    service.register_user(IVAN, "Иван", "secret")
+    service.register_user(PETR, "Пётр", "secret")
+    board_id = service.create_board(IVAN, "Проект")["id"]
+    removed_id = service.create_board(IVAN, "Удалить")["id"]
+    service.add_member(IVAN, board_id, PETR)
+    for name in ("first", "second", "third"):
+        service.add_item(IVAN, board_id, name)
+    service.move_item(IVAN, board_id, "item_2", "Done")
+    service.add_comment(PETR, board_id, "item_2", "готово")
+    service.delete_item(IVAN, board_id, "item_3")
+    service.delete_board(IVAN, removed_id)
+    expected = snapshot(service, board_id)
+    service.close()
+
+    service = open_service(tmp_path / "data.json", storage)
+    assert snapshot(service, board_id) == expected
+    assert expected["items"] == {"item_1": ("first", "To Do", []),
+                                 "item_2": ("second", "Done", ["готово"])}
+    assert expected["boards"] == [board_id]
+    # Номер удалённого элемента не выдаётся повторно
+    assert service.add_item(IVAN, board_id, "fourth")["id"] == "item_4"
+    service.close()
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_changes_of_two_processes_are_merged(tmp_path, storage):
+    first = open_service(tmp_path / "data.json", storage)
+    first.register_user(IVAN, "Иван", "secret")
+    board_id = first.create_board(IVAN, "Проект")["id"]
+    first.add_item(IVAN, board_id, "shared")
+    second = open_service(tmp_path / "data.json", storage)
+
+    first.add_item(IVAN, board_id, "from first")
+    first.create_board(IVAN, "Доска первого")
+    # Второй ещё не видел изменений первого: его id совпадают и получают новые номера
+    added = second.add_item(IVAN, board_id, "from second")
+    second.move_item(IVAN, board_id, added["id"], "Done")
+    second.create_board(IVAN, "Доска второго")
+    first.close()
+    second.close()
+
+    service = open_service(tmp_path / "data.json", storage)
+    board = service.get_board(IVAN, board_id)
+    names = {item["name"]: (item_id, item["status"]) for item_id, item in board["items"].items()}
+    assert names == {"shared": ("item_1", "To Do"), "from first": ("item_2", "To Do"),
+                     "from second": ("item_3", "Done")}
+    assert sorted(found["name"] for found in service.list_boards(IVAN)) == [
+        "Доска второго", "Доска первого", "Проект"]
+    service.close()
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_board_headers_are_copies_of_one_shape(tmp_path, storage):
+    service = open_service(tmp_path / "data.json", storage)
+    service.register_user(IVAN, "Иван", "secret")
+    board_id = service.create_board(IVAN, "Проект")["id"]
+    service.add_item(IVAN, board_id, "first")
+    fields = ["created_at", "id", "items_count", "members", "name", "owner", "version"]
+
+    header = service.list_boards(IVAN)[0]
+    assert sorted(header) == fields
+    assert sorted(service.board_view(IVAN, board_id)["board"]) == fields
+    header["members"].add(PETR)
+    header["items_count"] = 99
+    header = service.list_boards(IVAN)[0]
+    assert header["members"] == {IVAN} and header["items_count"] == 1
+    assert not service.queries.is_member(PETR, board_id)
+    service.close()
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_board_pages_and_search_include_comments(tmp_path, storage):
+    service = open_service(tmp_path / "data.json", storage)
+    service.register_user(IVAN, "Иван", "secret")
+    board_id = service.create_board(IVAN, "Проект")["id"]
+    service.add_item(IVAN, board_id, "первая задача")
+    service.add_item(IVAN, board_id, "вторая задача")
+    service.add_comment(IVAN, board_id, "item_2", "готово")
+
+    def texts(item):
+        return [comment["text"] for comment in item["comments"]]
+
+    column = service.board_view(IVAN, board_id)["columns"]["To Do"]
+    assert [texts(item) for item in column] == [[], ["готово"]]
+    page = service.board_page(IVAN, board_id)["columns"]["To Do"]["items"]
+    assert [texts(item) for item in page] == [[], ["готово"]]
+    found = {result["item"]["id"]: texts(result["item"])
+             for result in service.search(IVAN, "задача")}
+    assert found == {"item_1": [], "item_2": ["готово"]}
+    service.close()
+
+
+def test_load_error_is_logged_not_printed(tmp_path, caplog, capsys):
+    (tmp_path / "data.json").write_text("{not json", encoding="utf-8")
+    service = open_service(tmp_path / "data.json", "json")
+    assert service.list_boards(IVAN) == []
+    assert "Ошибка загрузки данных" in caplog.text
+    assert capsys.readouterr().out == ""
+    service.close()
+
+
+def test_dropped_change_is_logged(tmp_path, caplog, capsys):
+    first = open_service(tmp_path / "data.json", "journal")
+    first.register_user(IVAN, "Иван", "secret")
+    board_id = first.create_board(IVAN, "Проект")["id"]
+    first.add_item(IVAN, board_id, "task")
+    second = open_service(tmp_path / "data.json", "journal")
+    with second.transaction():
+        second.move_item(IVAN, board_id, "item_1", "Done")
+        first.delete_item(IVAN, board_id, "item_1")
+    assert "item_moved отменено" in caplog.text
+    assert capsys.readouterr().err == ""
+    first.close()
+    second.close()
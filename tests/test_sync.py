@@ -0,0 +1,97 @@
+"""Синхронизация хранилищ по журналам событий"""
+import pytest
+
+from pymonday.auth import PasswordHasher
+from pymonday.service import TrackerError, TrackerService
+
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file, storage="journal"):
+    return TrackerService(str(data_file), storage=storage,
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+def boards_by_name(service):
+    return {found["name"]: found["id"] for found in service.list_boards(EMAIL)}
+
+
+def item_names(service, board_id):
+    return {item_id: item["name"]
+            for item_id, item in service.get_board(EMAIL, board_id)["items"].items()}
+
+
+@pytest.mark.parametrize("storage", ["journal", "sqlite", "sharded"])
+def test_sync_remaps_colliding_ids(tmp_path, storage):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    left = open_service(tmp_path / "a" / "data.json", storage)
+    right = open_service(tmp_path / "b" / "data.json")
+    for service, name in ((left, "Левая"), (right, "Правая")):
+        service.register_user(EMAIL, "Иван", "secret")
+        board_id = service.create_board(EMAIL, name)["id"]
+        service.add_item(EMAIL, board_id, f"{name}: задача")
+    assert boards_by_name(left) == {"Левая": "board_1"}
+    assert boards_by_name(right) == {"Правая": "board_1"}
+
+    assert left.sync(right) == {"pulled": 2, "pushed": 2}
+    assert boards_by_name(left) == {"Левая": "board_1", "Правая": "board_2"}
+    assert boards_by_name(right) == {"Правая": "board_1", "Левая": "board_2"}
+
+    # Изменения перенесённой доски идут по запомненному соответствию id
+    right.add_item(EMAIL, "board_2", "Левая: от правой")
+    right.move_item(EMAIL, "board_2", "item_1", "Done")
+    left.add_comment(EMAIL, "board_2", "item_1", "с левой")
+    assert left.sync(right) == {"pulled": 2, "pushed": 1}
+    assert item_names(left, "board_1") == {"item_1": "Левая: задача",
+                                           "item_2": "Левая: от правой"}
+    assert left.get_board(EMAIL, "board_1")["items"]["item_1"]["status"] == "Done"
+    comments = right.get_board(EMAIL, "board_1")["items"]["item_1"]["comments"]
+    assert [comment["text"] for comment in comments] == ["с левой"]
+
+    # Повторная синхронизация ничего не повторяет
+    assert left.sync(right) == {"pulled": 0, "pushed": 0}
+    assert item_names(right, "board_2") == item_names(left, "board_1")
+    left.close()
+    right.close()
+
+
+def test_sync_remaps_colliding_item_ids(tmp_path):
+    (tmp_path / "a").mkdir()
+    left = open_service(tmp_path / "a" / "data.json")
+    left.register_user(EMAIL, "Иван", "secret")
+    board_id = left.create_board(EMAIL, "Общая")["id"]
+    left.close()
+    # Копия хранилища: общая часть журнала не синхронизируется заново
+    (tmp_path / "b").mkdir()
+    for path in (tmp_path / "a").iterdir():
+        if path.is_file():
+            (tmp_path / "b" / path.name).write_bytes(path.read_bytes())
+    events = tmp_path / "a" / "data.json.events"
+    (tmp_path / "b" / events.name).mkdir()
+    for path in events.iterdir():
+        (tmp_path / "b" / events.name / path.name).write_bytes(path.read_bytes())
+
+    left = open_service(tmp_path / "a" / "data.json")
+    right = open_service(tmp_path / "b" / "data.json")
+    left.add_item(EMAIL, board_id, "слева")
+    right.add_item(EMAIL, board_id, "справа")
+    assert left.sync(right) == {"pulled": 1, "pushed": 1}
+    assert item_names(left, board_id) == {"item_1": "слева", "item_2": "справа"}
+    assert item_names(right, board_id) == {"item_1": "справа", "item_2": "слева"}
+
+    right.move_item(EMAIL, board_id, "item_1", "Done")
+    left.sync(right)
+    assert left.get_board(EMAIL, board_id)["items"]["item_2"]["status"] == "Done"
+    left.close()
+    right.close()
+
+
+def test_store_cannot_sync_with_itself(tmp_path):
+    service = open_service(tmp_path / "data.json")
+    service.register_user(EMAIL, "Иван", "secret")
+    other = open_service(tmp_path / "data.json")
+    with pytest.raises(TrackerError):
+        service.sync(other)
+    service.close()
+    other.close()
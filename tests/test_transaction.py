@@ -0,0 +1,47 @@
+"""Транзакции сервиса: незаписанные изменения отменяются"""
+import pytest
+
+from pymonday.auth import PasswordHasher
+from pymonday.concurrency import FileLock
+from pymonday.service import TrackerError, TrackerService
+
+STORAGES = ["journal", "json", "binary", "sqlite", "sharded"]
+EMAIL = "ivan@example.com"
+
+
+def open_service(data_file, storage):
+    return TrackerService(str(data_file), storage=storage,
+                          hasher=PasswordHasher("pbkdf2", 1000))
+
+
+@pytest.mark.parametrize("storage", STORAGES)
+def test_failed_flush_rolls_transaction_back(tmp_path, storage):
+    service = open_service(tmp_path / "data.json", storage)
+    service.register_user(EMAIL, "Иван", "secret")
+    board_id = service.create_board(EMAIL, "Проект")["id"]
+    service.add_item(EMAIL, board_id, "first")
+
+    lock = service.storage.commit_lock()
+    lock.timeout = 0.1
+    # Блокировку держит другой процесс
+    other = FileLock(lock.path)
+    other.acquire()
+    try:
+        with pytest.raises(TrackerError):
+            with service.transaction():
+                service.add_item(EMAIL, board_id, "second")
+                service.move_item(EMAIL, board_id, "item_1", "Done")
+    finally:
+        other.release()
+
+    board = service.get_board(EMAIL, board_id)
+    assert list(board["items"]) == ["item_1"]
+    assert board["items"]["item_1"]["status"] == "To Do"
+    service.add_item(EMAIL, board_id, "third")
+    service.close()
+
+    service = open_service(tmp_path / "data.json", storage)
+    board = service.get_board(EMAIL, board_id)
+    assert [item["name"] for item in board["items"].values()] == ["first", "third"]
+    assert board["items"]["item_1"]["status"] == "To Do"
+    service.close()
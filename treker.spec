@@ -2,8 +2,8 @@
 
 
 a = Analysis(
-    ['treker.py'],
-    pathex=[],
+    ['pymonday/__main__.py'],
+    pathex=['.'],
     binaries=[],
     datas=[],
     hiddenimports=[],